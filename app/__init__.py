@@ -1,24 +1,33 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, jwt_required
 from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flasgger import Swagger
 import logging
 from .config import Config
+from .utils.pool import options_moteur, statistiques_pool
+from .utils.repliques import SessionRoutee, init_repliques
 
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": SessionRoutee})
 jwt = JWTManager()
 migrate = Migrate()
 
 
-def create_app():
+def create_app(config_overrides=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    # Permet aux tests de pointer vers une autre base avant l'initialisation des extensions
+    if config_overrides:
+        app.config.update(config_overrides)
+    # Options du moteur calculées pour la base finale (les tests remplacent l'URI par SQLite)
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", options_moteur(app.config))
 
     # Initialiser les extensions
     db.init_app(app)
+    init_repliques(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
 
@@ -53,11 +62,13 @@ def create_app():
     from .routes.recettes import recettes_bp
     from .routes.inventaires import inventaire_bp
     from .routes.ingredient import ingredient_bp
+    from .routes.rechercher import rechercher_bp
 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(recettes_bp)
     app.register_blueprint(inventaire_bp)
     app.register_blueprint(ingredient_bp)
+    app.register_blueprint(rechercher_bp)
 
     # Gestion des erreurs JWT
     @jwt.unauthorized_loader
@@ -80,6 +91,43 @@ def create_app():
         if request.method == "OPTIONS":
             return "", 200
 
+    from .utils.mots_de_passe import service_hachage
+    service_hachage.configurer(app.config["HACHAGE_ALGORITHME"], app.config["HACHAGE_COUT"],
+                               app.config["HACHAGE_PROCESSUS"], app.config["HACHAGE_FILE_MAX"],
+                               app.config["HACHAGE_ATTENTE"])
+
+    from .utils.limitation import limiteur
+    limiteur.configurer(app.config["LIMITATION_REGLES"], app.config["LIMITATION_STOCKAGE_URL"],
+                        app.config["LIMITATION_ACTIVE"])
+    if app.config["PROXY_NIVEAUX"]:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_NIVEAUX"])
+
+    # Cache des ingrédients partagé par les requêtes du worker ; écoute LISTEN démarrée dans chaque worker
+    from .utils.ingredients import cache_ingredients, demarrer_ecoute
+    cache_ingredients.configurer(app.config["INGREDIENTS_CACHE_TAILLE"], app.config["INGREDIENTS_CACHE_TTL"])
+    if app.config["INGREDIENTS_NOTIFY"]:
+        @app.before_request
+        def ecouter_ingredients():
+            demarrer_ecoute(db.engine)
+
+    @app.route('/sante/pool')
+    @jwt_required()
+    def statistiques_pool_connexions():
+        """
+        État du pool de connexions du worker
+        ---
+        tags:
+          - Santé
+        security:
+          - bearerAuth: []
+        responses:
+          '200':
+            description: Connexions sorties, disponibles, débordement et temps d'attente (propres au worker).
+          '401':
+            description: Non autorisé.
+        """
+        return jsonify(statistiques_pool(db.engine)), 200
+
     # Ajouter une route pour la racine
     @app.route('/')
     def index():
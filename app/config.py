@@ -23,8 +23,73 @@ class Config:
         DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
+
+    # Réplicas en lecture (séparés par des virgules) pour les routes @lecture_seule, choisies en round_robin
+    # ou least_connections ; une réplique injoignable est écartée REPLICA_EXCLUSION secondes. Un utilisateur
+    # (identité du JWT) qui vient d'écrire lit sur la base principale pendant REPLICA_LECTURE_ECRITURES secondes ;
+    # ces instants sont gardés par worker, ou partagés entre workers via REPLICA_STOCKAGE_URL (redis://)
+    DATABASE_REPLICA_URLS = [
+        url.strip().replace("postgres://", "postgresql://", 1)
+        for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+    ]
+    REPLICA_SELECTION = os.getenv("REPLICA_SELECTION", "round_robin")
+    REPLICA_EXCLUSION = int(os.getenv("REPLICA_EXCLUSION", 30))
+    REPLICA_LECTURE_ECRITURES = int(os.getenv("REPLICA_LECTURE_ECRITURES", 5))
+    REPLICA_STOCKAGE_URL = os.getenv("REPLICA_STOCKAGE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Pool de connexions (Postgres) : taille et débordement par worker, attente max d'une connexion (s),
+    # recyclage des connexions (s) et vérification avant usage contre les connexions coupées par le serveur.
+    # DB_STATEMENT_TIMEOUT (ms, 0 = aucun) annule côté serveur les requêtes trop longues.
+    # SQLALCHEMY_ENGINE_OPTIONS est construit par create_app à partir de ces valeurs (voir utils/pool.py)
+    DB_POOL_TAILLE = int(os.getenv("DB_POOL_TAILLE", 5))
+    DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "oui")
+    DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", 15000))
+
+    # Hachage des mots de passe : algorithme (bcrypt, scrypt, pbkdf2) et coût (tours bcrypt, log2(N) scrypt,
+    # itérations pbkdf2 ; vide = défaut de l'algorithme). Les hachés aux anciens paramètres sont refaits à la
+    # connexion. Calcul dans HACHAGE_PROCESSUS processus par worker (0 = dans le thread de la requête) ;
+    # au-delà de HACHAGE_FILE_MAX hachages en attente, refus (503) après HACHAGE_ATTENTE secondes
+    HACHAGE_ALGORITHME = os.getenv("HACHAGE_ALGORITHME", "bcrypt")
+    HACHAGE_COUT = int(os.getenv("HACHAGE_COUT")) if os.getenv("HACHAGE_COUT") else None
+    HACHAGE_PROCESSUS = int(os.getenv("HACHAGE_PROCESSUS", 1))
+    HACHAGE_FILE_MAX = int(os.getenv("HACHAGE_FILE_MAX", 16))
+    HACHAGE_ATTENTE = float(os.getenv("HACHAGE_ATTENTE", 5))
+
+    # Limitation de débit (seaux à jetons) par blueprint et par clé : "N/période" (s, minute, heure ou secondes),
+    # vide ou 0 = sans limite. Seaux propres au worker, ou partagés via LIMITATION_STOCKAGE_URL (redis://,
+    # paquet redis requis). PROXY_NIVEAUX = nombre de proxys de confiance devant l'application, pour que
+    # l'IP limitée soit celle du client (X-Forwarded-For) et non celle du proxy
+    LIMITATION_ACTIVE = os.getenv("LIMITATION_ACTIVE", "1").lower() in ("1", "true", "oui")
+    LIMITATION_STOCKAGE_URL = os.getenv("LIMITATION_STOCKAGE_URL")
+    LIMITATION_REGLES = {
+        "auth": {
+            "ip": os.getenv("LIMITATION_AUTH_IP", "20/minute"),
+            "email": os.getenv("LIMITATION_AUTH_EMAIL", "5/minute"),
+        },
+    }
+    PROXY_NIVEAUX = int(os.getenv("PROXY_NIVEAUX", 0))
+
+    # Pool de suggestions (/recettes/suggestions) : nombre de recettes pré-sérialisées et durée de vie en secondes
+    SUGGESTIONS_POOL_TAILLE = int(os.getenv("SUGGESTIONS_POOL_TAILLE", 300))
+    SUGGESTIONS_POOL_TTL = int(os.getenv("SUGGESTIONS_POOL_TTL", 300))
+
+    # Index d'autocomplétion des ingrédients : reconstruction complète (écritures des autres workers), en secondes
+    INGREDIENTS_INDEX_TTL = int(os.getenv("INGREDIENTS_INDEX_TTL", 600))
+
+    # Cache LRU des ingrédients (par id et par nom) : nombre d'entrées et durée de vie en secondes.
+    # Les écritures sont propagées aux autres workers par LISTEN/NOTIFY (Postgres uniquement, sans effet ailleurs) ;
+    # INGREDIENTS_NOTIFY=0 le désactive, au risque qu'un nom en cache désigne un ingrédient supprimé ailleurs
+    INGREDIENTS_CACHE_TAILLE = int(os.getenv("INGREDIENTS_CACHE_TAILLE", 4096))
+    INGREDIENTS_CACHE_TTL = int(os.getenv("INGREDIENTS_CACHE_TTL", 600))
+    INGREDIENTS_NOTIFY = os.getenv("INGREDIENTS_NOTIFY", "1").lower() in ("1", "true", "oui")
+
+    # Import NDJSON (POST /recettes/import) : nombre de recettes par transaction
+    IMPORT_TAILLE_LOT = int(os.getenv("IMPORT_TAILLE_LOT", 500))
+
     # Configuration JWT
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=7)
@@ -34,8 +99,8 @@ class Config:
     CORS_RESOURCES = {
         r"/*": {
             "origins": CORS_ORIGINS,
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
             "supports_credentials": True,
-            "allow_headers": ["Content-Type", "Authorization"]
+            "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key"]
         }
     }
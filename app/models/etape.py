@@ -3,6 +3,7 @@ from app import db
 
 class Etape(db.Model):
     __tablename__ = "etapes"
+    __table_args__ = (db.Index("ix_etapes_id_recette_ordre", "id_recette", "ordre"),)
     id_etape = db.Column(db.Integer, primary_key=True, autoincrement=True)
     id_recette = db.Column(db.Integer, db.ForeignKey("recettes.id_recette"), nullable=False)
     ordre = db.Column(db.Integer, nullable=False)
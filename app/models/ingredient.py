@@ -7,11 +7,13 @@ class Ingredient(db.Model):
     nom = db.Column(db.String(100), nullable=False, unique=True)
     unite = db.Column(db.String(20), nullable=True)  # Ex. "g", "L", "unités"
     prix_unitaire = db.Column(db.Float, nullable=True)  # Prix en euros
+    densite = db.Column(db.Float, nullable=True)  # En g/mL, pour convertir entre masse et volume
 
     def to_dict(self):
         return {
             "id_ingredient": self.id_ingredient,
             "nom": self.nom,
             "unite": self.unite,
-            "prix_unitaire": self.prix_unitaire
+            "prix_unitaire": self.prix_unitaire,
+            "densite": self.densite
         }
@@ -1,4 +1,5 @@
 from app import db
+from app.utils.ingredients import precharger_fiches
 
 
 class Inventaire(db.Model):
@@ -6,13 +7,14 @@ class Inventaire(db.Model):
     id_inventaire = db.Column(db.Integer, primary_key=True, autoincrement=True)
     nom = db.Column(db.String(100), nullable=False)
     publique = db.Column(db.Boolean, default=False)
-    id_utilisateur = db.Column(db.Integer, db.ForeignKey("utilisateurs.id_utilisateur"), nullable=False)
+    id_utilisateur = db.Column(db.Integer, db.ForeignKey("utilisateurs.id_utilisateur"), nullable=False, index=True)
 
     # Relations
     ingredients = db.relationship("InventaireIngredient", back_populates="inventaire", cascade="all, delete-orphan")
     proprietaire = db.relationship("Utilisateur", back_populates="inventaires")
 
     def to_dict(self):
+        precharger_fiches(self.ingredients)
         return {
             "id_inventaire": self.id_inventaire,
             "nom": self.nom,
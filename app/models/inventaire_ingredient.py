@@ -1,8 +1,14 @@
 from app import db
+from app.utils.ingredients import fiche_ingredient
 
 
 class InventaireIngredient(db.Model):
     __tablename__ = "inventaire_ingredients"
+    # Une ligne par unité : cible des upserts de PATCH /inventaires/<id>/ingredients
+    __table_args__ = (
+        db.Index("uq_inventaire_ingredients_ingredient_unite", "id_inventaire", "id_ingredient", "unite",
+                 unique=True),
+    )
     id_inventaire_ingredient = db.Column(db.Integer, primary_key=True, autoincrement=True)
     id_inventaire = db.Column(db.Integer, db.ForeignKey("inventaires.id_inventaire"), nullable=False)
     id_ingredient = db.Column(db.Integer, db.ForeignKey("ingredients.id_ingredient"), nullable=False)
@@ -15,10 +21,11 @@ class InventaireIngredient(db.Model):
     ingredient = db.relationship("Ingredient")
 
     def to_dict(self):
+        ingredient = fiche_ingredient(self)
         return {
             "id_inventaire_ingredient": self.id_inventaire_ingredient,
             "id_ingredient": self.id_ingredient,
-            "nom_ingredient": self.ingredient.nom if self.ingredient else "Inconnu",
+            "nom_ingredient": ingredient["nom"] if ingredient else "Inconnu",
             "quantite_disponible": self.quantite_disponible,
             "unite": self.unite,
             "prix_unitaire": self.prix_unitaire
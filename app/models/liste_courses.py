@@ -1,14 +1,28 @@
 from app import db
+from app.utils.ingredients import precharger_fiches
 
 
 class ListeCourses(db.Model):
     __tablename__ = "liste_courses"
+    __table_args__ = (
+        db.Index("uq_liste_courses_empreinte", "id_utilisateur", "id_recette", "id_inventaire", "empreinte",
+                 unique=True),
+        db.Index("uq_liste_courses_cle_idempotence", "id_utilisateur", "cle_idempotence", unique=True),
+        db.Index("ix_liste_courses_id_utilisateur_id_liste", "id_utilisateur", "id_liste"),
+        # Listes à resynchroniser quand le stock d'un inventaire change
+        db.Index("ix_liste_courses_id_inventaire", "id_inventaire"),
+    )
     id_liste = db.Column(db.Integer, primary_key=True, autoincrement=True)
     nom = db.Column(db.String(100), nullable=False)
     date_creation = db.Column(db.DateTime, default=db.func.current_timestamp())
     id_utilisateur = db.Column(db.Integer, db.ForeignKey("utilisateurs.id_utilisateur"), nullable=False)
     id_recette = db.Column(db.Integer, db.ForeignKey("recettes.id_recette"), nullable=True)
     id_inventaire = db.Column(db.Integer, db.ForeignKey("inventaires.id_inventaire"), nullable=True)  # Nouveau
+    # Liste générée depuis une recette et un inventaire : ses articles suivent les changements de stock
+    synchronisee = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    # Empreinte des articles à la génération (NULL une fois resynchronisée) et clé Idempotency-Key de POST /courses
+    empreinte = db.Column(db.String(64), nullable=True)
+    cle_idempotence = db.Column(db.String(100), nullable=True)
 
     # Relations
     items = db.relationship("ListeCoursesItem", back_populates="liste", cascade="all, delete-orphan")
@@ -17,6 +31,7 @@ class ListeCourses(db.Model):
     utilisateur = db.relationship("Utilisateur", back_populates="listes_courses")
 
     def to_dict(self):
+        precharger_fiches(self.items)
         return {
             "id_liste": self.id_liste,
             "nom": self.nom,
@@ -24,5 +39,6 @@ class ListeCourses(db.Model):
             "id_utilisateur": self.id_utilisateur,
             "id_recette": self.id_recette,
             "id_inventaire": self.id_inventaire,
+            "synchronisee": self.synchronisee,
             "items": [item.to_dict() for item in self.items]
         }
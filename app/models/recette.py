@@ -1,4 +1,6 @@
 from app import db
+from app.utils.ingredients import precharger_fiches
+from sqlalchemy.orm import joinedload, selectinload
 import logging
 
 logger = logging.getLogger(__name__)
@@ -6,6 +8,13 @@ logger = logging.getLogger(__name__)
 
 class Recette(db.Model):
     __tablename__ = "recettes"
+    # Listes par auteur triées par id ; recettes publiques en index partiel. SQLite n'utilise un index partiel
+    # que si la requête reprend sa condition à l'identique : filtrer avec publique = true, pas IS true
+    __table_args__ = (
+        db.Index("ix_recettes_id_utilisateur_id_recette", "id_utilisateur", "id_recette"),
+        db.Index("ix_recettes_publiques", "id_recette",
+                 postgresql_where=db.text("publique"), sqlite_where=db.text("publique = 1")),
+    )
     id_recette = db.Column(db.Integer, primary_key=True, autoincrement=True)
     titre = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -22,8 +31,19 @@ class Recette(db.Model):
     listes_courses = db.relationship("ListeCourses", back_populates="recette")
     createur = db.relationship("Utilisateur", back_populates="recettes")
 
+    @classmethod
+    def options_details(cls):
+        # Charge en bloc tout ce que to_dict() parcourt : une requête par relation, quelle que soit la page
+        from app.models.recette_ingredient import RecetteIngredient
+        return (
+            selectinload(cls.ingredients).joinedload(RecetteIngredient.ingredient),
+            selectinload(cls.etapes),
+            joinedload(cls.createur),
+        )
+
     def to_dict(self):
         try:
+            precharger_fiches(self.ingredients)
             return {
                 "id_recette": self.id_recette,
                 "titre": self.titre,
@@ -1,4 +1,5 @@
 from app import db
+from app.utils.ingredients import fiche_ingredient
 import logging
 
 logger = logging.getLogger(__name__)
@@ -7,7 +8,7 @@ logger = logging.getLogger(__name__)
 class RecetteIngredient(db.Model):
     __tablename__ = "recette_ingredients"
     id_recette_ingredient = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    id_recette = db.Column(db.Integer, db.ForeignKey("recettes.id_recette"), nullable=False)
+    id_recette = db.Column(db.Integer, db.ForeignKey("recettes.id_recette"), nullable=False, index=True)
     id_ingredient = db.Column(db.Integer, db.ForeignKey("ingredients.id_ingredient"), nullable=False)
     quantite = db.Column(db.Float, nullable=False)
     unite = db.Column(db.String(20), nullable=False)
@@ -18,13 +19,14 @@ class RecetteIngredient(db.Model):
 
     def to_dict(self):
         try:
+            ingredient = fiche_ingredient(self)
             return {
                 "id_recette_ingredient": self.id_recette_ingredient,
                 "id_ingredient": self.id_ingredient,
-                "nom": self.ingredient.nom if self.ingredient else "Inconnu",
+                "nom": ingredient["nom"] if ingredient else "Inconnu",
                 "quantite": self.quantite,
                 "unite": self.unite,
-                "prix_unitaire": self.ingredient.prix_unitaire if self.ingredient else None
+                "prix_unitaire": ingredient["prix_unitaire"] if ingredient else None
             }
         except Exception as e:
             logger.error(f"Erreur dans RecetteIngredient.to_dict() pour id {self.id_recette_ingredient}: {str(e)}",
@@ -2,6 +2,7 @@ from app import db
 
 class RecetteUtilisateur(db.Model):
     __tablename__ = "recette_utilisateur"
+    __table_args__ = (db.Index("ix_recette_utilisateur_id_utilisateur_id_recette", "id_utilisateur", "id_recette"),)
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     id_recette = db.Column(db.Integer, db.ForeignKey("recettes.id_recette"), nullable=False)
     id_utilisateur = db.Column(db.Integer, db.ForeignKey("utilisateurs.id_utilisateur"), nullable=False)
@@ -1,5 +1,5 @@
-from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.utils.mots_de_passe import service_hachage
 
 
 class Utilisateur(db.Model):
@@ -16,10 +16,13 @@ class Utilisateur(db.Model):
     recettes_enregistrees = db.relationship("RecetteUtilisateur", back_populates="utilisateur")
 
     def set_password(self, password):
-        self.mot_de_passe = generate_password_hash(password)
+        self.mot_de_passe = service_hachage.hacher(password)
 
     def check_password(self, password):
-        return check_password_hash(self.mot_de_passe, password)
+        return service_hachage.verifier(self.mot_de_passe, password)
+
+    def password_needs_rehash(self):
+        return service_hachage.doit_rehacher(self.mot_de_passe)
 
     def to_dict(self):
         return {
@@ -1,6 +1,8 @@
 import re
 from flask import Blueprint, request, jsonify
 from ..models.utilisateur import Utilisateur
+from ..utils.limitation import limiter
+from ..utils.mots_de_passe import OCTETS_MAX, HachageSature, trop_long
 from .. import db
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity,verify_jwt_in_request
 import logging
@@ -33,6 +35,8 @@ def validate_password(password):
         return True, ""  # Allow empty password for optional updates
     if len(password) < 8:
         return False, "Le mot de passe doit contenir au moins 8 caractères"
+    if trop_long(password):
+        return False, f"Le mot de passe ne doit pas dépasser {OCTETS_MAX} octets"
     return True, ""
 
 
@@ -44,7 +48,13 @@ def validate_nom(nom):
     return True, ""
 
 
+def reponse_hachage_sature():
+    return jsonify({"message": "Service momentanément surchargé, réessayez dans quelques secondes"}), 503, \
+        {"Retry-After": "5"}
+
+
 @auth_bp.route("/inscription", methods=["POST"])
+@limiter("ip", "email")
 def inscription():
     try:
         data = request.get_json()
@@ -56,6 +66,8 @@ def inscription():
             return jsonify({"message": email_msg}), 400
         if len(mot_de_passe) < 8:
             return jsonify({"message": "Mot de passe trop court (min 8 caractères)"}), 400
+        if trop_long(mot_de_passe):
+            return jsonify({"message": f"Mot de passe trop long (max {OCTETS_MAX} octets)"}), 400
         if not nom or len(nom) > 100:
             return jsonify({"message": "Nom requis (max 100 caractères)"}), 400
 
@@ -67,6 +79,10 @@ def inscription():
         db.session.add(utilisateur)
         db.session.commit()
         return jsonify({"message": "Inscription réussie", "utilisateur": utilisateur.to_dict()}), 201
+    except HachageSature:
+        db.session.rollback()
+        logger.warning("Inscription refusée : file de hachage pleine")
+        return reponse_hachage_sature()
     except Exception as e:
         db.session.rollback()
         logger.error(f"Erreur inscription: {str(e)}", exc_info=True)
@@ -74,6 +90,7 @@ def inscription():
 
 
 @auth_bp.route("/connexion", methods=["POST"])
+@limiter("ip", "email")
 def connexion():
     """
         Connexion d'un utilisateur
@@ -123,6 +140,10 @@ def connexion():
             description: Données manquantes ou invalides
           401:
             description: Email ou mot de passe incorrect
+          429:
+            description: Trop de tentatives pour cette IP ou cet email (en-tête Retry-After)
+          503:
+            description: Trop de hachages de mots de passe en attente (en-tête Retry-After)
           500:
             description: Erreur interne du serveur
         """
@@ -151,6 +172,18 @@ def connexion():
             logger.warning(f"Échec de connexion - Identifiants incorrects pour : {email}")
             return jsonify({"message": "Email ou mot de passe incorrect"}), 401
 
+        if utilisateur.password_needs_rehash():
+            # Haché aux anciens paramètres : refait maintenant que le mot de passe en clair est disponible.
+            # Un échec ici (ancien mot de passe de plus de 72 octets vers bcrypt...) n'empêche pas la connexion,
+            # le haché sera refait à la suivante
+            try:
+                utilisateur.set_password(mot_de_passe)
+                db.session.commit()
+                logger.info(f"Mot de passe re-haché pour : {email}")
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"Re-hachage impossible pour {email} : {str(e)}")
+
         access_token = create_access_token(identity=str(utilisateur.id_utilisateur))
         refresh_token = create_refresh_token(identity=str(utilisateur.id_utilisateur))
         logger.info(f"Connexion réussie pour : {email}")
@@ -160,6 +193,9 @@ def connexion():
             "utilisateur": utilisateur.to_dict()
         }), 200
 
+    except HachageSature:
+        logger.warning("Connexion refusée : file de hachage pleine")
+        return reponse_hachage_sature()
     except Exception as e:
         logger.error(f"Erreur lors de la connexion : {str(e)}")
         return jsonify({"message": "Erreur interne du serveur", "details": str(e)}), 500
@@ -267,6 +303,10 @@ def profil():
                 "message": "Profil mis à jour avec succès",
                 "utilisateur": utilisateur.to_dict()
             }), 200
+    except HachageSature:
+        db.session.rollback()
+        logger.warning("Mise à jour du profil refusée : file de hachage pleine")
+        return reponse_hachage_sature()
     except Exception as e:
         db.session.rollback()
         logger.error(f"Erreur lors de l'accès/mise à jour du profil : {str(e)}")
@@ -1,8 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.ingredient import Ingredient
 from app.routes.recettes import recettes_bp  # Importé mais non utilisé ici, à vérifier si nécessaire
+from app.utils.pagination import paginer, meta_pagination
+from app.utils.recherche import filtre_contient
+from app.utils.autocompletion import obtenir_index
+from app.utils.ingredients import cache_ingredients
+from app.utils.repliques import lecture_seule
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,8 +15,14 @@ logger = logging.getLogger(__name__)
 ingredient_bp = Blueprint("ingredients", __name__)
 
 
+# Densité facultative, en g/mL
+def densite_valide(densite):
+    return densite is None or (isinstance(densite, (int, float)) and not isinstance(densite, bool) and densite > 0)
+
+
 @ingredient_bp.route("/ingredients", methods=["GET"])
 @jwt_required()  # Gardé pour limiter l'accès aux utilisateurs authentifiés
+@lecture_seule
 def lister_ingredients():
     try:
         page = request.args.get("page", 1, type=int)
@@ -20,19 +31,76 @@ def lister_ingredients():
 
         query = Ingredient.query
         if search:
-            query = query.filter(Ingredient.nom.ilike(f"%{search}%"))
+            query = query.filter(filtre_contient(Ingredient.nom, search))
 
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        pagination = paginer(query, Ingredient.id_ingredient, page, per_page,
+                             request.args.get("cursor"), request.args.get("count"))
         return jsonify({
             "ingredients": [ing.to_dict() for ing in pagination.items],
-            "total": pagination.total,
-            "pages": pagination.pages,
-            "current_page": page
+            **meta_pagination(pagination, page)
         }), 200
+    except ValueError as e:
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"message": "Erreur serveur", "details": str(e)}), 500
 
 
+@ingredient_bp.route("/ingredients/autocomplete", methods=["GET"])
+@jwt_required()
+@lecture_seule
+def autocompleter_ingredients():
+    """
+    Autocomplétion des noms d'ingrédients
+    ---
+    tags:
+      - Ingredients
+    security:
+      - bearerAuth: []
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Début du nom ou d'un de ses mots (insensible à la casse et aux accents).
+      - name: limit
+        in: query
+        type: integer
+        description: Nombre maximum de suggestions (par défaut 10, max 50).
+    responses:
+      '200':
+        description: Ingrédients dont le nom (ou un mot du nom) commence par q, dans l'ordre alphabétique.
+      '401':
+        description: Non autorisé.
+      '500':
+        description: Erreur interne du serveur.
+    """
+    try:
+        limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+        index = obtenir_index(current_app.config.get("INGREDIENTS_INDEX_TTL", 600))
+        return jsonify({"ingredients": index.rechercher(request.args.get("q", ""), limit)}), 200
+    except Exception as e:
+        return jsonify({"message": "Erreur serveur", "details": str(e)}), 500
+
+
+@ingredient_bp.route("/ingredients/cache", methods=["GET"])
+@jwt_required()
+def statistiques_cache_ingredients():
+    """
+    Statistiques du cache des ingrédients du worker
+    ---
+    tags:
+      - Ingredients
+    security:
+      - bearerAuth: []
+    responses:
+      '200':
+        description: Compteurs hits/misses et nombre d'entrées du cache (propres au worker qui répond).
+      '401':
+        description: Non autorisé.
+    """
+    return jsonify(cache_ingredients.statistiques()), 200
+
+
 @ingredient_bp.route("/ingredients", methods=["POST"])
 @jwt_required()
 def ajouter_ingredient():
@@ -43,13 +111,16 @@ def ajouter_ingredient():
             logger.warning("Nom manquant")
             return jsonify({"message": "Le nom est requis"}), 400
         nom = data["nom"].strip()
+        if not densite_valide(data.get("densite")):
+            return jsonify({"message": "La densité doit être un nombre positif (g/mL)"}), 400
         if Ingredient.query.filter_by(nom=nom).first():
             logger.info(f"Ingrédient existant: {nom}")
             return jsonify({"message": "Cet ingrédient existe déjà"}), 400
         ingredient = Ingredient(
             nom=nom,
             unite=data.get("unite", "g"),
-            prix_unitaire=data.get("prix_unitaire")
+            prix_unitaire=data.get("prix_unitaire"),
+            densite=data.get("densite")
         )
         db.session.add(ingredient)
         db.session.commit()
@@ -133,6 +204,10 @@ def modifier_ingredient(id):
             prix_unitaire:
               type: number
               example: 2.0
+            densite:
+              type: number
+              example: 1.03
+              description: Densité en g/mL, utilisée pour convertir entre masse et volume.
     responses:
       '200':
         description: Ingrédient mis à jour avec succès.
@@ -148,15 +223,28 @@ def modifier_ingredient(id):
     try:
         ingredient = Ingredient.query.get_or_404(id)
         data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({"message": "Données manquantes"}), 400
 
+        # Tout est validé avant de modifier l'ingrédient : un 400 ne laisse aucun changement en session
+        nom = ingredient.nom
         if "nom" in data:
+            if not isinstance(data["nom"], str) or not data["nom"].strip():
+                return jsonify({"message": "Le nom est requis"}), 400
             nom = data["nom"].strip()
             if nom != ingredient.nom and Ingredient.query.filter_by(nom=nom).first():
                 return jsonify({"message": "Cet ingrédient existe déjà"}), 400
-            ingredient.nom = nom
+        prix_unitaire = data.get("prix_unitaire", ingredient.prix_unitaire)
+        if prix_unitaire is not None and (not isinstance(prix_unitaire, (int, float))
+                                          or isinstance(prix_unitaire, bool) or prix_unitaire < 0):
+            return jsonify({"message": "Le prix unitaire doit être un nombre positif"}), 400
+        if not densite_valide(data.get("densite")):
+            return jsonify({"message": "La densité doit être un nombre positif (g/mL)"}), 400
 
+        ingredient.nom = nom
         ingredient.unite = data.get("unite", ingredient.unite)  # Corrigé : 'unite' au lieu de 'unite_par_defaut'
-        ingredient.prix_unitaire = data.get("prix_unitaire", ingredient.prix_unitaire)
+        ingredient.prix_unitaire = prix_unitaire
+        ingredient.densite = data.get("densite", ingredient.densite)
 
         db.session.commit()
         return jsonify({"message": "Ingrédient mis à jour",
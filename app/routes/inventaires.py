@@ -1,7 +1,6 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models.ingredient import Ingredient
 from app.models.inventaire import Inventaire
 from app.models.inventaire_ingredient import InventaireIngredient
 from app.models.liste_courses_item import ListeCoursesItem
@@ -9,29 +8,21 @@ from app.models.liste_courses import ListeCourses
 from app.models.recette import Recette
 import re
 import logging
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 
-from app.models.recette_ingredient import RecetteIngredient
 from app.models.recette_utilisateur import RecetteUtilisateur
+from app.utils.courses import empreinte_courses, planifier_courses, quantites_manquantes, resynchroniser_listes
+from app.utils.export import reponse_export
+from app.utils.pagination import paginer, meta_pagination
+from app.utils.recherche import filtre_contient
+from app.utils.stocks import appliquer_operations
+from app.utils.unites import unite_canonique, unite_connue
 
 inventaire_bp = Blueprint("inventaires", __name__)
 
 logger = logging.getLogger(__name__)
-UNITES_VALIDES = {"g", "kg", "L", "mL", "cl", "unités"}
-
-
-# Fonction utilitaire pour convertir les unités
-def convertir_unites(quantite, unite_source, unite_cible="g"):
-    conversions = {"g": 1, "kg": 1000, "ml": 1, "l": 1000, "cl": 10, "unites": 1}
-    unite_source = unite_source.lower()
-    unite_cible = unite_cible.lower()
-
-    # Vérification des unités valides
-    if unite_source not in conversions or unite_cible not in conversions:
-        raise ValueError(f"Unité invalide : {unite_source} ou {unite_cible}")
-
-    # Conversion
-    quantite_base = quantite * conversions[unite_source]
-    return quantite_base / conversions[unite_cible]
 
 
 # Créer un inventaire
@@ -97,6 +88,8 @@ def ajouter_ingredient_inventaire(id):
         description: Non autorisé
       '404':
         description: Ressource non trouvée
+      '409':
+        description: Ingrédient déjà en stock dans cette unité
       '500':
         description: Erreur interne
     """
@@ -130,26 +123,150 @@ def ajouter_ingredient_inventaire(id):
     #     db.session.rollback()
     #     return jsonify({"message": "Erreur lors de l'ajout", "details": str(e)}), 500
 
+    inventaire = Inventaire.query.get_or_404(id)
+    if inventaire.id_utilisateur != int(get_jwt_identity()):
+        return jsonify({"message": "Accès non autorisé"}), 403
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("id_ingredient"), int) \
+            or isinstance(data["id_ingredient"], bool):
+        return jsonify({"message": "id_ingredient (entier) est requis"}), 400
+
     try:
-        data = request.get_json()
-        inventaire = Inventaire.query.get_or_404(id)
-        if inventaire.id_utilisateur != int(get_jwt_identity()):
-            return jsonify({"message": "Accès non autorisé"}), 403
         inv_ing = InventaireIngredient(
             id_inventaire=id,
             id_ingredient=data["id_ingredient"],
             quantite_disponible=data.get("quantite_disponible", 0),
-            unite=data.get("unite", "g"),
+            unite=unite_canonique(data.get("unite", "g")),
             prix_unitaire=data.get("prix_unitaire")
         )
         db.session.add(inv_ing)
+        resynchroniser_listes(id, [inv_ing.id_ingredient])
         db.session.commit()
         return jsonify(inv_ing.to_dict()), 201
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"message": str(e)}), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "Cet ingrédient est déjà en stock dans cette unité"}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Erreur lors de l'ajout", "details": str(e)}), 500
 
 
+@inventaire_bp.route("/inventaires/<int:id>/ingredients", methods=["PATCH"])
+@jwt_required()
+def modifier_stock_inventaire(id):
+    """
+    Mettre à jour le stock de plusieurs ingrédients en une transaction
+    ---
+    tags:
+      - Inventaires
+    security:
+      - bearerAuth: []
+    parameters:
+      - name: id
+        in: path
+        type: integer
+        required: true
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - operations
+          properties:
+            operations:
+              type: array
+              description: Appliquées dans l'ordre ; decrement ne descend pas sous 0
+              items:
+                type: object
+                properties:
+                  op:
+                    type: string
+                    enum: [add, set, decrement]
+                    example: "add"
+                  id_ingredient:
+                    type: integer
+                    example: 1
+                  quantite:
+                    type: number
+                    example: 500
+                  unite:
+                    type: string
+                    description: Unité de la ligne visée (par défaut celle du stock existant, sinon g)
+                    example: "g"
+                  prix_unitaire:
+                    type: number
+                    example: 2.5
+    responses:
+      '200':
+        description: Lignes de stock résultantes
+      '400':
+        description: Opération invalide ou ingrédient introuvable
+      '403':
+        description: Non autorisé
+      '404':
+        description: Inventaire non trouvé
+      '500':
+        description: Erreur interne
+    """
+    # Hors du try : un inventaire inexistant reste un 404
+    inventaire = Inventaire.query.get_or_404(id)
+    if inventaire.id_utilisateur != int(get_jwt_identity()):
+        return jsonify({"message": "Non autorisé"}), 403
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"message": "Un objet {operations: [...]} est requis"}), 400
+
+    try:
+        lignes = appliquer_operations(id, data.get("operations"))
+        resynchroniser_listes(id, [ligne["id_ingredient"] for ligne in lignes])
+        db.session.commit()
+        return jsonify({"message": "Stock mis à jour", "ingredients": lignes}), 200
+    except (ValueError, TypeError) as e:
+        db.session.rollback()
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Erreur lors de la mise à jour du stock", "details": str(e)}), 500
+
+
+@inventaire_bp.route("/inventaires/export", methods=["GET"])
+@jwt_required()
+def exporter_inventaires():
+    """
+    Exporter les inventaires de l'utilisateur (flux NDJSON ou CSV)
+    ---
+    tags:
+      - Inventaires
+    security:
+      - bearerAuth: []
+    parameters:
+      - name: format
+        in: query
+        type: string
+        enum: [ndjson, csv]
+        description: Format de sortie (ndjson par défaut). En CSV, la liste des ingrédients est encodée en JSON.
+    responses:
+      '200':
+        description: Un inventaire par ligne, envoyé au fil de la lecture.
+      '400':
+        description: Format inconnu.
+      '401':
+        description: Non autorisé. Jeton JWT manquant ou invalide.
+    """
+    try:
+        query = Inventaire.query.filter_by(id_utilisateur=int(get_jwt_identity())).options(
+            selectinload(Inventaire.ingredients).joinedload(InventaireIngredient.ingredient)
+        ).order_by(Inventaire.id_inventaire)
+        return reponse_export(query, Inventaire.to_dict,
+                              ["id_inventaire", "nom", "publique", "id_utilisateur", "ingredients"], "inventaires")
+    except ValueError as e:
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
+
+
 @inventaire_bp.route("/inventaires", methods=["GET"])
 @jwt_required()
 def lister_inventaires():
@@ -296,6 +413,15 @@ def modifier_inventaire(id):
         return jsonify({"message": "Erreur lors de la mise à jour", "details": str(e)}), 500
 
 
+def _liste_concurrente(**cle):
+    """
+    Après une violation d'unicité à l'insertion d'une liste : annule la transaction et renvoie la liste
+    insérée par la requête concurrente (même clé de déduplication).
+    """
+    db.session.rollback()
+    return ListeCourses.query.filter_by(**cle).one()
+
+
 # Générer une liste de courses
 @inventaire_bp.route("/inventaires/<int:id>/courses", methods=["GET"])
 @jwt_required()
@@ -316,78 +442,60 @@ def generer_liste_courses(id):
         ).first():
             return jsonify({"message": "Accès non autorisé à cette recette"}), 403
 
-        ingredients_recette = RecetteIngredient.query.filter_by(id_recette=id_recette).all()
-        if not ingredients_recette:
+        # Quantités manquantes calculées en une requête (jointure recette / inventaire / facteurs d'unités)
+        lignes = quantites_manquantes(id_recette, id)
+        if not lignes:
             return jsonify({"message": "Aucun ingrédient dans cette recette"}), 400
 
-        ingredients_inventaire = {
-            ing.id_ingredient: ing for ing in InventaireIngredient.query.filter_by(id_inventaire=id).all()
-        }
-
         liste_courses = []
         total_cout = 0.0
-        for ing_recette in ingredients_recette:
-            ing_inventaire = ingredients_inventaire.get(ing_recette.id_ingredient)
-            quantite_requise = ing_recette.quantite
-            unite_recette = ing_recette.unite.lower()
-            quantite_manquante = quantite_requise
-
-            if ing_inventaire:
-                unite_inventaire = ing_inventaire.unite.lower()
-                quantite_requise_base = convertir_unites(quantite_requise, unite_recette)
-                quantite_disponible_base = convertir_unites(ing_inventaire.quantite_disponible, unite_inventaire)
-                quantite_manquante_base = max(0, quantite_requise_base - quantite_disponible_base)
-                quantite_manquante = convertir_unites(quantite_manquante_base, "g",
-                                                      unite_recette) if quantite_manquante_base > 0 else 0
-
-            if quantite_manquante > 0:
-                prix_unitaire = ing_inventaire.prix_unitaire if ing_inventaire and ing_inventaire.prix_unitaire else 0.0
-                cout = quantite_manquante * prix_unitaire
+        for ligne in lignes:
+            if ligne["quantite_manquante"] > 0:
+                cout = ligne["quantite_manquante"] * ligne["prix_unitaire"]
                 total_cout += cout
-                liste_courses.append({
-                    "id_ingredient": ing_recette.id_ingredient,
-                    "nom": ing_recette.ingredient.nom,
-                    "quantite_manquante": quantite_manquante,
-                    "unite": ing_recette.unite,
-                    "prix_unitaire": prix_unitaire,
-                    "cout": cout
-                })
+                liste_courses.append({**ligne, "cout": cout})
+
+        reponse = {
+            "items": [
+                {"id_ingredient": item["id_ingredient"], "nom": item["nom"], "quantite": item["quantite_manquante"],
+                 "unite": item["unite"]} for item in liste_courses],
+            "total_cout": total_cout
+        }
+
+        # Même utilisateur, recette, inventaire et contenu : la liste déjà générée est renvoyée telle quelle
+        empreinte = empreinte_courses((item["id_ingredient"], item["unite"], item["quantite_manquante"])
+                                      for item in liste_courses)
+        cle = {"id_utilisateur": id_utilisateur, "id_recette": id_recette, "id_inventaire": id,
+               "empreinte": empreinte}
+        existante = ListeCourses.query.filter_by(**cle).first()
+        if existante:
+            return jsonify({"id_liste": existante.id_liste, "nom": existante.nom, **reponse}), 200
 
         # Persister la liste
         nouvelle_liste = ListeCourses(
             nom=f"Liste pour {recette.titre} (Inventaire {inventaire.nom})",
-            id_utilisateur=id_utilisateur,
-            id_recette=id_recette,
-            id_inventaire=id
+            synchronisee=True,
+            **cle
         )
         db.session.add(nouvelle_liste)
-        db.session.flush()
-
-        for item in liste_courses:
-            liste_item = ListeCoursesItem(
-                id_liste=nouvelle_liste.id_liste,
-                id_ingredient=item["id_ingredient"],
-                quantite=item["quantite_manquante"],
-                unite=item["unite"]
-            )
-            db.session.add(liste_item)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # Double clic : une requête concurrente a inséré la même liste entre la recherche et l'insertion
+            existante = _liste_concurrente(**cle)
+            return jsonify({"id_liste": existante.id_liste, "nom": existante.nom, **reponse}), 200
+
+        if liste_courses:
+            db.session.execute(insert(ListeCoursesItem), [
+                {"id_liste": nouvelle_liste.id_liste, "id_ingredient": item["id_ingredient"],
+                 "quantite": item["quantite_manquante"], "unite": item["unite"]}
+                for item in liste_courses
+            ])
 
         db.session.commit()
 
         logger.info(f"Liste de courses générée et sauvegardée : {nouvelle_liste.id_liste}")
-        # return jsonify({
-        #     "liste_courses": liste_courses,
-        #     "total_cout": total_cout,
-        #     "id_liste": nouvelle_liste.id_liste
-        # }), 200
-        return jsonify({
-            "id_liste": nouvelle_liste.id_liste,
-            "nom": nouvelle_liste.nom,
-            "items": [
-                {"id_ingredient": item["id_ingredient"], "nom": item["nom"], "quantite": item["quantite_manquante"],
-                 "unite": item["unite"]} for item in liste_courses],
-            "total_cout": total_cout
-        }), 200
+        return jsonify({"id_liste": nouvelle_liste.id_liste, "nom": nouvelle_liste.nom, **reponse}), 200
 
     except Exception as e:
         db.session.rollback()
@@ -423,6 +531,17 @@ def obtenir_liste_courses_pagination():
         type: string
         required: false
         description: Terme de recherche dans le nom
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Pagination par curseur (vide pour la première page, puis la valeur next_cursor reçue)
+      - name: count
+        in: query
+        type: string
+        required: false
+        enum: [exact, cached, estimate]
+        description: Calcul du total (exact par défaut ; en mode curseur, total omis si absent)
     responses:
       '200':
         description: Liste des courses récupérée avec succès
@@ -458,6 +577,9 @@ def obtenir_liste_courses_pagination():
                   type: integer
                 current_page:
                   type: integer
+                next_cursor:
+                  type: string
+                  description: Curseur de la page suivante (mode curseur uniquement, null en fin de liste)
       '401':
         description: Non autorisé
       '500':
@@ -472,19 +594,17 @@ def obtenir_liste_courses_pagination():
         query = ListeCourses.query.filter_by(id_utilisateur=id_utilisateur)
 
         if search:
-            query = query.filter(ListeCourses.nom.ilike(f"%{search}%"))
+            query = query.filter(filtre_contient(ListeCourses.nom, search))
 
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        courses = pagination.items
-        total = pagination.total
-        pages = pagination.pages
+        pagination = paginer(query, ListeCourses.id_liste, page, per_page,
+                             request.args.get("cursor"), request.args.get("count"))
 
         return jsonify({
-            "courses": [course.to_dict() for course in courses],
-            "total": total,
-            "pages": pages,
-            "current_page": page
+            "courses": [course.to_dict() for course in pagination.items],
+            **meta_pagination(pagination, page)
         }), 200
+    except ValueError as e:
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"message": "Erreur lors de la récupération des listes de courses", "details": str(e)}), 500
 
@@ -538,11 +658,11 @@ def supprimer_inventaire(id):
         return jsonify({"message": "Erreur lors de la suppression", "details": str(e)}), 500
 
 
-@inventaire_bp.route("/courses", methods=["GET"])
+@inventaire_bp.route("/courses/generale", methods=["GET"])
 @jwt_required()
 def lister_courses_generale():
     """
-    Lister les courses générales
+    Lister les courses générales (une portion de chaque recette de l'utilisateur, stock de tous ses inventaires)
     ---
     tags:
       - Inventaires
@@ -586,65 +706,22 @@ def lister_courses_generale():
     try:
         id_utilisateur = int(get_jwt_identity())
 
-        # Récupérer toutes les recettes de l'utilisateur
-        recettes = Recette.query.filter_by(id_utilisateur=id_utilisateur).all()
-        if not recettes:
+        ids_recettes = [id_recette for (id_recette,) in db.session.query(Recette.id_recette).filter_by(
+            id_utilisateur=id_utilisateur)]
+        if not ids_recettes:
             return jsonify({"message": "Aucune recette trouvée"}), 404
-
-        # Récupérer tous les inventaires de l'utilisateur
-        inventaires = Inventaire.query.filter_by(id_utilisateur=id_utilisateur).all()
-
-        # Fonction pour convertir les quantités (réutilisée)
-        def convertir_quantite(quantite, unite):
-            quantite_num = float(quantite.split(unite)[0])
-            conversions = {"g": 1, "kg": 1000, "cl": 10, "ml": 1, "unites": 1}
-            return quantite_num * conversions.get(unite.lower(), 1)
-
-        # Agréger les ingrédients nécessaires de toutes les recettes
-        ingredients_requis = {}
-        for recette in recettes:
-            for ri in recette.ingredients:
-                quantite = ri.quantite
-                unite = quantite[-1] if quantite[-1] in "gklmu" else "g"
-                quantite_num = convertir_quantite(quantite, unite)
-                if ri.id_ingredient in ingredients_requis:
-                    ingredients_requis[ri.id_ingredient]["quantite"] += quantite_num
-                else:
-                    ingredients_requis[ri.id_ingredient] = {"quantite": quantite_num, "unite": unite}
-
-        # Agréger les ingrédients disponibles de tous les inventaires
-        ingredients_disponibles = {}
-        for inventaire in inventaires:
-            for ii in inventaire.ingredients:
-                quantite = ii.quantite_disponible
-                unite = quantite[-1] if quantite[-1] in "gklmu" else "g"
-                quantite_num = convertir_quantite(quantite, unite)
-                if ii.id_ingredient in ingredients_disponibles:
-                    ingredients_disponibles[ii.id_ingredient]["quantite"] += quantite_num
-                else:
-                    ingredients_disponibles[ii.id_ingredient] = {"quantite": quantite_num, "unite": unite}
-
-        # Générer la liste de courses générale
-        liste_courses = []
-        total_cout = 0.0
-        for id_ingredient, data_requis in ingredients_requis.items():
-            data_dispo = ingredients_disponibles.get(id_ingredient, {"quantite": 0, "unite": "g"})
-            quantite_manquante = max(0, data_requis["quantite"] - data_dispo["quantite"])
-            if quantite_manquante > 0:
-                ingredient = Ingredient.query.get(id_ingredient)
-                # Utiliser un prix moyen ou par défaut
-                prix = next((ii.prix_unitaire for inv in inventaires for ii in inv.ingredients
-                             if ii.id_ingredient == id_ingredient), 0.0)
-                cout = quantite_manquante * (prix / 1000) if data_requis["unite"] == "kg" else quantite_manquante * prix
-                unite_sortie = data_requis["unite"] if data_requis["unite"] != "kg" else "g"
-                quantite_manquante_str = f"{int(quantite_manquante)}{unite_sortie}"
-                liste_courses.append({
-                    "nom": ingredient.nom,
-                    "quantite_manquante": quantite_manquante_str,
-                    "prix_unitaire": prix,
-                    "cout": cout
-                })
-                total_cout += cout
+        ids_inventaires = [id_inventaire for (id_inventaire,) in db.session.query(Inventaire.id_inventaire).filter_by(
+            id_utilisateur=id_utilisateur)]
+
+        # Une portion de chaque recette, stocks de tous les inventaires
+        articles = planifier_courses({id_recette: 1 for id_recette in ids_recettes}, ids_inventaires)
+        liste_courses = [{
+            "nom": article["nom"],
+            "quantite_manquante": f"{article['quantite']:g}{article['unite']}",
+            "prix_unitaire": article["prix_unitaire"],
+            "cout": article["cout"]
+        } for article in articles]
+        total_cout = sum(article["cout"] for article in articles)
 
         return jsonify({
             "liste_courses": liste_courses,
@@ -654,6 +731,41 @@ def lister_courses_generale():
         return jsonify({"message": "Erreur lors de la génération", "details": str(e)}), 500
 
 
+@inventaire_bp.route("/courses/export", methods=["GET"])
+@jwt_required()
+def exporter_courses():
+    """
+    Exporter les listes de courses de l'utilisateur (flux NDJSON ou CSV)
+    ---
+    tags:
+      - Courses
+    security:
+      - bearerAuth: []
+    parameters:
+      - name: format
+        in: query
+        type: string
+        enum: [ndjson, csv]
+        description: Format de sortie (ndjson par défaut). En CSV, la liste des articles est encodée en JSON.
+    responses:
+      '200':
+        description: Une liste de courses par ligne, envoyée au fil de la lecture.
+      '400':
+        description: Format inconnu.
+      '401':
+        description: Non autorisé. Jeton JWT manquant ou invalide.
+    """
+    try:
+        query = ListeCourses.query.filter_by(id_utilisateur=int(get_jwt_identity())).options(
+            selectinload(ListeCourses.items).joinedload(ListeCoursesItem.ingredient)
+        ).order_by(ListeCourses.id_liste)
+        return reponse_export(query, ListeCourses.to_dict,
+                              ["id_liste", "nom", "date_creation", "id_utilisateur", "id_recette", "id_inventaire",
+                               "synchronisee", "items"], "courses")
+    except ValueError as e:
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
+
+
 @inventaire_bp.route("/courses", methods=["POST"])
 @jwt_required()
 def creer_liste_courses():
@@ -665,6 +777,11 @@ def creer_liste_courses():
     security:
       - bearerAuth: []
     parameters:
+      - name: Idempotency-Key
+        in: header
+        type: string
+        required: false
+        description: Clé choisie par le client ; une requête rejouée avec la même clé renvoie la liste déjà créée
       - name: body
         in: body
         required: true
@@ -693,7 +810,7 @@ def creer_liste_courses():
                     example: "unites"
     responses:
       '201':
-        description: Liste créée
+        description: Liste créée (en-tête Idempotent-Replayed si la clé avait déjà servi)
       '400':
         description: Données invalides
       '401':
@@ -707,13 +824,32 @@ def creer_liste_courses():
             return jsonify({"message": "Le nom est requis et doit être une chaîne"}), 400
 
         id_utilisateur = int(get_jwt_identity())
+        cle_idempotence = request.headers.get("Idempotency-Key")
+        if cle_idempotence is not None:
+            if not 0 < len(cle_idempotence) <= 100:
+                return jsonify({"message": "L'en-tête Idempotency-Key doit faire entre 1 et 100 caractères"}), 400
+            existante = ListeCourses.query.filter_by(id_utilisateur=id_utilisateur,
+                                                     cle_idempotence=cle_idempotence).first()
+            if existante:
+                return jsonify({"message": "Liste créée", "liste": existante.to_dict()}), 201, \
+                    {"Idempotent-Replayed": "true"}
+
         liste = ListeCourses(
             nom=data["nom"].strip(),
             id_utilisateur=id_utilisateur,
-            id_recette=data.get("id_recette")
+            id_recette=data.get("id_recette"),
+            cle_idempotence=cle_idempotence
         )
         db.session.add(liste)
-        db.session.flush()
+        try:
+            db.session.flush()
+        except IntegrityError:
+            if cle_idempotence is None:
+                raise
+            # Requête rejouée en parallèle avec la même clé : la première a gagné
+            existante = _liste_concurrente(id_utilisateur=id_utilisateur, cle_idempotence=cle_idempotence)
+            return jsonify({"message": "Liste créée", "liste": existante.to_dict()}), 201, \
+                {"Idempotent-Replayed": "true"}
 
         items = data.get("items", [])
         if not isinstance(items, list):
@@ -744,6 +880,140 @@ def creer_liste_courses():
         return jsonify({"message": "Erreur lors de la création", "details": str(e)}), 500
 
 
+@inventaire_bp.route("/courses/plan", methods=["POST"])
+@jwt_required()
+def planifier_liste_courses():
+    """
+    Planifier les courses de plusieurs recettes (menu de la semaine)
+    ---
+    tags:
+      - Courses
+    security:
+      - bearerAuth: []
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - recettes
+          properties:
+            recettes:
+              type: array
+              description: Recettes du menu et multiplicateur de portions (une même recette peut apparaître plusieurs fois)
+              items:
+                type: object
+                properties:
+                  id_recette:
+                    type: integer
+                    example: 1
+                  portions:
+                    type: number
+                    example: 2
+            inventaires:
+              type: array
+              description: Inventaires dont le stock est déduit des besoins
+              items:
+                type: integer
+              example: [1, 2]
+            enregistrer:
+              type: boolean
+              description: Enregistrer le résultat comme liste de courses
+              example: false
+            nom:
+              type: string
+              example: "Courses de la semaine"
+    responses:
+      '200':
+        description: Articles manquants (quantités agrégées, unité commune par ingrédient) et coût total
+      '201':
+        description: Liste de courses enregistrée
+      '400':
+        description: Données invalides
+      '401':
+        description: Non autorisé
+      '403':
+        description: Recette ou inventaire non accessible
+      '404':
+        description: Recette ou inventaire introuvable
+      '500':
+        description: Erreur interne
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict) or not isinstance(data.get("recettes"), list) or not data["recettes"]:
+            return jsonify({"message": "Une liste non vide de recettes est requise"}), 400
+        ids_inventaires = data.get("inventaires", [])
+        if not isinstance(ids_inventaires, list):
+            return jsonify({"message": "Les inventaires doivent être une liste d'identifiants"}), 400
+
+        # Portions par recette (les doublons s'additionnent)
+        portions = {}
+        for entree in data["recettes"]:
+            if not isinstance(entree, dict) or "id_recette" not in entree:
+                return jsonify({"message": "Chaque recette doit avoir un id_recette"}), 400
+            multiplicateur = float(entree.get("portions", 1))
+            if not multiplicateur > 0:
+                return jsonify({"message": "Le nombre de portions doit être positif"}), 400
+            id_recette = int(entree["id_recette"])
+            portions[id_recette] = portions.get(id_recette, 0) + multiplicateur
+        ids_inventaires = {int(id_inventaire) for id_inventaire in ids_inventaires}
+
+        id_utilisateur = int(get_jwt_identity())
+        proprietaires = dict(db.session.query(Recette.id_recette, Recette.id_utilisateur).filter(
+            Recette.id_recette.in_(list(portions))))
+        introuvables = sorted(set(portions) - set(proprietaires))
+        if introuvables:
+            return jsonify({"message": "Recette(s) introuvable(s)", "ids": introuvables}), 404
+        etrangeres = {id_recette for id_recette, proprietaire in proprietaires.items() if proprietaire != id_utilisateur}
+        if etrangeres:
+            etrangeres -= {id_recette for (id_recette,) in db.session.query(RecetteUtilisateur.id_recette).filter(
+                RecetteUtilisateur.id_utilisateur == id_utilisateur,
+                RecetteUtilisateur.id_recette.in_(list(etrangeres)))}
+        if etrangeres:
+            return jsonify({"message": "Accès non autorisé à ces recettes", "ids": sorted(etrangeres)}), 403
+
+        if ids_inventaires:
+            proprietaires = dict(db.session.query(Inventaire.id_inventaire, Inventaire.id_utilisateur).filter(
+                Inventaire.id_inventaire.in_(list(ids_inventaires))))
+            introuvables = sorted(ids_inventaires - set(proprietaires))
+            if introuvables:
+                return jsonify({"message": "Inventaire(s) introuvable(s)", "ids": introuvables}), 404
+            etrangers = sorted(i for i, proprietaire in proprietaires.items() if proprietaire != id_utilisateur)
+            if etrangers:
+                return jsonify({"message": "Accès non autorisé à ces inventaires", "ids": etrangers}), 403
+
+        articles = planifier_courses(portions, ids_inventaires)
+        resultat = {"items": articles, "total_cout": round(sum(article["cout"] for article in articles), 2)}
+
+        if not data.get("enregistrer"):
+            return jsonify(resultat), 200
+
+        liste = ListeCourses(
+            nom=str(data.get("nom") or "Courses du menu").strip(),
+            id_utilisateur=id_utilisateur,
+            id_recette=next(iter(portions)) if len(portions) == 1 else None,
+            id_inventaire=next(iter(ids_inventaires)) if len(ids_inventaires) == 1 else None
+        )
+        db.session.add(liste)
+        db.session.flush()
+        if articles:
+            db.session.execute(insert(ListeCoursesItem), [
+                {"id_liste": liste.id_liste, "id_ingredient": article["id_ingredient"],
+                 "quantite": article["quantite"], "unite": article["unite"]}
+                for article in articles
+            ])
+        db.session.commit()
+        return jsonify({**resultat, "id_liste": liste.id_liste, "nom": liste.nom}), 201
+    except (ValueError, TypeError) as e:
+        db.session.rollback()
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Erreur lors de la planification", "details": str(e)}), 500
+
+
 @inventaire_bp.route("/courses/<int:id>", methods=["GET"])
 @jwt_required()
 def obtenir_liste_courses(id):
@@ -858,6 +1128,8 @@ def modifier_ingredient_inventaire(id, id_ingredient):
         description: Non autorisé
       '404':
         description: Ressource non trouvée
+      '409':
+        description: Ligne déjà existante dans cette unité
       '500':
         description: Erreur interne
     """
@@ -877,15 +1149,21 @@ def modifier_ingredient_inventaire(id, id_ingredient):
         quantite = float(data["quantite_disponible"])
         if quantite < 0:
             return jsonify({"message": "La quantité doit être positive ou zéro"}), 400
+        if not unite_connue(data["unite"]):
+            return jsonify({"message": f"Unité invalide: {data['unite']}"}), 400
 
         ingredient_inventaire.quantite_disponible = quantite
-        ingredient_inventaire.unite = data["unite"]
+        ingredient_inventaire.unite = unite_canonique(data["unite"])
         ingredient_inventaire.prix_unitaire = data.get("prix_unitaire")
+        resynchroniser_listes(id, [ingredient_inventaire.id_ingredient])
 
         db.session.commit()
         return jsonify({"message": "Ingrédient mis à jour", "ingredient": ingredient_inventaire.to_dict()}), 200
     except ValueError:
         return jsonify({"message": "Quantité invalide (doit être un nombre)"}), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "Cet ingrédient a déjà une ligne de stock dans cette unité"}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Erreur lors de la mise à jour", "details": str(e)}), 500
@@ -930,6 +1208,7 @@ def supprimer_ingredient_inventaire(id, id_ingredient):
         ).first_or_404()
 
         db.session.delete(ingredient_inventaire)
+        resynchroniser_listes(id, [ingredient_inventaire.id_ingredient])
         db.session.commit()
         return jsonify({"message": "Ingrédient supprimé avec succès"}), 200
     except Exception as e:
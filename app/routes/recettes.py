@@ -1,19 +1,32 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
 from app import db
-from app.models.ingredient import Ingredient
 from app.models.recette import Recette
 from app.models.recette_ingredient import RecetteIngredient
 from app.models.etape import Etape
+import json
 import logging
-from random import sample, random
+import math
+import random
+import time
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.models.recette_utilisateur import RecetteUtilisateur
+from app.models.utilisateur import Utilisateur
+from app.utils.cache import CacheTTL
+from app.utils.export import reponse_export
+from app.utils.ingredients import resoudre_ingredients
+from app.utils.pagination import paginer, meta_pagination
+from app.utils.recherche import filtre_contient
+from app.utils.repliques import lecture_seule
+from app.utils.unites import unite_canonique
 
 recettes_bp = Blueprint("recettes", __name__)
 
 logger = logging.getLogger(__name__)
-UNITES_VALIDES = {"g", "kg", "L", "mL", "cl", "unités"}
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -26,14 +39,300 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Fonction utilitaire : identifiants enregistrés par un utilisateur, en une seule requête
+def ids_recettes_enregistrees(id_utilisateur, ids_recettes):
+    ids_recettes = {int(i) for i in ids_recettes}
+    if not id_utilisateur or not ids_recettes:
+        return set()
+    lignes = db.session.query(RecetteUtilisateur.id_recette).filter(
+        RecetteUtilisateur.id_utilisateur == int(id_utilisateur),
+        RecetteUtilisateur.id_recette.in_(ids_recettes)
+    ).distinct()
+    return {id_recette for (id_recette,) in lignes}
+
+
+# Identité du porteur d'un token valide, sinon None : sur les routes publiques, un token expiré ou
+# malformé est ignoré (réponse anonyme) au lieu de provoquer un 401/422
+def identite_optionnelle():
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except (JWTExtendedException, PyJWTError):
+        return None
+
+
+# Ajoute le champ isSaved à chaque recette sérialisée si l'utilisateur est connecté
+def ajouter_is_saved(recettes_data, id_utilisateur):
+    if not id_utilisateur:
+        return recettes_data
+    enregistrees = ids_recettes_enregistrees(id_utilisateur, [r["id_recette"] for r in recettes_data])
+    for recette_data in recettes_data:
+        recette_data["isSaved"] = recette_data["id_recette"] in enregistrees
+    return recettes_data
+
+
+def est_nombre(valeur):
+    return isinstance(valeur, (int, float)) and not isinstance(valeur, bool)
+
+
+# Valide les ingrédients reçus avant toute écriture : renvoie ([(nom, quantite, unite)], message d'erreur)
+def lire_ingredients(ingredients):
+    if not isinstance(ingredients, list):
+        return None, "Les ingrédients doivent être une liste"
+    lignes, vus = [], set()
+    for ing in ingredients:
+        if not isinstance(ing, dict):
+            return None, "Chaque ingrédient doit être un objet"
+        if "nom" not in ing or "quantite" not in ing or "unite" not in ing:
+            return None, "Chaque ingrédient doit avoir nom, quantite et unite"
+        if not isinstance(ing["nom"], str) or not ing["nom"].strip():
+            return None, "Le nom d'un ingrédient doit être une chaîne non vide"
+        nom = ing["nom"].strip()
+        if not est_nombre(ing["quantite"]):
+            return None, f"La quantité de {nom} doit être un nombre"
+        try:
+            unite = unite_canonique(ing["unite"])
+        except ValueError as e:
+            return None, str(e)
+        if nom in vus:
+            return None, f"Ingrédient en doublon: {nom}"
+        vus.add(nom)
+        lignes.append((nom, float(ing["quantite"]), unite))
+    return lignes, None
+
+
+# Valide les étapes reçues : renvoie ([(ordre, instruction)], message d'erreur)
+def lire_etapes(etapes):
+    if not isinstance(etapes, list):
+        return None, "Les étapes doivent être une liste"
+    lignes = []
+    for i, etape_data in enumerate(etapes, 1):
+        if not isinstance(etape_data, dict) or "instruction" not in etape_data:
+            return None, "Chaque étape doit avoir une instruction"
+        if not isinstance(etape_data["instruction"], str):
+            return None, "L'instruction d'une étape doit être une chaîne de caractères"
+        ordre = etape_data.get("ordre", i)
+        if not isinstance(ordre, int) or isinstance(ordre, bool):
+            return None, "L'ordre d'une étape doit être un entier"
+        lignes.append((ordre, etape_data["instruction"]))
+    return lignes, None
+
+
+# Valide un corps de recette complet (titre, ingrédients, étapes) : renvoie (ingredients, etapes, message d'erreur)
+def lire_recette(data):
+    titre = data.get("titre") if isinstance(data, dict) else None
+    if titre is not None and not isinstance(titre, str):
+        return None, None, "Le titre doit être une chaîne de caractères"
+    if not titre or not titre.strip():
+        return None, None, "Le titre est requis"
+    if len(titre.strip()) > 100:
+        return None, None, "Le titre ne doit pas dépasser 100 caractères"
+    ingredients, erreur = lire_ingredients(data.get("ingredients", []))
+    if erreur:
+        return None, None, erreur
+    etapes, erreur = lire_etapes(data.get("etapes", []))
+    return ingredients, etapes, erreur
+
+
+# Insère en une instruction par table les lignes recette_ingredients et etapes de plusieurs recettes,
+# données sous la forme [(id_recette, ingredients, etapes)]
+def inserer_contenu_recettes(contenus, ids_ingredients):
+    lignes_ingredients = [
+        {"id_recette": id_recette, "id_ingredient": ids_ingredients[nom], "quantite": quantite, "unite": unite}
+        for id_recette, ingredients, _ in contenus for nom, quantite, unite in ingredients
+    ]
+    lignes_etapes = [
+        {"id_recette": id_recette, "ordre": ordre, "instruction": instruction}
+        for id_recette, _, etapes in contenus for ordre, instruction in etapes
+    ]
+    if lignes_ingredients:
+        db.session.execute(insert(RecetteIngredient), lignes_ingredients)
+    if lignes_etapes:
+        db.session.execute(insert(Etape), lignes_etapes)
+
+
+# Insère un lot de recettes validées [(numero_ligne, data, ingredients, etapes)] : une instruction par table
+# quel que soit le nombre de recettes, puis commit
+def importer_lot(lot, id_utilisateur):
+    ids_ingredients = resoudre_ingredients([nom for _, _, ingredients, _ in lot for nom, _, _ in ingredients])
+    ids_recettes = db.session.execute(
+        insert(Recette).returning(Recette.id_recette, sort_by_parameter_order=True),
+        [{
+            "titre": data["titre"].strip(),
+            "description": data.get("description"),
+            "id_utilisateur": id_utilisateur,
+            "publique": bool(data.get("publique", False)),
+            "temps_preparation": data.get("temps_preparation"),
+            "temps_cuisson": data.get("temps_cuisson"),
+        } for _, data, _, _ in lot]
+    ).scalars().all()
+    inserer_contenu_recettes([(id_recette, ingredients, etapes)
+                              for id_recette, (_, _, ingredients, etapes) in zip(ids_recettes, lot)], ids_ingredients)
+    db.session.commit()
+
+
+# Recharge une recette avec ses relations pour la réponse (après commit, les attributs sont expirés)
+def recette_detaillee(id_recette):
+    return Recette.query.options(*Recette.options_details()).filter_by(id_recette=id_recette).one()
+
+
+# Colonnes disponibles pour la vue résumée des listes (projection SQL, sans hydrater d'entités)
+COLONNES_RESUME = {
+    "id_recette": Recette.id_recette,
+    "titre": Recette.titre,
+    "description": Recette.description,
+    "date_creation": Recette.date_creation,
+    "id_utilisateur": Recette.id_utilisateur,
+    "publique": Recette.publique,
+    "temps_preparation": Recette.temps_preparation,
+    "temps_cuisson": Recette.temps_cuisson,
+    "createur": Utilisateur.nom,
+}
+CHAMPS_RESUME_DEFAUT = ["id_recette", "titre", "createur", "temps_preparation", "temps_cuisson", "publique",
+                        "date_creation"]
+
+
+# Champs demandés via ?fields=... ou ?view=summary, None pour la vue complète
+def champs_resume_demandes():
+    fields = request.args.get("fields", "")
+    if fields:
+        champs = [champ.strip() for champ in fields.split(",") if champ.strip()]
+        inconnus = [champ for champ in champs if champ not in COLONNES_RESUME]
+        if inconnus:
+            raise ValueError(f"Champs inconnus: {', '.join(inconnus)}")
+        return list(dict.fromkeys(["id_recette"] + champs))
+    if request.args.get("view") == "summary":
+        return CHAMPS_RESUME_DEFAUT
+    return None
+
+
+def serialiser_resume(ligne):
+    data = dict(ligne._mapping)
+    if data.get("date_creation") is not None:
+        data["date_creation"] = data["date_creation"].isoformat()
+    if "createur" in data and data["createur"] is None:
+        data["createur"] = "Inconnu"
+    return data
+
+
+# Pagine une requête de recettes : projection de colonnes en vue résumée, sinon to_dict() avec chargement groupé.
+# Avec un curseur (même vide), pagination par clé sur id_recette au lieu de OFFSET/COUNT (voir paginer()).
+def paginer_recettes(query, page, per_page, curseur=None):
+    champs = champs_resume_demandes()
+    if champs:
+        if "createur" in champs:
+            query = query.outerjoin(Recette.createur)
+        query = query.with_entities(*[COLONNES_RESUME[champ].label(champ) for champ in champs])
+    else:
+        query = query.options(*Recette.options_details())
+
+    pagination = paginer(query, Recette.id_recette, page, per_page, curseur, request.args.get("count"))
+
+    if champs:
+        return [serialiser_resume(ligne) for ligne in pagination.items], pagination
+    return [recette.to_dict() for recette in pagination.items], pagination
+
+
+# En dessous de cette plage d'identifiants, un ORDER BY random() reste bon marché
+SEUIL_TIRAGE_ORDER_BY = 1000
+# Identifiants candidats tirés au plus par requête (paramètres de la clause IN)
+TIRAGES_MAX = 10000
+
+
+# Tire jusqu'à `limit` identifiants de recettes publiques au hasard, sans charger la table en mémoire
+def echantillon_ids_publics(limit):
+    id_min, id_max, nombre = db.session.query(
+        func.min(Recette.id_recette), func.max(Recette.id_recette), func.count()
+    ).filter(Recette.publique == db.true()).one()
+    if id_min is None:
+        return []
+
+    etendue = id_max - id_min + 1
+    if etendue <= SEUIL_TIRAGE_ORDER_BY:
+        lignes = db.session.query(Recette.id_recette).filter(Recette.publique == db.true()) \
+            .order_by(func.random()).limit(limit)
+        return [id_recette for (id_recette,) in lignes]
+
+    # Identifiants candidats distincts tirés uniformément sur la plage, gardés s'ils désignent une recette
+    # publique : chaque recette a la même chance d'être tirée, quels que soient les trous de la séquence.
+    # Deux fois plus de candidats que de recettes attendues (densité des recettes publiques sur la plage),
+    # résolus en une requête par l'index partiel des recettes publiques
+    tirages = min(etendue, TIRAGES_MAX, 2 * limit * math.ceil(etendue / nombre))
+    candidats = random.sample(range(id_min, id_max + 1), tirages)
+    ids = db.session.scalars(
+        select(Recette.id_recette).where(Recette.publique == db.true(), Recette.id_recette.in_(candidats))
+    ).all()
+    random.shuffle(ids)
+    return ids[:limit]
+
+
+# Pool de suggestions pré-sérialisées, propre à chaque worker
+cache_suggestions = CacheTTL(ttl=300, taille_max=1)
+
+
+def serialiser_suggestion(recette):
+    ingredients = [
+        {
+            "id_ingredient": ri.ingredient.id_ingredient,
+            "nom": ri.ingredient.nom,
+            "quantite": ri.quantite,
+            "unite": ri.unite
+        }
+        for ri in getattr(recette, "ingredients", [])
+    ]
+    return {
+        "id_recette": recette.id_recette,
+        "titre": recette.titre or "Sans titre",
+        "createur": getattr(recette.createur, "nom", "Inconnu") if recette.createur else "Inconnu",
+        "imageUrl": getattr(recette, "image_url", None),
+        "ingredients": ingredients
+    }
+
+
+def construire_pool_suggestions():
+    ids = echantillon_ids_publics(current_app.config["SUGGESTIONS_POOL_TAILLE"])
+    if not ids:
+        return []
+
+    # Ingrédients et créateurs des recettes tirées chargés en bloc
+    recettes = Recette.query.options(
+        selectinload(Recette.ingredients).joinedload(RecetteIngredient.ingredient),
+        joinedload(Recette.createur)
+    ).filter(Recette.id_recette.in_(ids)).all()
+
+    pool = []
+    for recette in recettes:
+        try:
+            pool.append(serialiser_suggestion(recette))
+        except Exception as e:
+            logger.error(f"Erreur lors de la sérialisation de la recette {recette.id_recette} : {str(e)}",
+                         exc_info=True)
+    logger.info(f"Pool de suggestions reconstruit : {len(pool)} recettes")
+    return pool
+
+
+def obtenir_pool_suggestions():
+    pool = cache_suggestions.get("pool")
+    if pool is None:
+        pool = construire_pool_suggestions()
+        cache_suggestions.set("pool", pool, ttl=current_app.config["SUGGESTIONS_POOL_TTL"])
+    return pool
+
+
+# À appeler après toute modification d'une recette publique (ou qui vient de l'être)
+def invalider_pool_suggestions():
+    cache_suggestions.invalider()
+
+
 # Créer une recette
 @recettes_bp.route("/recettes", methods=["POST"])
 @jwt_required()
 def creer_recette():
     try:
         data = request.get_json()
-        if not data or "titre" not in data or not data["titre"]:
-            return jsonify({"message": "Le titre est requis"}), 400
+        ingredients, etapes, erreur = lire_recette(data)
+        if erreur:
+            return jsonify({"message": erreur}), 400
 
         id_utilisateur = int(get_jwt_identity())
         nouvelle_recette = Recette(
@@ -47,44 +346,13 @@ def creer_recette():
         db.session.add(nouvelle_recette)
         db.session.flush()
 
-        ingredients_vus = set()
-        for ing in data.get("ingredients", []):
-            if "nom" not in ing or "quantite" not in ing or "unite" not in ing:
-                return jsonify({"message": "Chaque ingrédient doit avoir nom, quantite et unite"}), 400
-            if ing["unite"] not in UNITES_VALIDES:
-                return jsonify({"message": f"Unité invalide: {ing['unite']}"}), 400
-            nom = ing["nom"].strip()
-            if nom in ingredients_vus:
-                return jsonify({"message": f"Ingrédient en doublon: {nom}"}), 400
-            ingredients_vus.add(nom)
-
-            ingredient = Ingredient.query.filter_by(nom=nom).first() or Ingredient(nom=nom)
-            if not ingredient.id_ingredient:
-                db.session.add(ingredient)
-                db.session.flush()
-
-            recette_ingredient = RecetteIngredient(
-                id_recette=nouvelle_recette.id_recette,
-                id_ingredient=ingredient.id_ingredient,
-                quantite=float(ing["quantite"]),
-                unite=ing["unite"]
-            )
-            db.session.add(recette_ingredient)
-
-        if "etapes" in data:
-            for i, etape_data in enumerate(data["etapes"], 1):
-                if "instruction" not in etape_data:
-                    return jsonify({"message": "Chaque étape doit avoir une instruction"}), 400
-                etape = Etape(
-                    id_recette=nouvelle_recette.id_recette,
-                    ordre=etape_data.get("ordre", i),
-                    instruction=etape_data["instruction"]
-                )
-                db.session.add(etape)
+        ids_ingredients = resoudre_ingredients([nom for nom, _, _ in ingredients])
+        inserer_contenu_recettes([(nouvelle_recette.id_recette, ingredients, etapes)], ids_ingredients)
 
         db.session.commit()
         logger.info(f"Recette créée: {nouvelle_recette.titre} par utilisateur {id_utilisateur}")
-        return jsonify({"message": "Recette créée", "recette": nouvelle_recette.to_dict()}), 201
+        recette = recette_detaillee(nouvelle_recette.id_recette)
+        return jsonify({"message": "Recette créée", "recette": recette.to_dict()}), 201
     except ValueError as e:
         db.session.rollback()
         return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
@@ -94,6 +362,144 @@ def creer_recette():
         return jsonify({"message": "Erreur serveur", "details": str(e)}), 500
 
 
+# Nombre maximum d'erreurs détaillées renvoyées par un import (les suivantes sont seulement comptées)
+ERREURS_IMPORT_MAX = 1000
+
+
+# Importer des recettes en masse (NDJSON)
+@recettes_bp.route("/recettes/import", methods=["POST"])
+@jwt_required()
+def importer_recettes():
+    """
+    Importer des recettes en masse depuis un flux NDJSON
+    ---
+    tags:
+      - Recettes
+    security:
+      - bearerAuth: []
+    consumes:
+      - application/x-ndjson
+    parameters:
+      - name: body
+        in: body
+        required: true
+        description: Une recette par ligne, au même format que POST /recettes. Le corps est lu au fil de l'eau.
+        schema:
+          type: string
+      - name: taille_lot
+        in: query
+        type: integer
+        description: Nombre de recettes validées par transaction (par défaut IMPORT_TAILLE_LOT, max 5000).
+    responses:
+      '200':
+        description: Bilan de l'import (lignes lues, recettes importées, erreurs par numéro de ligne, débit).
+      '401':
+        description: Non autorisé.
+      '500':
+        description: Erreur interne du serveur.
+    """
+    try:
+        taille_lot = max(1, min(request.args.get("taille_lot", current_app.config["IMPORT_TAILLE_LOT"], type=int),
+                                5000))
+        id_utilisateur = int(get_jwt_identity())
+        debut = time.perf_counter()
+        lignes = importees = nb_erreurs = 0
+        erreurs, lot = [], []
+        publiques = False
+
+        def signaler(numero, message):
+            nonlocal nb_erreurs
+            nb_erreurs += 1
+            if len(erreurs) < ERREURS_IMPORT_MAX:
+                erreurs.append({"ligne": numero, "message": message})
+
+        def vider_lot():
+            # Un lot rejeté par la base (contrainte, données hors limites) est annulé en entier
+            nonlocal importees, publiques
+            if not lot:
+                return
+            try:
+                importer_lot(lot, id_utilisateur)
+                importees += len(lot)
+                publiques = publiques or any(data.get("publique") for _, data, _, _ in lot)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Lot d'import rejeté (lignes {lot[0][0]} à {lot[-1][0]}): {str(e)}")
+                for numero, _, _, _ in lot:
+                    signaler(numero, f"Lot rejeté par la base: {str(e)}")
+            lot.clear()
+
+        for numero, brute in enumerate(request.stream, 1):
+            if not brute.strip():
+                continue
+            lignes += 1
+            try:
+                data = json.loads(brute)
+                ingredients, etapes, erreur = lire_recette(data)
+            except (ValueError, TypeError, AttributeError) as e:
+                erreur = f"Valeur invalide: {str(e)}"
+            if erreur:
+                signaler(numero, erreur)
+                continue
+            lot.append((numero, data, ingredients, etapes))
+            if len(lot) >= taille_lot:
+                vider_lot()
+        vider_lot()
+
+        if publiques:
+            invalider_pool_suggestions()
+        duree = time.perf_counter() - debut
+        logger.info(f"Import de {importees}/{lignes} recettes par utilisateur {id_utilisateur} en {duree:.2f}s")
+        return jsonify({
+            "lignes": lignes,
+            "importees": importees,
+            "nb_erreurs": nb_erreurs,
+            "erreurs": erreurs,
+            "duree_s": round(duree, 3),
+            "lignes_par_seconde": round(lignes / duree, 1) if duree else None,
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erreur import recettes: {str(e)}", exc_info=True)
+        return jsonify({"message": "Erreur serveur", "details": str(e)}), 500
+
+
+# Exporter les recettes de l'utilisateur (flux NDJSON ou CSV)
+@recettes_bp.route("/recettes/export", methods=["GET"])
+@jwt_required()
+def exporter_recettes():
+    """
+    Exporter les recettes de l'utilisateur connecté
+    ---
+    tags:
+      - Recettes
+    security:
+      - bearerAuth: []
+    parameters:
+      - name: format
+        in: query
+        type: string
+        enum: [ndjson, csv]
+        description: Format de sortie (ndjson par défaut, relisible par POST /recettes/import). En CSV, ingrédients
+          et étapes sont encodés en JSON.
+    responses:
+      '200':
+        description: Une recette par ligne, envoyée au fil de la lecture.
+      '400':
+        description: Format inconnu.
+      '401':
+        description: Non autorisé.
+    """
+    try:
+        query = Recette.query.filter_by(id_utilisateur=int(get_jwt_identity())).options(
+            *Recette.options_details()
+        ).order_by(Recette.id_recette)
+        return reponse_export(query, Recette.to_dict,
+                              ["id_recette", "titre", "description", "date_creation", "id_utilisateur", "publique",
+                               "temps_preparation", "temps_cuisson", "createur", "ingredients", "etapes"], "recettes")
+    except ValueError as e:
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
+
 # Obtenir une recette
 @recettes_bp.route("/recettes/<int:id>", methods=["GET"])
 @jwt_required(optional=True)
@@ -138,6 +544,24 @@ def lister_recettes():
         in: query
         type: boolean
         description: Filtrer par statut public (true pour publiques, false pour privées, absent pour toutes).
+      - name: cursor
+        in: query
+        type: string
+        description: Pagination par curseur (vide pour la première page, puis la valeur next_cursor reçue). Ignore page.
+      - name: count
+        in: query
+        type: string
+        enum: [exact, cached, estimate]
+        description: Calcul du total (exact par défaut ; en mode curseur, total omis si absent).
+      - name: view
+        in: query
+        type: string
+        enum: [summary]
+        description: Vue résumée (titre, créateur, temps) sans étapes ni ingrédients.
+      - name: fields
+        in: query
+        type: string
+        description: Colonnes à renvoyer, séparées par des virgules (ex. titre,createur). Implique la vue résumée.
     responses:
       '200':
         description: Liste des recettes de l'utilisateur récupérée avec succès.
@@ -153,17 +577,17 @@ def lister_recettes():
 
         query = Recette.query.filter_by(id_utilisateur=id_utilisateur)
         if titre_filter:
-            query = query.filter(Recette.titre.ilike(f"%{titre_filter}%"))
+            query = query.filter(filtre_contient(Recette.titre, titre_filter))
         if publique_filter is not None:
             query = query.filter_by(publique=publique_filter)
 
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        recettes_data, pagination = paginer_recettes(query, page, per_page, request.args.get("cursor"))
         return jsonify({
-            "recettes": [recette.to_dict() for recette in pagination.items],
-            "total": pagination.total,
-            "pages": pagination.pages,
-            "current_page": page
+            "recettes": recettes_data,
+            **meta_pagination(pagination, page)
         }), 200
+    except ValueError as e:
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"message": "Erreur lors de la récupération", "details": str(e)}), 500
 
@@ -195,15 +619,15 @@ def lister_recettes_privees():
 
         query = Recette.query.filter_by(id_utilisateur=id_utilisateur, publique=False)
         if titre_filter:
-            query = query.filter(Recette.titre.ilike(f"%{titre_filter}%"))
+            query = query.filter(filtre_contient(Recette.titre, titre_filter))
 
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        recettes_data, pagination = paginer_recettes(query, page, per_page, request.args.get("cursor"))
         return jsonify({
-            "recettes": [recette.to_dict() for recette in pagination.items],
-            "total": pagination.total,
-            "pages": pagination.pages,
-            "current_page": page
+            "recettes": recettes_data,
+            **meta_pagination(pagination, page)
         }), 200
+    except ValueError as e:
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"message": "Erreur lors de la récupération", "details": str(e)}), 500
 
@@ -241,10 +665,13 @@ def supprimer_recette(id):
         if recette.id_utilisateur != int(get_jwt_identity()):
             return jsonify({"message": "Non autorisé"}), 403
 
+        etait_publique = recette.publique
         for etape in recette.etapes:
             db.session.delete(etape)
         db.session.delete(recette)
         db.session.commit()
+        if etait_publique:
+            invalider_pool_suggestions()
         return jsonify({"message": "Recette supprimée avec succès"}), 200
     except Exception as e:
         db.session.rollback()
@@ -256,70 +683,60 @@ def supprimer_recette(id):
 @jwt_required()
 def modifier_recette(id):
     try:
-        recette = Recette.query.get_or_404(id)
+        recette = Recette.query.options(
+            selectinload(Recette.ingredients), selectinload(Recette.etapes)
+        ).get_or_404(id)
         if recette.id_utilisateur != int(get_jwt_identity()):
             return jsonify({"message": "Non autorisé"}), 403
 
         data = request.get_json()
-        if not data or "titre" not in data or not data["titre"]:
-            return jsonify({"message": "Le titre est requis"}), 400
+        ingredients, etapes, erreur = lire_recette(data)
+        if erreur:
+            return jsonify({"message": erreur}), 400
 
+        etait_publique = recette.publique
         recette.titre = data["titre"].strip()
         recette.description = data.get("description", recette.description)
         recette.publique = data.get("publique", recette.publique)
         recette.temps_preparation = data.get("temps_preparation", recette.temps_preparation)
         recette.temps_cuisson = data.get("temps_cuisson", recette.temps_cuisson)
 
-        # Mise à jour des ingrédients
+        # Les lignes existantes sont mises à jour sur place, les absentes supprimées en un DELETE ... IN,
+        # les nouvelles insérées en une instruction
+        nouveaux_ingredients, nouvelles_etapes = [], []
+        ids_ingredients = {}
         if "ingredients" in data:
+            ids_ingredients = resoudre_ingredients([nom for nom, _, _ in ingredients])
             existing_ings = {ri.id_ingredient: ri for ri in recette.ingredients}
-            for ing in data["ingredients"]:
-                if "nom" not in ing or "quantite" not in ing or "unite" not in ing:
-                    return jsonify({"message": "Chaque ingrédient doit avoir nom, quantite et unite"}), 400
-                if ing["unite"] not in UNITES_VALIDES:
-                    return jsonify({"message": f"Unité invalide: {ing['unite']}"}), 400
-                ingredient = Ingredient.query.filter_by(nom=ing["nom"].strip()).first() or Ingredient(nom=ing["nom"].strip())
-                if not ingredient.id_ingredient:
-                    db.session.add(ingredient)
-                    db.session.flush()
-
-                if ingredient.id_ingredient in existing_ings:
-                    ri = existing_ings[ingredient.id_ingredient]
-                    ri.quantite = float(ing["quantite"])
-                    ri.unite = ing["unite"]
-                    del existing_ings[ingredient.id_ingredient]
+            for nom, quantite, unite in ingredients:
+                ri = existing_ings.pop(ids_ingredients[nom], None)
+                if ri:
+                    ri.quantite = quantite
+                    ri.unite = unite
                 else:
-                    db.session.add(RecetteIngredient(
-                        id_recette=id,
-                        id_ingredient=ingredient.id_ingredient,
-                        quantite=float(ing["quantite"]),
-                        unite=ing["unite"]
-                    ))
-            for ri in existing_ings.values():
-                db.session.delete(ri)
-
-        # Mise à jour des étapes
+                    nouveaux_ingredients.append((nom, quantite, unite))
+            if existing_ings:
+                db.session.execute(delete(RecetteIngredient).where(RecetteIngredient.id_recette_ingredient.in_(
+                    [ri.id_recette_ingredient for ri in existing_ings.values()])))
+
         if "etapes" in data:
             existing_etapes = {e.ordre: e for e in recette.etapes}
-            for i, etape_data in enumerate(data["etapes"], 1):
-                if "instruction" not in etape_data:
-                    return jsonify({"message": "Chaque étape doit avoir une instruction"}), 400
-                ordre = etape_data.get("ordre", i)
-                if ordre in existing_etapes:
-                    e = existing_etapes[ordre]
-                    e.instruction = etape_data["instruction"]
-                    del existing_etapes[ordre]
+            for ordre, instruction in etapes:
+                e = existing_etapes.pop(ordre, None)
+                if e:
+                    e.instruction = instruction
                 else:
-                    db.session.add(Etape(
-                        id_recette=id,
-                        ordre=ordre,
-                        instruction=etape_data["instruction"]
-                    ))
-            for e in existing_etapes.values():
-                db.session.delete(e)
+                    nouvelles_etapes.append((ordre, instruction))
+            if existing_etapes:
+                db.session.execute(delete(Etape).where(Etape.id_etape.in_(
+                    [e.id_etape for e in existing_etapes.values()])))
+
+        inserer_contenu_recettes([(id, nouveaux_ingredients, nouvelles_etapes)], ids_ingredients)
 
         db.session.commit()
-        return jsonify({"message": "Recette mise à jour", "recette": recette.to_dict()}), 200
+        if etait_publique or recette.publique:
+            invalider_pool_suggestions()
+        return jsonify({"message": "Recette mise à jour", "recette": recette_detaillee(id).to_dict()}), 200
     except ValueError as e:
         db.session.rollback()
         return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
@@ -375,8 +792,11 @@ def partager_recette(id):
         data = request.get_json()
         if "publique" not in data or not isinstance(data["publique"], bool):
             return jsonify({"message": "Le champ publique doit être un booléen"}), 400
+        etait_publique = recette.publique
         recette.publique = data["publique"]
         db.session.commit()
+        if etait_publique or recette.publique:
+            invalider_pool_suggestions()
         return jsonify({"message": "Statut mis à jour", "recette": recette.to_dict()}), 200
     except Exception as e:
         db.session.rollback()
@@ -385,6 +805,7 @@ def partager_recette(id):
 
 # Route inchangée : Lister toutes les recettes publiques
 @recettes_bp.route("/recettes/public", methods=["GET"])
+@lecture_seule
 def lister_recettes_publiques():
     """
     Lister toutes les recettes publiques, en excluant celles de l'utilisateur connecté si authentifié
@@ -404,9 +825,27 @@ def lister_recettes_publiques():
         in: query
         type: string
         description: Filtrer par titre
+      - name: cursor
+        in: query
+        type: string
+        description: Pagination par curseur (vide pour la première page, puis la valeur next_cursor reçue). Ignore page.
+      - name: count
+        in: query
+        type: string
+        enum: [exact, cached, estimate]
+        description: Calcul du total (exact par défaut ; en mode curseur, total omis si absent).
+      - name: view
+        in: query
+        type: string
+        enum: [summary]
+        description: Vue résumée (titre, créateur, temps) sans étapes ni ingrédients.
+      - name: fields
+        in: query
+        type: string
+        description: Colonnes à renvoyer, séparées par des virgules (ex. titre,createur). Implique la vue résumée.
     responses:
       '200':
-        description: Liste des recettes publiques récupérée avec succès
+        description: Liste des recettes publiques récupérée avec succès (avec isSaved si l'utilisateur est connecté)
       '500':
         description: Erreur interne
     """
@@ -417,15 +856,15 @@ def lister_recettes_publiques():
         query = Recette.query.filter_by(publique=True)
 
         if titre_filter:
-            query = query.filter(Recette.titre.ilike(f"%{titre_filter}%"))
+            query = query.filter(filtre_contient(Recette.titre, titre_filter))
 
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        recettes_data, pagination = paginer_recettes(query, page, per_page, request.args.get("cursor"))
         return jsonify({
-            "recettes": [recette.to_dict() for recette in pagination.items],
-            "total": pagination.total,
-            "pages": pagination.pages,
-            "current_page": page
+            "recettes": ajouter_is_saved(recettes_data, identite_optionnelle()),
+            **meta_pagination(pagination, page)
         }), 200
+    except ValueError as e:
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"message": "Erreur lors de la récupération", "details": str(e)}), 500
 
@@ -442,15 +881,15 @@ def lister_recettes_publiques_utilisateur():
 
         query = Recette.query.filter_by(id_utilisateur=id_utilisateur, publique=True)
         if titre_filter:
-            query = query.filter(Recette.titre.ilike(f"%{titre_filter}%"))
+            query = query.filter(filtre_contient(Recette.titre, titre_filter))
 
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        recettes_data, pagination = paginer_recettes(query, page, per_page, request.args.get("cursor"))
         return jsonify({
-            "recettes": [recette.to_dict() for recette in pagination.items],
-            "total": pagination.total,
-            "pages": pagination.pages,
-            "current_page": page
+            "recettes": recettes_data,
+            **meta_pagination(pagination, page)
         }), 200
+    except ValueError as e:
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"message": "Erreur lors de la récupération", "details": str(e)}), 500
 
@@ -566,19 +1005,20 @@ def lister_recettes_enregistrees():
         titre_filter = request.args.get("titre", "")
         id_utilisateur = int(get_jwt_identity())
 
-        query = Recette.query.join(RecetteUtilisateur, Recette.id_recette == RecetteUtilisateur.id_recette) \
+        query = Recette.query \
+            .join(RecetteUtilisateur, Recette.id_recette == RecetteUtilisateur.id_recette) \
             .filter(RecetteUtilisateur.id_utilisateur == id_utilisateur)
 
         if titre_filter:
-            query = query.filter(Recette.titre.ilike(f"%{titre_filter}%"))
+            query = query.filter(filtre_contient(Recette.titre, titre_filter))
 
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        recettes_data, pagination = paginer_recettes(query, page, per_page, request.args.get("cursor"))
         return jsonify({
-            "recettes": [recette.to_dict() for recette in pagination.items],
-            "total": pagination.total,
-            "pages": pagination.pages,
-            "current_page": page
+            "recettes": recettes_data,
+            **meta_pagination(pagination, page)
         }), 200
+    except ValueError as e:
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"message": "Erreur lors de la récupération", "details": str(e)}), 500
 
@@ -627,7 +1067,58 @@ def verifier_enregistrement(id):
         return jsonify({"message": "Erreur lors de la vérification", "details": str(e)}), 500
 
 
+@recettes_bp.route("/recettes/verifier-enregistrements", methods=["GET"])
+@jwt_required()
+def verifier_enregistrements():
+    """
+    Vérifier en une seule requête si plusieurs recettes sont enregistrées par l'utilisateur
+    ---
+    tags:
+      - Recettes
+    security:
+      - bearerAuth: []
+    parameters:
+      - name: ids
+        in: query
+        type: string
+        required: true
+        description: Identifiants des recettes, séparés par des virgules (ex. 1,2,3) ou répétés (ids=1&ids=2).
+    responses:
+      '200':
+        description: Résultat de la vérification pour chaque identifiant demandé.
+        schema:
+          type: object
+          properties:
+            isSaved:
+              type: object
+              additionalProperties:
+                type: boolean
+              description: Dictionnaire id_recette -> recette enregistrée ou non.
+      '400':
+        description: Identifiants manquants ou invalides.
+      '401':
+        description: Non autorisé.
+      '500':
+        description: Erreur interne.
+    """
+    try:
+        ids = [i for valeur in request.args.getlist("ids") for i in valeur.split(",") if i.strip()]
+        if not ids:
+            return jsonify({"message": "Le paramètre ids est requis"}), 400
+        if len(ids) > 100:
+            return jsonify({"message": "100 identifiants maximum par requête"}), 400
+        ids = [int(i) for i in ids]
+
+        enregistrees = ids_recettes_enregistrees(get_jwt_identity(), ids)
+        return jsonify({"isSaved": {str(i): i in enregistrees for i in ids}}), 200
+    except ValueError:
+        return jsonify({"message": "Les identifiants doivent être des entiers"}), 400
+    except Exception as e:
+        return jsonify({"message": "Erreur lors de la vérification", "details": str(e)}), 500
+
+
 @recettes_bp.route("/recettes/suggestions", methods=["GET"])
+@lecture_seule
 def obtenir_recettes_suggestions():
     """
     Récupérer un échantillon de recettes publiques pour affichage sous forme de cartes
@@ -661,6 +1152,9 @@ def obtenir_recettes_suggestions():
                         type: string
                       imageUrl:
                         type: string
+                      isSaved:
+                        type: boolean
+                        description: Présent uniquement si l'utilisateur est connecté.
                       ingredients:
                         type: array
                         items:
@@ -682,42 +1176,15 @@ def obtenir_recettes_suggestions():
         limit = request.args.get("limit", default=4, type=int)
         limit = max(1, min(limit, 10))
 
-        logger.debug("Récupération des recettes publiques")
-        recettes_publiques = Recette.query.filter_by(publique=True).all()
-        if not recettes_publiques:
+        pool = obtenir_pool_suggestions()
+        if not pool:
             logger.warning("Aucune recette publique disponible")
             return jsonify({"recettes": []}), 200
 
-        suggestions = random.sample(recettes_publiques, min(limit, len(recettes_publiques)))
-        logger.debug(f"Nombre de suggestions sélectionnées : {len(suggestions)}")
-
-        # Sérialisation avec 'ingredients' pour correspondre au backend
-        suggestions_data = []
-        for recette in suggestions:
-            try:
-                ingredients = [
-                    {
-                        "id_ingredient": ri.ingredient.id_ingredient,
-                        "nom": ri.ingredient.nom,
-                        "quantite": ri.quantite,
-                        "unite": ri.unite
-                    }
-                    for ri in getattr(recette, "ingredients", [])
-                ]
-                suggestions_data.append({
-                    "id_recette": recette.id_recette,
-                    "titre": recette.titre or "Sans titre",
-                    "createur": getattr(recette.createur, "nom", "Inconnu") if recette.createur else "Inconnu",
-                    "imageUrl": getattr(recette, "image_url", None),
-                    "ingredients": ingredients
-                })
-            except Exception as e:
-                logger.error(f"Erreur lors de la sérialisation de la recette {recette.id_recette} : {str(e)}",
-                             exc_info=True)
-                continue
-
-        logger.debug(f"Nombre de suggestions sérialisées : {len(suggestions_data)}")
-        return jsonify({"recettes": suggestions_data}), 200
+        # Copie des entrées du pool : ajouter_is_saved ne doit pas modifier le cache partagé
+        suggestions_data = [dict(recette) for recette in random.sample(pool, min(limit, len(pool)))]
+        logger.debug(f"Nombre de suggestions sélectionnées : {len(suggestions_data)}")
+        return jsonify({"recettes": ajouter_is_saved(suggestions_data, identite_optionnelle())}), 200
     except Exception as e:
         logger.error(f"Erreur inattendue dans /recettes/suggestions : {str(e)}", exc_info=True)
         return jsonify({"message": "Erreur interne du serveur", "details": str(e)}), 500
@@ -743,6 +1210,15 @@ def lister_recettes_pour_courses():
         in: query
         type: integer
         description: Nombre de recettes par page (par défaut 10)
+      - name: view
+        in: query
+        type: string
+        enum: [summary]
+        description: Vue résumée (titre, créateur, temps) sans étapes ni ingrédients.
+      - name: fields
+        in: query
+        type: string
+        description: Colonnes à renvoyer, séparées par des virgules (ex. titre,createur). Implique la vue résumée.
     responses:
       '200':
         description: Liste des recettes personnelles et enregistrées
@@ -758,14 +1234,15 @@ def lister_recettes_pour_courses():
 
         # Recettes personnelles
         own_query = Recette.query.filter_by(id_utilisateur=id_utilisateur)
-        own_pagination = own_query.paginate(page=page, per_page=per_page, error_out=False)
-        own_recettes = [{"type": "personnelle", **recette.to_dict()} for recette in own_pagination.items]
+        own_data, own_pagination = paginer_recettes(own_query, page, per_page)
+        own_recettes = [{"type": "personnelle", **recette} for recette in own_data]
 
         # Recettes enregistrées
-        saved_query = Recette.query.join(RecetteUtilisateur, Recette.id_recette == RecetteUtilisateur.id_recette) \
+        saved_query = Recette.query \
+            .join(RecetteUtilisateur, Recette.id_recette == RecetteUtilisateur.id_recette) \
             .filter(RecetteUtilisateur.id_utilisateur == id_utilisateur)
-        saved_pagination = saved_query.paginate(page=page, per_page=per_page, error_out=False)
-        saved_recettes = [{"type": "enregistrée", **recette.to_dict()} for recette in saved_pagination.items]
+        saved_data, saved_pagination = paginer_recettes(saved_query, page, per_page)
+        saved_recettes = [{"type": "enregistrée", **recette} for recette in saved_data]
 
         # Combinaison des deux
         all_recettes = own_recettes + saved_recettes
@@ -777,6 +1254,8 @@ def lister_recettes_pour_courses():
             "pages": max(own_pagination.pages, saved_pagination.pages),
             "current_page": page
         }), 200
+    except ValueError as e:
+        return jsonify({"message": f"Valeur invalide: {str(e)}"}), 400
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des recettes pour courses: {str(e)}", exc_info=True)
         return jsonify({"message": "Erreur lors de la récupération", "details": str(e)}), 500
\ No newline at end of file
@@ -1,63 +1,63 @@
 # app/routes/rechercher.py
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.recette import Recette
-from app.models.ingredient import Ingredient
-from app.models.liste_courses import ListeCourses
-from app.models.inventaire import Inventaire
-from app import db
+from app.routes.recettes import identite_optionnelle
+from app.utils.recherche import rechercher as rechercher_plein_texte, TYPES_RECHERCHE
+from app.utils.repliques import lecture_seule
 
 rechercher_bp = Blueprint("rechercher", __name__)
 
 
 @rechercher_bp.route("/rechercher", methods=["GET"])
+@lecture_seule
 def rechercher():
+    """
+    Recherche plein texte classée par pertinence
+    ---
+    tags:
+      - Recherche
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Texte recherché (insensible aux accents, chaque mot est cherché comme préfixe).
+      - name: types
+        in: query
+        type: string
+        description: Types inclus, séparés par des virgules (recette, ingredient, course, inventaire). Tous par défaut.
+      - name: limit
+        in: query
+        type: integer
+        description: Nombre maximum de résultats (par défaut 20, max 100).
+      - name: offset
+        in: query
+        type: integer
+        description: Décalage dans les résultats (par défaut 0).
+    responses:
+      '200':
+        description: Résultats triés par score décroissant. Les recettes privées, listes de courses et inventaires
+          ne sont renvoyés qu'à leur propriétaire.
+      '400':
+        description: Requête vide ou paramètres invalides.
+      '500':
+        description: Erreur interne.
+    """
     try:
         query = request.args.get("q", "").strip()
         if not query:
             return jsonify({"message": "Requête de recherche vide", "results": []}), 400
 
-        results = []
-
-        # Recherche dans les recettes
-        recettes = Recette.query.filter(
-            (Recette.titre.ilike(f"%{query}%")) | (Recette.description.ilike(f"%{query}%"))
-        ).all()
-        for recette in recettes:
-            results.append({
-                "type": "recette",
-                "id": recette.id_recette,
-                "nom": recette.titre,
-                "description": recette.description,
-            })
-
-        # Recherche dans les ingrédients
-        ingredients = Ingredient.query.filter(Ingredient.nom.ilike(f"%{query}%")).all()
-        for ingredient in ingredients:
-            results.append({
-                "type": "ingredient",
-                "id": ingredient.id_ingredient,
-                "nom": ingredient.nom,
-            })
-
-        # Recherche dans les listes de courses
-        courses = ListeCourses.query.filter(ListeCourses.nom.ilike(f"%{query}%")).all()
-        for course in courses:
-            results.append({
-                "type": "course",
-                "id": course.id_liste,
-                "nom": course.nom,
-            })
-
-        # Recherche dans les inventaires
-        inventaires = Inventaire.query.filter(Inventaire.nom.ilike(f"%{query}%")).all()
-        for inventaire in inventaires:
-            results.append({
-                "type": "inventaire",
-                "id": inventaire.id_inventaire,
-                "nom": inventaire.nom,
-            })
-
-        return jsonify({"results": results}), 200
+        limit = max(1, min(request.args.get("limit", 20, type=int), 100))
+        offset = max(0, request.args.get("offset", 0, type=int))
+        types = [t.strip() for t in request.args.get("types", ",".join(TYPES_RECHERCHE)).split(",") if t.strip()]
+        inconnus = [t for t in types if t not in TYPES_RECHERCHE]
+        if inconnus:
+            return jsonify({"message": f"Types inconnus: {', '.join(inconnus)}"}), 400
+
+        # Recherche anonyme possible : un token absent, expiré ou malformé ne donne que les résultats publics
+        id_utilisateur = identite_optionnelle()
+        results = rechercher_plein_texte(query, types, int(id_utilisateur) if id_utilisateur else None,
+                                         limit, offset)
+        return jsonify({"results": results, "limit": limit, "offset": offset}), 200
     except Exception as e:
         return jsonify({"message": "Erreur lors de la recherche", "details": str(e)}), 500
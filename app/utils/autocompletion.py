@@ -0,0 +1,116 @@
+import bisect
+import threading
+import time
+import unicodedata
+from app import db
+from app.models.ingredient import Ingredient
+from app.utils.ingredients import abonner_ecritures
+
+
+def normaliser(texte):
+    """
+    Forme de comparaison : sans accents, insensible à la casse, espaces réduits.
+    """
+    decompose = unicodedata.normalize("NFKD", texte or "")
+    sans_accents = "".join(c for c in decompose if not unicodedata.combining(c))
+    return " ".join(sans_accents.casefold().split())
+
+
+class IndexPrefixes:
+    """
+    Index de préfixes en mémoire (un par worker) : tableau trié de (clé normalisée, id).
+    Chaque début de mot du nom est indexé, « fraiche » trouve donc « Crème fraîche ».
+    """
+
+    def __init__(self):
+        self._cles = []
+        self._noms = {}
+        self._verrou = threading.Lock()
+        self.construit_le = None
+
+    @staticmethod
+    def _cles_pour(id_, nom):
+        mots = normaliser(nom).split(" ")
+        return [(" ".join(mots[i:]), id_) for i in range(len(mots)) if mots[i]]
+
+    def construire(self, lignes):
+        cles, noms = [], {}
+        for id_, nom in lignes:
+            noms[id_] = nom
+            cles.extend(self._cles_pour(id_, nom))
+        cles.sort()
+        with self._verrou:
+            self._cles, self._noms = cles, noms
+            self.construit_le = time.monotonic()
+
+    def reinitialiser(self):
+        with self._verrou:
+            self._cles, self._noms = [], {}
+            self.construit_le = None
+
+    def _retirer(self, id_):
+        nom = self._noms.pop(id_, None)
+        if nom is None:
+            return
+        for cle in self._cles_pour(id_, nom):
+            position = bisect.bisect_left(self._cles, cle)
+            if position < len(self._cles) and self._cles[position] == cle:
+                del self._cles[position]
+
+    def mettre_a_jour(self, id_, nom):
+        with self._verrou:
+            self._retirer(id_)
+            self._noms[id_] = nom
+            for cle in self._cles_pour(id_, nom):
+                bisect.insort(self._cles, cle)
+
+    def retirer(self, id_):
+        with self._verrou:
+            self._retirer(id_)
+
+    def rechercher(self, prefixe, limit=10):
+        prefixe = normaliser(prefixe)
+        if not prefixe:
+            return []
+        resultats = {}
+        with self._verrou:
+            position = bisect.bisect_left(self._cles, (prefixe,))
+            while position < len(self._cles) and len(resultats) < limit:
+                cle, id_ = self._cles[position]
+                if not cle.startswith(prefixe):
+                    break
+                resultats.setdefault(id_, self._noms[id_])
+                position += 1
+        return [{"id_ingredient": id_, "nom": nom} for id_, nom in resultats.items()]
+
+    def __len__(self):
+        return len(self._noms)
+
+
+index_ingredients = IndexPrefixes()
+
+
+def obtenir_index(ttl):
+    """
+    Construit l'index au premier appel, puis le reconstruit entièrement après `ttl` secondes
+    pour rattraper les écritures faites par les autres workers.
+    """
+    if index_ingredients.construit_le is None or time.monotonic() - index_ingredients.construit_le > ttl:
+        index_ingredients.construire(db.session.query(Ingredient.id_ingredient, Ingredient.nom).all())
+    return index_ingredients
+
+
+# Mise à jour incrémentale à chaque écriture validée sur Ingredient (voir app/utils/ingredients.py) ;
+# None signale des modifications inconnues (autre worker, message trop long) : reconstruction au prochain appel
+@abonner_ecritures
+def _appliquer(modifications):
+    if index_ingredients.construit_le is None:
+        return
+    if modifications is None:
+        index_ingredients.reinitialiser()
+        return
+    for id_, nom in modifications:
+        if nom is None:
+            index_ingredients.retirer(id_)
+        else:
+            index_ingredients.mettre_a_jour(id_, nom)
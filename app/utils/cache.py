@@ -0,0 +1,52 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheTTL:
+    """
+    Cache mémoire propre au processus (un par worker gunicorn), avec durée de vie par entrée
+    et taille bornée (les entrées les moins récemment utilisées sont évincées en premier).
+    """
+
+    def __init__(self, ttl, taille_max=1024):
+        self.ttl = ttl
+        self.taille_max = taille_max
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def get(self, cle, defaut=None):
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is None:
+                return defaut
+            expiration, valeur = entree
+            if expiration <= time.monotonic():
+                del self._entrees[cle]
+                return defaut
+            self._entrees.move_to_end(cle)
+            return valeur
+
+    def set(self, cle, valeur, ttl=None):
+        with self._verrou:
+            self._entrees.pop(cle, None)
+            self._entrees[cle] = (time.monotonic() + (self.ttl if ttl is None else ttl), valeur)
+            while len(self._entrees) > self.taille_max:
+                self._entrees.popitem(last=False)
+
+    def get_or_set(self, cle, fabrique):
+        valeur = self.get(cle)
+        if valeur is None:
+            valeur = fabrique()
+            self.set(cle, valeur)
+        return valeur
+
+    def invalider(self, cle=None):
+        with self._verrou:
+            if cle is None:
+                self._entrees.clear()
+            else:
+                self._entrees.pop(cle, None)
+
+    def __len__(self):
+        return len(self._entrees)
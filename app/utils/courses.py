@@ -0,0 +1,258 @@
+import hashlib
+import json
+import logging
+from sqlalchemy import bindparam, delete, insert, or_, text, update
+from app import db
+from app.models.inventaire_ingredient import InventaireIngredient
+from app.models.liste_courses import ListeCourses
+from app.models.liste_courses_item import ListeCoursesItem
+from app.models.recette_ingredient import RecetteIngredient
+from app.utils.ingredients import cache_ingredients
+from app.utils.unites import MASSE, VOLUME, facteur, lignes_facteurs, sommer, unite_connue
+
+logger = logging.getLogger(__name__)
+
+# Table des facteurs d'unités en CTE (construite une fois depuis le registre, valeurs littérales connues)
+CTE_FACTEURS = "facteurs (unite, dimension, facteur) AS (" + " UNION ALL ".join(
+    f"SELECT '{graphie}', '{dim}', {facteur!r}" for graphie, dim, facteur in lignes_facteurs()
+) + ")"
+
+# Stock d'une ligne d'inventaire exprimé dans l'unité de la ligne de recette : même dimension, ou masse/volume
+# via la densité de l'ingrédient ; 0 si l'unité est inconnue ou la conversion impossible
+SQL_DISPONIBLE = f"""
+    CASE
+        WHEN fs.dimension = fr.dimension THEN ii.quantite_disponible * fs.facteur / fr.facteur
+        WHEN fs.dimension = '{MASSE}' AND fr.dimension = '{VOLUME}' AND i.densite > 0
+            THEN ii.quantite_disponible * fs.facteur / i.densite / fr.facteur
+        WHEN fs.dimension = '{VOLUME}' AND fr.dimension = '{MASSE}' AND i.densite > 0
+            THEN ii.quantite_disponible * fs.facteur * i.densite / fr.facteur
+        ELSE 0
+    END
+"""
+
+SQL_MANQUANTS = f"""
+    WITH {CTE_FACTEURS},
+    lignes AS (
+        SELECT ri.id_recette_ingredient, ri.id_ingredient, i.nom, ri.quantite, ri.unite,
+               COALESCE(SUM({SQL_DISPONIBLE}), 0) AS disponible,
+               COALESCE(MAX(ii.prix_unitaire), 0) AS prix_unitaire
+        FROM recette_ingredients ri
+        JOIN ingredients i ON i.id_ingredient = ri.id_ingredient
+        LEFT JOIN facteurs fr ON fr.unite = lower(ri.unite)
+        LEFT JOIN inventaire_ingredients ii
+            ON ii.id_ingredient = ri.id_ingredient AND ii.id_inventaire = :id_inventaire
+        LEFT JOIN facteurs fs ON fs.unite = lower(ii.unite)
+        WHERE ri.id_recette = :id_recette
+        GROUP BY ri.id_recette_ingredient, ri.id_ingredient, i.nom, ri.quantite, ri.unite
+    )
+    SELECT id_ingredient, nom, unite, prix_unitaire,
+           CASE WHEN quantite > disponible THEN quantite - disponible ELSE 0 END AS quantite_manquante
+    FROM lignes
+    ORDER BY id_recette_ingredient
+"""
+
+# Même calcul, pour les ingrédients donnés de toutes les listes synchronisées d'un inventaire
+SQL_RESYNCHRONISATION = f"""
+    WITH {CTE_FACTEURS},
+    lignes AS (
+        SELECT lc.id_liste, ri.id_recette_ingredient, ri.id_ingredient, ri.quantite, ri.unite,
+               COALESCE(SUM({SQL_DISPONIBLE}), 0) AS disponible
+        FROM liste_courses lc
+        JOIN recette_ingredients ri ON ri.id_recette = lc.id_recette
+        JOIN ingredients i ON i.id_ingredient = ri.id_ingredient
+        LEFT JOIN facteurs fr ON fr.unite = lower(ri.unite)
+        LEFT JOIN inventaire_ingredients ii
+            ON ii.id_ingredient = ri.id_ingredient AND ii.id_inventaire = lc.id_inventaire
+        LEFT JOIN facteurs fs ON fs.unite = lower(ii.unite)
+        WHERE lc.id_inventaire = :id_inventaire AND lc.synchronisee AND ri.id_ingredient IN :ids_ingredients
+        GROUP BY lc.id_liste, ri.id_recette_ingredient, ri.id_ingredient, ri.quantite, ri.unite
+    )
+    SELECT id_liste, id_ingredient, unite,
+           CASE WHEN quantite > disponible THEN quantite - disponible ELSE 0 END AS quantite_manquante
+    FROM lignes
+"""
+
+
+def quantites_manquantes(id_recette, id_inventaire):
+    """
+    Pour chaque ingrédient de la recette, quantité manquante dans l'inventaire, dans l'unité de la recette,
+    calculée en une requête (les lignes d'inventaire d'un même ingrédient sont additionnées).
+    Renvoie des dicts id_ingredient, nom, unite, prix_unitaire, quantite_manquante (0 si le stock suffit).
+    """
+    lignes = db.session.execute(text(SQL_MANQUANTS), {"id_recette": id_recette, "id_inventaire": id_inventaire})
+    return [dict(ligne._mapping) for ligne in lignes]
+
+
+def empreinte_courses(articles):
+    """
+    Empreinte (sha256 hex) du contenu d'une liste : articles (id_ingredient, unite, quantite) agrégés par
+    ingrédient et unité, indépendante de l'ordre. Sert de clé de déduplication des listes générées.
+    """
+    quantites = {}
+    for id_ingredient, unite, quantite in articles:
+        quantites[(id_ingredient, unite)] = quantites.get((id_ingredient, unite), 0) + quantite
+    contenu = sorted([id_ingredient, unite, round(quantite, 6)]
+                     for (id_ingredient, unite), quantite in quantites.items())
+    return hashlib.sha256(json.dumps(contenu).encode()).hexdigest()
+
+
+def recalculer_empreintes(id_inventaire, ids_listes):
+    """
+    Recalcule l'empreinte des listes de l'inventaire dont les articles viennent de changer, pour qu'elles restent
+    des cibles de déduplication. Si plusieurs listes d'une même recette arrivent au même contenu, la plus
+    ancienne garde l'empreinte (contrainte d'unicité) et les autres n'en ont plus.
+    """
+    contenus = {id_liste: [] for id_liste in ids_listes}
+    for item in db.session.query(ListeCoursesItem.id_liste, ListeCoursesItem.id_ingredient, ListeCoursesItem.unite,
+                                 ListeCoursesItem.quantite).filter(ListeCoursesItem.id_liste.in_(list(contenus))):
+        contenus[item.id_liste].append((item.id_ingredient, item.unite, item.quantite))
+    empreintes = {id_liste: empreinte_courses(articles) for id_liste, articles in contenus.items()}
+
+    # Listes modifiées et listes portant déjà une des nouvelles empreintes, des plus anciennes aux plus récentes
+    gagnantes, perdantes = {}, []
+    for liste in db.session.query(
+            ListeCourses.id_liste, ListeCourses.id_utilisateur, ListeCourses.id_recette, ListeCourses.empreinte
+    ).filter(ListeCourses.id_inventaire == id_inventaire,
+             or_(ListeCourses.id_liste.in_(list(contenus)),
+                 ListeCourses.empreinte.in_(set(empreintes.values())))).order_by(ListeCourses.id_liste):
+        empreinte = empreintes.get(liste.id_liste, liste.empreinte)
+        gagnante = gagnantes.setdefault((liste.id_utilisateur, liste.id_recette, empreinte), liste.id_liste)
+        if gagnante != liste.id_liste and liste.id_liste not in contenus:
+            perdantes.append(liste.id_liste)
+
+    # Effacement d'abord, pour qu'aucune affectation ne heurte l'index unique pendant l'échange d'empreintes
+    db.session.execute(update(ListeCourses).where(ListeCourses.id_liste.in_(list(contenus) + perdantes))
+                       .values(empreinte=None), execution_options={"synchronize_session": False})
+    affectations = [{"id_liste": id_liste, "empreinte": empreinte}
+                    for (_, _, empreinte), id_liste in gagnantes.items() if id_liste in contenus]
+    if affectations:
+        db.session.execute(update(ListeCourses), affectations)
+
+
+def resynchroniser_listes(id_inventaire, ids_ingredients):
+    """
+    Met à jour, dans la transaction en cours, les articles des listes synchronisées de l'inventaire
+    qui portent sur les ingrédients dont le stock vient de changer : quantité modifiée, article supprimé
+    si le stock suffit désormais, ajouté s'il manque à nouveau. Les autres articles ne sont pas relus.
+    Une requête de calcul, une de lecture des articles, puis au plus un UPDATE, un DELETE et un INSERT
+    d'articles ; l'empreinte des listes modifiées est recalculée. Renvoie le nombre d'articles écrits.
+    """
+    ids_ingredients = sorted(set(ids_ingredients))
+    if not ids_ingredients:
+        return 0
+    db.session.flush()
+
+    # Quantités attendues par (liste, ingrédient, unité) ; une recette peut citer deux fois un ingrédient
+    attendus = {}
+    lignes = db.session.execute(
+        text(SQL_RESYNCHRONISATION).bindparams(bindparam("ids_ingredients", expanding=True)),
+        {"id_inventaire": id_inventaire, "ids_ingredients": ids_ingredients})
+    for ligne in lignes:
+        if ligne.quantite_manquante > 0:
+            cle = (ligne.id_liste, ligne.id_ingredient, ligne.unite)
+            attendus[cle] = attendus.get(cle, 0) + ligne.quantite_manquante
+
+    modifies, supprimes, listes = [], [], set()
+    for item in db.session.query(
+            ListeCoursesItem.id_item, ListeCoursesItem.id_liste, ListeCoursesItem.id_ingredient,
+            ListeCoursesItem.quantite, ListeCoursesItem.unite
+    ).join(ListeCourses).filter(
+        ListeCourses.id_inventaire == id_inventaire, ListeCourses.synchronisee.is_(True),
+        ListeCoursesItem.id_ingredient.in_(ids_ingredients)
+    ):
+        quantite = attendus.pop((item.id_liste, item.id_ingredient, item.unite), None)
+        if quantite is None:
+            supprimes.append(item.id_item)
+            listes.add(item.id_liste)
+        elif quantite != item.quantite:
+            modifies.append({"id_item": item.id_item, "quantite": quantite})
+            listes.add(item.id_liste)
+
+    if modifies:
+        db.session.execute(update(ListeCoursesItem), modifies)
+    if supprimes:
+        db.session.execute(delete(ListeCoursesItem).where(ListeCoursesItem.id_item.in_(supprimes)))
+    listes.update(id_liste for id_liste, _, _ in attendus)
+    if attendus:
+        db.session.execute(insert(ListeCoursesItem), [
+            {"id_liste": id_liste, "id_ingredient": id_ingredient, "quantite": quantite, "unite": unite}
+            for (id_liste, id_ingredient, unite), quantite in attendus.items()
+        ])
+    if listes:
+        recalculer_empreintes(id_inventaire, listes)
+
+    ecrits = len(modifies) + len(supprimes) + len(attendus)
+    if ecrits:
+        logger.info(f"Inventaire {id_inventaire} : {ecrits} article(s) de liste de courses resynchronisé(s)")
+    return ecrits
+
+
+def prix_pivot(prix_unitaire, unite_prix, unite, densite=None):
+    """
+    Prix par `unite` d'un prix donné par `unite_prix` (5 €/kg -> 0,005 €/g). Un prix sans unité est pris tel
+    quel ; None si le prix manque ou si l'unité ne se convertit pas.
+    """
+    if prix_unitaire is None:
+        return None
+    if not unite_prix:
+        return prix_unitaire
+    try:
+        return prix_unitaire / facteur(unite_prix, unite, densite)
+    except ValueError:
+        return None
+
+
+def planifier_courses(portions, ids_inventaires):
+    """
+    Liste de courses d'un ensemble de recettes : portions = {id_recette: multiplicateur}.
+    Besoins et stocks (de tous les inventaires donnés) sont agrégés par ingrédient dans une unité pivot commune
+    (voir unites.sommer), puis le stock est retranché. Deux requêtes de lignes, plus une pour les fiches
+    d'ingrédients absentes du cache, quel que soit le nombre de recettes.
+    Renvoie les articles manquants (id_ingredient, nom, quantite, unite, prix_unitaire par unite, cout) triés
+    par nom.
+    """
+    lignes_recettes = [ligne for ligne in db.session.query(
+        RecetteIngredient.id_recette, RecetteIngredient.id_ingredient, RecetteIngredient.quantite,
+        RecetteIngredient.unite
+    ).filter(RecetteIngredient.id_recette.in_(list(portions))) if unite_connue(ligne.unite)]
+    lignes_stock = [ligne for ligne in db.session.query(
+        InventaireIngredient.id_ingredient, InventaireIngredient.quantite_disponible, InventaireIngredient.unite,
+        InventaireIngredient.prix_unitaire
+    ).filter(InventaireIngredient.id_inventaire.in_(list(ids_inventaires))) if unite_connue(ligne.unite)] \
+        if ids_inventaires else []
+
+    fiches = cache_ingredients.fiches([ligne.id_ingredient for ligne in lignes_recettes])
+    requis = sommer((ligne.id_ingredient, ligne.quantite * portions[ligne.id_recette], ligne.unite,
+                     fiches[ligne.id_ingredient]["densite"]) for ligne in lignes_recettes)
+    disponibles = sommer((ligne.id_ingredient, ligne.quantite_disponible, ligne.unite,
+                          fiches[ligne.id_ingredient]["densite"]) for ligne in lignes_stock
+                         if ligne.id_ingredient in fiches)
+
+    # Prix : premier prix renseigné dans les inventaires (par unité de la ligne de stock), sinon celui de
+    # l'ingrédient (par son unité) ; ramené à l'unité pivot de l'article
+    prix = {}
+    for ligne in lignes_stock:
+        if ligne.prix_unitaire is not None:
+            prix.setdefault(ligne.id_ingredient, []).append((ligne.prix_unitaire, ligne.unite))
+
+    articles = []
+    for (id_ingredient, unite), quantite_requise in requis.items():
+        quantite = quantite_requise - disponibles.get((id_ingredient, unite), 0)
+        if quantite > 0:
+            fiche = fiches[id_ingredient]
+            candidats = prix.get(id_ingredient, []) + [(fiche["prix_unitaire"], fiche["unite"])]
+            prix_unitaire = 0.0
+            for prix_ligne, unite_prix in candidats:
+                converti = prix_pivot(prix_ligne, unite_prix, unite, fiche["densite"])
+                if converti is not None:
+                    prix_unitaire = converti
+                    break
+            articles.append({
+                "id_ingredient": id_ingredient,
+                "nom": fiche["nom"],
+                "quantite": quantite,
+                "unite": unite,
+                "prix_unitaire": prix_unitaire,
+                "cout": quantite * prix_unitaire,
+            })
+    return sorted(articles, key=lambda article: (article["nom"], article["unite"]))
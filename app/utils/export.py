@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+import logging
+from flask import Response, request, stream_with_context
+
+logger = logging.getLogger(__name__)
+
+FORMATS_EXPORT = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Lignes lues par aller-retour du curseur côté serveur
+TAILLE_LOT_EXPORT = 500
+
+
+def _cellule(valeur):
+    # Les champs imbriqués (ingrédients, étapes, articles) sont encodés en JSON dans une seule cellule
+    return json.dumps(valeur, ensure_ascii=False) if isinstance(valeur, (list, dict)) else valeur
+
+
+def reponse_export(query, serialiser, colonnes, nom_fichier):
+    """
+    Réponse HTTP streamée au format ?format=ndjson (défaut) ou csv, une ligne par objet de `query`.
+    La requête est parcourue avec yield_per (curseur côté serveur sous Postgres) : la mémoire utilisée
+    ne dépend pas de la taille de la collection. Lève ValueError si le format est inconnu.
+    """
+    format_export = request.args.get("format", "ndjson")
+    if format_export not in FORMATS_EXPORT:
+        raise ValueError(f"Format inconnu: {format_export} (ndjson ou csv)")
+
+    def generer():
+        tampon = io.StringIO()
+        ecrivain = csv.writer(tampon)
+
+        def vider():
+            contenu = tampon.getvalue()
+            tampon.seek(0)
+            tampon.truncate(0)
+            return contenu
+
+        if format_export == "csv":
+            ecrivain.writerow(colonnes)
+            yield vider()
+        try:
+            for objet in query.yield_per(TAILLE_LOT_EXPORT):
+                data = serialiser(objet)
+                if format_export == "csv":
+                    ecrivain.writerow([_cellule(data.get(colonne)) for colonne in colonnes])
+                    yield vider()
+                else:
+                    yield json.dumps(data, ensure_ascii=False) + "\n"
+        except Exception as e:
+            # Les en-têtes sont déjà partis : l'export est tronqué, l'erreur est seulement journalisée
+            logger.error(f"Export {nom_fichier} interrompu: {str(e)}", exc_info=True)
+            raise
+
+    return Response(stream_with_context(generer()), mimetype=FORMATS_EXPORT[format_export],
+                    headers={"Content-Disposition": f'attachment; filename="{nom_fichier}.{format_export}"'})
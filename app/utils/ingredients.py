@@ -0,0 +1,283 @@
+import json
+import logging
+import os
+import select as selecteur
+import threading
+import time
+import unicodedata
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.models.ingredient import Ingredient
+from app.utils.cache import CacheTTL
+
+logger = logging.getLogger(__name__)
+
+
+# --- Suivi des écritures sur Ingredient ---
+# Les (id, nom) écrits sont notés dans la session (nom None = suppression) et transmis aux abonnés
+# (cache ci-dessous, index d'autocomplétion) seulement si la transaction est validée.
+
+_abonnes = []
+
+
+def abonner_ecritures(fonction):
+    """
+    Décorateur : fonction(modifications) est appelée après chaque commit touchant des ingrédients,
+    avec la liste des (id, nom), ou None si les modifications sont inconnues (tout invalider).
+    """
+    _abonnes.append(fonction)
+    return fonction
+
+
+def _diffuser(modifications):
+    for fonction in _abonnes:
+        fonction(modifications)
+
+
+def noter_ecritures(session, lignes):
+    """
+    Enregistre des (id, nom) écrits, y compris hors de l'unité de travail ORM (INSERT en masse).
+    """
+    session.info.setdefault("ingredients_modifies", []).extend(lignes)
+    if _ecoute["actif"]:
+        _notifier(session, lignes)
+
+
+def _noter(mapper, connexion, ingredient, suppression=False):
+    session = object_session(ingredient)
+    if session is not None:
+        noter_ecritures(session, [(ingredient.id_ingredient, None if suppression else ingredient.nom)])
+
+
+event.listen(Ingredient, "after_insert", _noter)
+event.listen(Ingredient, "after_update", _noter)
+event.listen(Ingredient, "after_delete", lambda m, c, i: _noter(m, c, i, suppression=True))
+
+
+@event.listens_for(Session, "after_commit")
+def _apres_commit(session):
+    modifications = session.info.pop("ingredients_modifies", None)
+    if modifications:
+        _diffuser(modifications)
+
+
+@event.listens_for(Session, "after_rollback")
+def _apres_rollback(session):
+    session.info.pop("ingredients_modifies", None)
+
+
+# --- Cohérence entre workers (Postgres, active par défaut : INGREDIENTS_NOTIFY) ---
+# pg_notify est transactionnel : le message n'est délivré qu'au commit, jamais après un rollback.
+
+CANAL_NOTIFY = "ingredients_modifies"
+TAILLE_MAX_NOTIFY = 7000  # limite Postgres : 8000 octets par message
+_ecoute = {"actif": False, "pid": None}
+
+
+def _notifier(session, lignes):
+    connexion = session.connection()
+    # L'écoute est propre au processus : une autre application (base SQLite) ne notifie rien
+    if connexion.dialect.name != "postgresql":
+        return
+    charge = json.dumps(lignes)
+    if len(charge.encode()) > TAILLE_MAX_NOTIFY:
+        charge = "*"
+    connexion.execute(text("SELECT pg_notify(:canal, :charge)"),
+                      {"canal": CANAL_NOTIFY, "charge": charge})
+
+
+def _ecouter(engine):
+    while True:
+        try:
+            connexion = engine.raw_connection()
+            connexion.detach()  # connexion dédiée, rendue au pool jamais
+            dbapi = connexion.dbapi_connection
+            dbapi.autocommit = True
+            dbapi.cursor().execute(f"LISTEN {CANAL_NOTIFY}")
+            # Des messages ont pu être perdus pendant la (re)connexion
+            _diffuser(None)
+            while True:
+                if selecteur.select([dbapi], [], [], 60) == ([], [], []):
+                    continue
+                dbapi.poll()
+                while dbapi.notifies:
+                    charge = dbapi.notifies.pop(0).payload
+                    _diffuser(None if charge == "*" else [tuple(ligne) for ligne in json.loads(charge)])
+        except Exception as e:
+            logger.error(f"Écoute {CANAL_NOTIFY} interrompue, reconnexion dans 5 s: {str(e)}")
+            time.sleep(5)
+
+
+def demarrer_ecoute(engine):
+    """
+    Démarre (une fois par processus, donc après le fork des workers) le thread LISTEN qui applique
+    les écritures des autres workers au cache et à l'index d'autocomplétion.
+    """
+    if _ecoute["pid"] == os.getpid() or engine.dialect.name != "postgresql":
+        return
+    _ecoute["pid"] = os.getpid()
+    _ecoute["actif"] = True
+    threading.Thread(target=_ecouter, args=(engine,), name="ecoute-ingredients", daemon=True).start()
+
+
+# --- Cache LRU des fiches ingrédients ---
+
+def normaliser_nom(nom):
+    """
+    Clé de cache d'un nom : forme NFC, espaces superflus retirés. La casse et les accents sont conservés,
+    car la contrainte d'unicité de ingredients.nom les distingue.
+    """
+    return " ".join(unicodedata.normalize("NFC", nom).split())
+
+
+class CacheIngredients:
+    """
+    Fiches ingrédients (dict de Ingredient.to_dict()) indexées par id, et ids indexés par nom normalisé.
+    Les entrées expirent après `ttl` secondes en plus de l'invalidation à l'écriture.
+    """
+
+    def __init__(self, taille_max=4096, ttl=600):
+        self._par_id = CacheTTL(ttl=ttl, taille_max=taille_max)
+        self._par_nom = CacheTTL(ttl=ttl, taille_max=taille_max)
+        self.hits = 0
+        self.misses = 0
+
+    def configurer(self, taille_max, ttl):
+        for cache in (self._par_id, self._par_nom):
+            cache.taille_max, cache.ttl = taille_max, ttl
+
+    def _memoriser(self, fiche):
+        self._par_id.set(fiche["id_ingredient"], fiche)
+        self._par_nom.set(normaliser_nom(fiche["nom"]), fiche["id_ingredient"])
+
+    def fiches(self, ids, compter_hits=True):
+        """
+        Fiches des ids demandés ; les absents du cache sont chargés en une seule requête.
+        """
+        resultat, manquants = {}, []
+        for id_ in set(ids):
+            fiche = self._par_id.get(id_)
+            if fiche is None:
+                manquants.append(id_)
+            else:
+                resultat[id_] = fiche
+        if compter_hits:
+            self.hits += len(resultat)
+        self.misses += len(manquants)
+        if manquants:
+            for ingredient in Ingredient.query.filter(Ingredient.id_ingredient.in_(manquants)):
+                fiche = ingredient.to_dict()
+                self._memoriser(fiche)
+                resultat[fiche["id_ingredient"]] = fiche
+        return resultat
+
+    def fiche(self, id_):
+        return self.fiches([id_]).get(id_)
+
+    def ids_connus(self, noms):
+        """
+        Ids en cache pour les noms donnés (sans requête) ; les noms absents sont ignorés.
+        """
+        ids = {}
+        for nom in noms:
+            id_ = self._par_nom.get(normaliser_nom(nom))
+            if id_ is not None:
+                ids[nom] = id_
+        self.hits += len(ids)
+        self.misses += len(noms) - len(ids)
+        return ids
+
+    def memoriser_ids(self, ids_par_nom):
+        for nom, id_ in ids_par_nom.items():
+            self._par_nom.set(normaliser_nom(nom), id_)
+
+    def invalider(self, modifications=None):
+        if modifications is None:
+            self._par_id.invalider()
+            self._par_nom.invalider()
+            return
+        for id_, nom in modifications:
+            fiche = self._par_id.get(id_)
+            self._par_id.invalider(id_)
+            if fiche is not None:
+                self._par_nom.invalider(normaliser_nom(fiche["nom"]))
+            if nom is not None:
+                self._par_nom.invalider(normaliser_nom(nom))
+
+    def statistiques(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "taux_hits": round(self.hits / total, 4) if total else None,
+            "entrees_par_id": len(self._par_id),
+            "entrees_par_nom": len(self._par_nom),
+            "taille_max": self._par_id.taille_max,
+        }
+
+
+cache_ingredients = CacheIngredients()
+abonner_ecritures(cache_ingredients.invalider)
+
+
+def fiche_ingredient(ligne):
+    """
+    Fiche de l'ingrédient d'une ligne de recette, d'inventaire ou de liste de courses :
+    relation déjà chargée si elle l'est, sinon cache (pas de chargement paresseux ligne par ligne).
+    """
+    if "ingredient" not in inspect(ligne).unloaded:
+        return ligne.ingredient.to_dict() if ligne.ingredient else None
+    return cache_ingredients.fiche(ligne.id_ingredient)
+
+
+def precharger_fiches(lignes):
+    """
+    Avant de sérialiser une collection de lignes, charge en une requête les fiches absentes du cache.
+    """
+    ids = [ligne.id_ingredient for ligne in lignes if "ingredient" in inspect(ligne).unloaded]
+    if ids:
+        # Les hits sont comptés ligne par ligne à la sérialisation, seuls les chargements le sont ici
+        cache_ingredients.fiches(ids, compter_hits=False)
+
+
+# --- Résolution des noms d'ingrédients en ids ---
+
+def _insert_ignorant_doublons(valeurs):
+    # INSERT ... ON CONFLICT (nom) DO NOTHING RETURNING : les noms insérés entre-temps par une autre
+    # transaction ne lèvent pas d'erreur, ils sont simplement absents du RETURNING
+    dialecte = postgresql if db.session.get_bind().dialect.name == "postgresql" else sqlite
+    return dialecte.insert(Ingredient).values(valeurs) \
+        .on_conflict_do_nothing(index_elements=["nom"]) \
+        .returning(Ingredient.nom, Ingredient.id_ingredient)
+
+
+def resoudre_ingredients(noms):
+    """
+    Associe chaque nom à l'id de son ingrédient, en créant ceux qui manquent.
+    Les noms en cache ne coûtent rien ; pour les autres, un SELECT ... IN, un INSERT multi-lignes,
+    et un SELECT de rattrapage seulement si une transaction concurrente a créé un des noms entre les deux.
+    """
+    noms = list(dict.fromkeys(noms))
+    if not noms:
+        return {}
+
+    ids = cache_ingredients.ids_connus(noms)
+    inconnus = [nom for nom in noms if nom not in ids]
+    if inconnus:
+        trouves = dict(db.session.execute(
+            select(Ingredient.nom, Ingredient.id_ingredient).where(Ingredient.nom.in_(inconnus))).all())
+        cache_ingredients.memoriser_ids(trouves)
+        ids.update(trouves)
+    manquants = [nom for nom in noms if nom not in ids]
+    if manquants:
+        crees = db.session.execute(_insert_ignorant_doublons([{"nom": nom} for nom in manquants])).all()
+        ids.update(crees)
+        noter_ecritures(db.session(), [(id_, nom) for nom, id_ in crees])
+
+        concurrents = [nom for nom in manquants if nom not in ids]
+        if concurrents:
+            ids.update(db.session.execute(
+                select(Ingredient.nom, Ingredient.id_ingredient).where(Ingredient.nom.in_(concurrents))).all())
+    return ids
@@ -0,0 +1,177 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import jsonify, request
+
+logger = logging.getLogger(__name__)
+
+PERIODES = {"s": 1, "seconde": 1, "second": 1, "min": 60, "minute": 60, "h": 3600, "heure": 3600, "hour": 3600}
+
+
+def parser_limite(texte):
+    """
+    "5/minute" -> (capacité 5, débit 5/60 jeton par seconde). La période est une unité de PERIODES ou un
+    nombre de secondes ("10/30"). Vide ou "0" : pas de limite (None). Lève ValueError sinon.
+    """
+    if not texte or texte.strip() == "0":
+        return None
+    nombre, _, periode = texte.partition("/")
+    periode = periode.strip().lower()
+    try:
+        capacite = int(nombre)
+        secondes = PERIODES.get(periode) or PERIODES.get(periode.rstrip("s")) or float(periode)
+    except ValueError:
+        raise ValueError(f"Limite invalide: {texte}")
+    if capacite <= 0 or secondes <= 0:
+        raise ValueError(f"Limite invalide: {texte}")
+    return capacite, capacite / secondes
+
+
+# --- Stockage des seaux ---
+
+class StockageMemoire:
+    """
+    Seaux à jetons du worker, les moins récemment utilisés oubliés au-delà de `taille_max`
+    (un seau oublié repart plein, ce qui ne fait que relâcher la limite).
+    """
+
+    def __init__(self, taille_max=100000):
+        self.taille_max = taille_max
+        self._seaux = OrderedDict()
+        self._verrou = threading.Lock()
+
+    def consommer(self, cle, capacite, debit, maintenant=None):
+        """
+        Prend un jeton du seau `cle`. Renvoie 0 si la requête passe, sinon le nombre de secondes
+        avant qu'un jeton soit disponible.
+        """
+        maintenant = time.monotonic() if maintenant is None else maintenant
+        with self._verrou:
+            jetons, horodatage = self._seaux.pop(cle, (capacite, maintenant))
+            jetons = min(capacite, jetons + max(0.0, maintenant - horodatage) * debit)
+            attente = 0.0
+            if jetons >= 1:
+                jetons -= 1
+            else:
+                attente = (1 - jetons) / debit
+            self._seaux[cle] = (jetons, maintenant)
+            if len(self._seaux) > self.taille_max:
+                self._seaux.popitem(last=False)
+        return attente
+
+    def __len__(self):
+        return len(self._seaux)
+
+
+# Même calcul que StockageMemoire, atomique côté Redis et sur l'horloge du serveur (commune aux workers)
+SCRIPT_REDIS = """
+local capacite, debit = tonumber(ARGV[1]), tonumber(ARGV[2])
+local temps = redis.call('TIME')
+local maintenant = tonumber(temps[1]) + tonumber(temps[2]) / 1000000
+local seau = redis.call('HMGET', KEYS[1], 'jetons', 'horodatage')
+local jetons = tonumber(seau[1]) or capacite
+local horodatage = tonumber(seau[2]) or maintenant
+jetons = math.min(capacite, jetons + math.max(0, maintenant - horodatage) * debit)
+local attente = 0
+if jetons >= 1 then jetons = jetons - 1 else attente = (1 - jetons) / debit end
+redis.call('HSET', KEYS[1], 'jetons', tostring(jetons), 'horodatage', tostring(maintenant))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacite / debit * 1000))
+return tostring(attente)
+"""
+
+
+class StockageRedis:
+    """
+    Seaux partagés par tous les workers et toutes les instances (paquet redis requis).
+    """
+
+    def __init__(self, url, prefixe="limitation:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("LIMITATION_STOCKAGE_URL nécessite le paquet redis (pip install redis)")
+        self.prefixe = prefixe
+        client = redis.Redis.from_url(url, socket_timeout=0.1, socket_connect_timeout=0.1)
+        self._script = client.register_script(SCRIPT_REDIS)
+
+    def consommer(self, cle, capacite, debit, maintenant=None):
+        return float(self._script(keys=[self.prefixe + cle], args=[capacite, debit]))
+
+
+# --- Limiteur ---
+
+class Limiteur:
+    """
+    Limites par blueprint et par type de clé ({"auth": {"ip": "20/minute", "email": "5/minute"}}).
+    Si le stockage partagé est injoignable, les seaux du worker prennent le relais plutôt que de tout bloquer.
+    """
+
+    def __init__(self):
+        self.actif = True
+        self.regles = {}
+        self._local = StockageMemoire()
+        self.stockage = self._local
+
+    def configurer(self, regles, stockage_url=None, actif=True):
+        self.actif = actif
+        self.regles = {
+            blueprint: {type_cle: parser_limite(limite) for type_cle, limite in limites.items()}
+            for blueprint, limites in regles.items()
+        }
+        self._local = StockageMemoire()
+        self.stockage = StockageRedis(stockage_url) if stockage_url else self._local
+
+    def attente(self, blueprint, type_cle, valeur):
+        regle = self.regles.get(blueprint, {}).get(type_cle)
+        if not self.actif or regle is None:
+            return 0.0
+        cle = f"{blueprint}:{type_cle}:{valeur}"
+        try:
+            return self.stockage.consommer(cle, *regle)
+        except Exception as e:
+            if self.stockage is self._local:
+                raise
+            logger.warning(f"Stockage de limitation injoignable, seaux du worker utilisés : {str(e)}")
+            return self._local.consommer(cle, *regle)
+
+
+limiteur = Limiteur()
+
+
+def _cle_ip():
+    return request.remote_addr
+
+
+def _cle_email():
+    # get_json met le corps en cache : la vue le relit sans le reparser
+    data = request.get_json(silent=True)
+    email = data.get("email") if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+EXTRACTEURS = {"ip": _cle_ip, "email": _cle_email}
+
+
+def limiter(*types_cles):
+    """
+    Décorateur de vue : consomme un jeton par type de clé ("ip", "email") selon les limites du blueprint,
+    et répond 429 (avec Retry-After) avant toute lecture en base ou hachage si un seau est vide.
+    """
+    def decorateur(vue):
+        @wraps(vue)
+        def enveloppe(*args, **kwargs):
+            for type_cle in types_cles:
+                valeur = EXTRACTEURS[type_cle]()
+                if valeur is None:
+                    continue
+                attente = limiteur.attente(request.blueprint, type_cle, valeur)
+                if attente > 0:
+                    logger.warning(f"Limite {request.blueprint}/{type_cle} atteinte pour {valeur} sur {request.path}")
+                    return jsonify({"message": "Trop de tentatives, réessayez plus tard"}), 429, \
+                        {"Retry-After": str(math.ceil(attente))}
+            return vue(*args, **kwargs)
+        return enveloppe
+    return decorateur
@@ -0,0 +1,131 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+# Coût par défaut de chaque algorithme : tours bcrypt (log2), log2(N) scrypt (r=8, p=1), itérations pbkdf2
+COUTS_DEFAUT = {"bcrypt": 12, "scrypt": 15, "pbkdf2": 600000}
+ALGORITHMES = frozenset(COUTS_DEFAUT)
+# bcrypt ignore tout ce qui suit les 72 premiers octets : un mot de passe plus long est refusé à la saisie
+OCTETS_MAX = 72
+
+
+def trop_long(mot_de_passe):
+    return len(mot_de_passe.encode()) > OCTETS_MAX
+
+
+class HachageSature(RuntimeError):
+    """
+    Trop de hachages en attente dans le worker : la requête est refusée plutôt que mise en file.
+    """
+
+
+# --- Fonctions exécutées dans les processus du pool (sans dépendance à Flask ni à la base) ---
+
+def _methode(algorithme, cout):
+    # Préfixe que porte un haché produit avec ces paramètres
+    if algorithme == "bcrypt":
+        return f"$2b${cout:02d}$"
+    if algorithme == "scrypt":
+        return f"scrypt:{2 ** cout}:8:1"
+    return f"pbkdf2:sha256:{cout}"
+
+
+def _hacher(mot_de_passe, algorithme, cout):
+    if algorithme == "bcrypt":
+        if trop_long(mot_de_passe):
+            raise ValueError(f"Mot de passe de plus de {OCTETS_MAX} octets")
+        return bcrypt.hashpw(mot_de_passe.encode(), bcrypt.gensalt(cout)).decode()
+    return generate_password_hash(mot_de_passe, _methode(algorithme, cout))
+
+
+def _verifier(hache, mot_de_passe):
+    try:
+        if hache.startswith("$2"):
+            return bcrypt.checkpw(mot_de_passe.encode(), hache.encode())
+        return check_password_hash(hache, mot_de_passe)
+    except ValueError:
+        # Haché illisible (tronqué, algorithme inconnu) : refusé comme un mauvais mot de passe
+        return False
+
+
+class ServiceHachage:
+    """
+    Hachage et vérification des mots de passe sur un pool de processus borné, pour que le calcul
+    (volontairement coûteux) ne tienne ni le GIL ni le thread de la requête.
+    `processus` = 0 calcule dans le thread appelant (tests, scripts). Au-delà de `processus + file_max`
+    hachages en cours, un appel attend au plus `attente` secondes une place puis lève HachageSature.
+    """
+
+    def __init__(self, algorithme="bcrypt", cout=None, processus=0, file_max=32, attente=5.0):
+        self._verrou = threading.Lock()
+        self._pool, self._pid = None, None
+        self.processus = None
+        self.configurer(algorithme, cout, processus, file_max, attente)
+
+    def configurer(self, algorithme, cout=None, processus=0, file_max=32, attente=5.0):
+        if algorithme not in ALGORITHMES:
+            raise ValueError(f"Algorithme de hachage invalide: {algorithme}")
+        self.algorithme = algorithme
+        self.cout = COUTS_DEFAUT[algorithme] if cout is None else int(cout)
+        self.attente = attente
+        self._places = threading.BoundedSemaphore(max(processus, 1) + file_max)
+        if processus != self.processus:
+            self._arreter()
+            self.processus = processus
+
+    def _arreter(self):
+        with self._verrou:
+            pool, self._pool, self._pid = self._pool, None, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _executeur(self):
+        # Un pool par processus : créé à la première utilisation, donc après le fork des workers gunicorn.
+        # "spawn" évite de dupliquer dans les enfants les threads et connexions du worker
+        with self._verrou:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ProcessPoolExecutor(self.processus, mp_context=multiprocessing.get_context("spawn"))
+                self._pid = os.getpid()
+            return self._pool
+
+    def _executer(self, fonction, *args):
+        if not self.processus:
+            return fonction(*args)
+        places = self._places
+        if not places.acquire(timeout=self.attente):
+            raise HachageSature("Trop de hachages de mots de passe en attente")
+        try:
+            try:
+                return self._executeur().submit(fonction, *args).result()
+            except BrokenProcessPool:
+                # Un processus du pool est mort (OOM...) : pool recréé, calcul relancé une fois
+                logger.warning("Pool de hachage interrompu, recréation")
+                self._arreter()
+                return self._executeur().submit(fonction, *args).result()
+        finally:
+            places.release()
+
+    def hacher(self, mot_de_passe):
+        return self._executer(_hacher, mot_de_passe, self.algorithme, self.cout)
+
+    def verifier(self, hache, mot_de_passe):
+        return bool(hache) and self._executer(_verifier, hache, mot_de_passe)
+
+    def doit_rehacher(self, hache):
+        """
+        Vrai si le haché n'a pas été produit avec l'algorithme et le coût configurés.
+        """
+        methode = _methode(self.algorithme, self.cout)
+        if self.algorithme == "bcrypt":
+            return not hache.startswith(methode)
+        return hache.split("$", 1)[0] != methode
+
+
+service_hachage = ServiceHachage()
@@ -0,0 +1,117 @@
+import base64
+import binascii
+import json
+import logging
+from app import db
+from app.utils.cache import CacheTTL
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES_COMPTAGE = {"exact", "cached", "estimate"}
+
+# Totaux mis en cache par signature de requête (SQL compilé avec ses filtres), propre à chaque worker
+cache_totaux = CacheTTL(ttl=30, taille_max=2048)
+
+
+class PageCurseur:
+    """
+    Page obtenue par pagination par clé (keyset) : pas d'OFFSET, et le total n'est calculé que sur demande.
+    """
+
+    def __init__(self, items, next_cursor, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+
+
+def encoder_curseur(valeur):
+    brut = json.dumps({"k": valeur}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(brut).decode().rstrip("=")
+
+
+def decoder_curseur(curseur):
+    try:
+        brut = base64.urlsafe_b64decode(curseur + "=" * (-len(curseur) % 4))
+        cle = json.loads(brut)["k"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("Curseur invalide")
+    # La clé est un identifiant entier : tout autre contenu (forgé) est refusé avant d'atteindre le filtre SQL
+    if not isinstance(cle, int) or isinstance(cle, bool):
+        raise ValueError("Curseur invalide")
+    return cle
+
+
+def _sql_litteral(query):
+    return str(query.order_by(None).statement.compile(dialect=db.engine.dialect,
+                                                      compile_kwargs={"literal_binds": True}))
+
+
+# Estimation du planificateur Postgres (EXPLAIN), sans parcourir les lignes
+def _estimer_total(query):
+    if db.engine.dialect.name != "postgresql":
+        return query.order_by(None).count()
+    try:
+        compilee = query.order_by(None).statement.compile(dialect=db.engine.dialect,
+                                                          compile_kwargs={"render_postcompile": True})
+        # Connexion séparée : un EXPLAIN en échec ne doit pas invalider la transaction de la requête
+        with db.engine.connect() as connexion:
+            plan = connexion.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compilee), compilee.params).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.warning(f"Estimation du total impossible, comptage exact : {str(e)}")
+        return query.order_by(None).count()
+
+
+# Calcule le total d'une requête filtrée selon la stratégie : exact (COUNT), cached (COUNT mis en cache
+# quelques secondes par signature de filtre) ou estimate (estimation du planificateur)
+def compter(query, strategie="exact"):
+    if strategie not in STRATEGIES_COMPTAGE:
+        raise ValueError(f"Stratégie de comptage inconnue: {strategie} (exact, cached ou estimate)")
+    if strategie == "cached":
+        return cache_totaux.get_or_set(_sql_litteral(query), lambda: query.order_by(None).count())
+    if strategie == "estimate":
+        return _estimer_total(query)
+    return query.order_by(None).count()
+
+
+# Pagine par ordre croissant de `colonne_cle` (clé primaire) à partir du curseur opaque renvoyé par la page précédente
+def paginer_par_curseur(query, colonne_cle, curseur, per_page, comptage=None):
+    if per_page < 1:
+        raise ValueError("per_page doit être positif")
+    total = compter(query, comptage) if comptage else None
+    if curseur:
+        query = query.filter(colonne_cle > decoder_curseur(curseur))
+
+    # Une ligne de plus que demandé pour savoir s'il reste une page, sans COUNT
+    lignes = query.order_by(colonne_cle).limit(per_page + 1).all()
+    next_cursor = None
+    if len(lignes) > per_page:
+        lignes = lignes[:per_page]
+        next_cursor = encoder_curseur(getattr(lignes[-1], colonne_cle.key))
+    return PageCurseur(lignes, next_cursor, total)
+
+
+# Point d'entrée des routes de liste : pagination par curseur si `curseur` n'est pas None (total seulement si
+# `comptage` est fourni), sinon OFFSET classique avec un total calculé selon `comptage` (exact par défaut)
+def paginer(query, colonne_cle, page, per_page, curseur=None, comptage=None):
+    if comptage is not None and comptage not in STRATEGIES_COMPTAGE:
+        raise ValueError(f"Stratégie de comptage inconnue: {comptage} (exact, cached ou estimate)")
+    if curseur is not None:
+        return paginer_par_curseur(query, colonne_cle, curseur, per_page, comptage)
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False, count=False)
+    pagination.total = compter(query, comptage or "exact")
+    return pagination
+
+
+# Métadonnées de pagination communes aux réponses JSON, selon le mode (offset ou curseur)
+def meta_pagination(pagination, page):
+    if isinstance(pagination, PageCurseur):
+        meta = {"next_cursor": pagination.next_cursor}
+        if pagination.total is not None:
+            meta["total"] = pagination.total
+        return meta
+    return {
+        "total": pagination.total,
+        "pages": pagination.pages,
+        "current_page": page
+    }
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMesure(QueuePool):
+    """
+    QueuePool qui mesure, pour le worker, le temps passé à attendre une connexion libre
+    et le nombre d'attentes terminées par un timeout (pool et débordement épuisés).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._verrou_mesures = threading.Lock()
+        self.attentes = 0
+        self.attente_totale = 0.0
+        self.attente_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        debut = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._verrou_mesures:
+                self.timeouts += 1
+            raise
+        finally:
+            duree = time.perf_counter() - debut
+            with self._verrou_mesures:
+                self.attentes += 1
+                self.attente_totale += duree
+                self.attente_max = max(self.attente_max, duree)
+
+
+def options_moteur(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS déduites des variables DB_* de la configuration. Taille du pool, débordement,
+    timeout et statement_timeout ne s'appliquent qu'à Postgres : SQLite garde le pool choisi par son pilote.
+    """
+    options = {"pool_pre_ping": config["DB_POOL_PRE_PING"], "pool_recycle": config["DB_POOL_RECYCLE"]}
+    if not config["SQLALCHEMY_DATABASE_URI"].startswith("postgresql"):
+        return options
+    options.update(
+        poolclass=PoolMesure,
+        pool_size=config["DB_POOL_TAILLE"],
+        max_overflow=config["DB_POOL_MAX_OVERFLOW"],
+        pool_timeout=config["DB_POOL_TIMEOUT"],
+    )
+    if config["DB_STATEMENT_TIMEOUT"]:
+        # Fixé à l'ouverture de chaque connexion : une requête trop longue est annulée par le serveur
+        options["connect_args"] = {"options": f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT']}"}
+    return options
+
+
+def statistiques_pool(engine):
+    """
+    État du pool de connexions du worker : connexions sorties, disponibles, débordement et temps d'attente.
+    """
+    pool = engine.pool
+    statistiques = {"pid": os.getpid(), "pool": type(pool).__name__, "etat": pool.status()}
+    if isinstance(pool, QueuePool):
+        statistiques.update({
+            "taille": pool.size(),
+            "connexions_sorties": pool.checkedout(),
+            "connexions_disponibles": pool.checkedin(),
+            "debordement": max(pool.overflow(), 0),
+        })
+    if isinstance(pool, PoolMesure):
+        statistiques.update({
+            "attentes": pool.attentes,
+            "attente_moyenne_ms": round(pool.attente_totale / pool.attentes * 1000, 3) if pool.attentes else None,
+            "attente_max_ms": round(pool.attente_max * 1000, 3),
+            "timeouts": pool.timeouts,
+        })
+    return statistiques
@@ -0,0 +1,167 @@
+import re
+from sqlalchemy import event, text
+from app import db
+
+TYPES_RECHERCHE = ("recette", "ingredient", "course", "inventaire")
+
+
+def filtre_contient(colonne, terme):
+    """
+    Filtre « contient » insensible à la casse pour les paramètres titre/search des listes.
+    ILIKE '%terme%' est servi par les index GIN gin_trgm_ops (migration c3d4e5f6a7b8) dès que le terme
+    compte au moins 3 caractères ; les jokers saisis (% et _) sont échappés pour rester littéraux.
+    """
+    echappe = terme.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return colonne.ilike(f"%{echappe}%", escape="\\")
+
+
+def termes(requete):
+    """
+    Découpe la saisie utilisateur en mots (lettres et chiffres uniquement), ce qui neutralise
+    la syntaxe des moteurs plein texte.
+    """
+    return re.findall(r"\w+", requete.lower())
+
+
+# --- Postgres : colonnes tsvector "recherche" (configuration french + unaccent) indexées en GIN,
+# générées par la migration b7c1d2e3f4a5, ou par create_all (même définition) ---
+
+def _vecteur(colonne, poids):
+    return f"setweight(to_tsvector('french', f_unaccent(coalesce({colonne}, ''))), '{poids}')"
+
+
+VECTEURS_POSTGRES = {
+    "recettes": f"{_vecteur('titre', 'A')} || {_vecteur('description', 'B')}",
+    "ingredients": _vecteur("nom", "A"),
+    "liste_courses": _vecteur("nom", "A"),
+    "inventaires": _vecteur("nom", "A"),
+}
+
+
+def _creer_index_postgres(connexion, tables):
+    connexion.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() n'est pas IMMUTABLE : enveloppe nécessaire pour une colonne générée / un index
+    connexion.exec_driver_sql("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent', $1) $$
+    """)
+    for table in tables:
+        connexion.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS recherche tsvector "
+                                  f"GENERATED ALWAYS AS ({VECTEURS_POSTGRES[table]}) STORED")
+        connexion.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_{table}_recherche ON {table} USING gin (recherche)")
+
+
+SQL_POSTGRES = {
+    "recette": """
+        SELECT 'recette' AS type, r.id_recette AS id, r.titre AS nom, r.description AS description,
+               ts_rank(r.recherche, q.requete) AS rang
+        FROM recettes r, q
+        WHERE r.recherche @@ q.requete AND (r.publique OR r.id_utilisateur = :id_utilisateur)
+    """,
+    "ingredient": """
+        SELECT 'ingredient', i.id_ingredient, i.nom, NULL, ts_rank(i.recherche, q.requete)
+        FROM ingredients i, q
+        WHERE i.recherche @@ q.requete
+    """,
+    "course": """
+        SELECT 'course', l.id_liste, l.nom, NULL, ts_rank(l.recherche, q.requete)
+        FROM liste_courses l, q
+        WHERE l.recherche @@ q.requete AND l.id_utilisateur = :id_utilisateur
+    """,
+    "inventaire": """
+        SELECT 'inventaire', v.id_inventaire, v.nom, NULL, ts_rank(v.recherche, q.requete)
+        FROM inventaires v, q
+        WHERE v.recherche @@ q.requete AND v.id_utilisateur = :id_utilisateur
+    """,
+}
+
+
+def _rechercher_postgres(mots, types, id_utilisateur, limit, offset):
+    # Préfixe sur chaque mot (recherche pendant la saisie), tous les mots requis
+    tsquery = " & ".join(f"{mot}:*" for mot in mots)
+    sql = "WITH q AS (SELECT to_tsquery('french', f_unaccent(:tsquery)) AS requete) " \
+          + " UNION ALL ".join(SQL_POSTGRES[t] for t in types) \
+          + " ORDER BY rang DESC, type, id LIMIT :limit OFFSET :offset"
+    return db.session.execute(text(sql), {
+        "tsquery": tsquery, "id_utilisateur": id_utilisateur, "limit": limit, "offset": offset
+    }).all()
+
+
+# --- SQLite (tests) : table virtuelle FTS5 maintenue par triggers ---
+
+# Table source, clé, puis expressions (sur la ligne NEW) des colonnes nom, description, publique, id_utilisateur
+SOURCES_SQLITE = {
+    "recette": ("recettes", "id_recette", "NEW.titre", "NEW.description", "NEW.publique", "NEW.id_utilisateur"),
+    "ingredient": ("ingredients", "id_ingredient", "NEW.nom", "NULL", "1", "NULL"),
+    "course": ("liste_courses", "id_liste", "NEW.nom", "NULL", "0", "NEW.id_utilisateur"),
+    "inventaire": ("inventaires", "id_inventaire", "NEW.nom", "NULL", "0", "NEW.id_utilisateur"),
+}
+
+
+def _creer_index_sqlite(connexion):
+    connexion.exec_driver_sql("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS recherche_fts USING fts5(
+            type UNINDEXED, id UNINDEXED, nom, description, publique UNINDEXED, id_utilisateur UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+    for type_, (table, cle, nom, description, publique, id_utilisateur) in SOURCES_SQLITE.items():
+        suppression = f"DELETE FROM recherche_fts WHERE type = '{type_}' AND id = OLD.{cle};"
+        insertion = f"INSERT INTO recherche_fts (type, id, nom, description, publique, id_utilisateur) " \
+                    f"VALUES ('{type_}', NEW.{cle}, {nom}, {description}, {publique}, {id_utilisateur});"
+        connexion.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN {insertion} END")
+        connexion.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE ON {table} BEGIN {suppression} {insertion} END")
+        connexion.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN {suppression} END")
+
+
+@event.listens_for(db.metadata, "after_create")
+def _apres_create_all(metadata, connexion, tables=(), **kwargs):
+    if connexion.dialect.name == "sqlite":
+        _creer_index_sqlite(connexion)
+    elif connexion.dialect.name == "postgresql":
+        # Seules les tables que create_all vient de créer : les autres relèvent des migrations
+        _creer_index_postgres(connexion, [t.name for t in tables if t.name in VECTEURS_POSTGRES])
+
+
+@event.listens_for(db.metadata, "before_drop")
+def _avant_drop_all(metadata, connexion, **kwargs):
+    if connexion.dialect.name == "sqlite":
+        connexion.exec_driver_sql("DROP TABLE IF EXISTS recherche_fts")
+
+
+def _rechercher_sqlite(mots, types, id_utilisateur, limit, offset):
+    requete_fts = " ".join(f'"{mot}"*' for mot in mots)
+    marqueurs = ", ".join(f":type_{i}" for i in range(len(types)))
+    sql = f"""
+        SELECT type, id, nom, description, -bm25(recherche_fts, 0, 0, 4.0, 1.0, 0, 0) AS rang
+        FROM recherche_fts
+        WHERE recherche_fts MATCH :requete AND type IN ({marqueurs})
+          AND (publique = 1 OR id_utilisateur = :id_utilisateur)
+        ORDER BY rang DESC, type, id
+        LIMIT :limit OFFSET :offset
+    """
+    parametres = {"requete": requete_fts, "id_utilisateur": id_utilisateur, "limit": limit, "offset": offset}
+    parametres.update({f"type_{i}": t for i, t in enumerate(types)})
+    return db.session.execute(text(sql), parametres).all()
+
+
+def rechercher(requete, types=TYPES_RECHERCHE, id_utilisateur=None, limit=20, offset=0):
+    """
+    Recherche classée par pertinence dans les recettes (publiques ou de l'utilisateur), les ingrédients,
+    et les listes de courses et inventaires de l'utilisateur.
+    """
+    mots = termes(requete)
+    if not mots or not types:
+        return []
+    if db.engine.dialect.name == "postgresql":
+        lignes = _rechercher_postgres(mots, types, id_utilisateur, limit, offset)
+    else:
+        lignes = _rechercher_sqlite(mots, types, id_utilisateur, limit, offset)
+    return [
+        {"type": type_, "id": id_, "nom": nom, "description": description, "score": round(float(rang), 6)}
+        for type_, id_, nom, description, rang in lignes
+    ]
@@ -0,0 +1,230 @@
+import functools
+import itertools
+import logging
+import threading
+import time
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from flask_sqlalchemy.session import Session
+from jwt import PyJWTError
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.pool import QueuePool
+from app.utils.cache import CacheTTL
+from app.utils.pool import options_moteur
+
+logger = logging.getLogger(__name__)
+
+SELECTIONS = ("round_robin", "least_connections")
+
+
+class Repliques:
+    """
+    Moteurs des réplicas en lecture du worker. Une réplique dont la connexion échoue est écartée
+    pendant `exclusion` secondes ; sans réplique disponible, les lectures restent sur la base principale.
+    """
+
+    def __init__(self, urls, config, selection="round_robin", exclusion=30):
+        if selection not in SELECTIONS:
+            raise ValueError(f"Sélection de réplique inconnue: {selection} ({', '.join(SELECTIONS)})")
+        self.moteurs = []
+        for url in urls:
+            self.ajouter(create_engine(url, **options_moteur({**config, "SQLALCHEMY_DATABASE_URI": url})))
+        self.selection = selection
+        self.exclusion = exclusion
+        self._hors_service = {}
+        self._tour = itertools.count()
+        self._verrou = threading.Lock()
+
+    def ajouter(self, moteur):
+        event.listen(moteur, "handle_error", _noter_erreur_replique)
+        self.moteurs.append(moteur)
+
+    def disponibles(self):
+        maintenant = time.monotonic()
+        with self._verrou:
+            return [moteur for i, moteur in enumerate(self.moteurs) if self._hors_service.get(i, 0) <= maintenant]
+
+    def choisir(self):
+        moteurs = self.disponibles()
+        if not moteurs:
+            return None
+        if self.selection == "least_connections":
+            return min(moteurs, key=lambda m: m.pool.checkedout() if isinstance(m.pool, QueuePool) else 0)
+        return moteurs[next(self._tour) % len(moteurs)]
+
+    def ecarter(self, moteur):
+        with self._verrou:
+            self._hors_service[self.moteurs.index(moteur)] = time.monotonic() + self.exclusion
+
+    def connecter(self):
+        """
+        Connexion ouverte sur une réplique disponible (pre_ping vérifie qu'elle répond), ou None.
+        """
+        for _ in range(len(self.moteurs)):
+            moteur = self.choisir()
+            if moteur is None:
+                return None
+            try:
+                return moteur.connect()
+            except exc.DBAPIError as e:
+                logger.warning(f"Réplique {moteur.url.render_as_string()} écartée {self.exclusion} s : {str(e)}")
+                self.ecarter(moteur)
+        return None
+
+
+def _noter_erreur_replique(contexte):
+    # Requête en échec sur une réplique (annulée par un conflit de restauration, connexion coupée...) :
+    # les vues interceptent l'exception pour répondre 500, lecture_seule la rejoue donc sur la principale
+    if has_app_context():
+        g.erreur_replique = contexte.original_exception
+
+
+class DernieresEcritures:
+    """
+    Identités (JWT) ayant validé une écriture depuis moins de `fenetre` secondes : en mémoire du worker,
+    ou partagées par tous les workers via Redis (`url`, paquet redis requis).
+    """
+
+    def __init__(self, fenetre, url=None):
+        self.fenetre = fenetre
+        self._memoire = CacheTTL(ttl=fenetre, taille_max=100000)
+        self._redis = None
+        if url:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("REPLICA_STOCKAGE_URL nécessite le paquet redis (pip install redis)")
+            self._redis = redis.Redis.from_url(url, socket_timeout=0.1, socket_connect_timeout=0.1)
+
+    def noter(self, identite):
+        self._memoire.set(identite, True)
+        if self._redis is not None:
+            try:
+                self._redis.set(f"ecriture:{identite}", 1, ex=self.fenetre)
+            except Exception as e:
+                logger.warning(f"Stockage des écritures injoignable : {str(e)}")
+
+    def recente(self, identite):
+        if self._memoire.get(identite):
+            return True
+        if self._redis is None:
+            return False
+        try:
+            return bool(self._redis.exists(f"ecriture:{identite}"))
+        except Exception as e:
+            # Dans le doute, lecture sur la principale
+            logger.warning(f"Stockage des écritures injoignable : {str(e)}")
+            return True
+
+
+def init_repliques(app):
+    urls = app.config["DATABASE_REPLICA_URLS"]
+    if urls:
+        app.extensions["repliques"] = Repliques(urls, app.config, app.config["REPLICA_SELECTION"],
+                                                app.config["REPLICA_EXCLUSION"])
+        app.extensions["dernieres_ecritures"] = DernieresEcritures(app.config["REPLICA_LECTURE_ECRITURES"],
+                                                                   app.config["REPLICA_STOCKAGE_URL"])
+
+
+def _identite():
+    # Identité du token de la requête (vérifié au besoin, sans erreur si absent ou invalide), sinon None
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        pass
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except (JWTExtendedException, PyJWTError):
+        return None
+
+
+class SessionRoutee(Session):
+    """
+    Session Flask-SQLAlchemy qui envoie les requêtes des routes @lecture_seule sur la connexion
+    de réplique ouverte pour la requête HTTP ; tout le reste va sur la base principale.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            connexion = g.get("connexion_replique")
+            if connexion is not None:
+                return connexion
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def lecture_seule(vue):
+    """
+    Décorateur de route sans écriture : ses requêtes sont servies par une réplique, sauf si aucune
+    n'est configurée ou joignable, ou si l'utilisateur du token a écrit depuis moins de
+    REPLICA_LECTURE_ECRITURES secondes (il relit alors ses propres écritures sur la base principale).
+    Une requête en échec sur la réplique est rejouée une fois sur la principale.
+    """
+    @functools.wraps(vue)
+    def enveloppe(*args, **kwargs):
+        repliques = current_app.extensions.get("repliques")
+        if repliques is None:
+            return vue(*args, **kwargs)
+        identite = _identite()
+        if identite is not None and current_app.extensions["dernieres_ecritures"].recente(identite):
+            return vue(*args, **kwargs)
+
+        connexion = repliques.connecter()
+        if connexion is None:
+            return vue(*args, **kwargs)
+        db = current_app.extensions["sqlalchemy"]
+        db.session.remove()
+        # Un échec de connexion sur une autre réplique, déjà écartée, ne compte pas
+        g.pop("erreur_replique", None)
+        g.connexion_replique = connexion
+        try:
+            reponse = vue(*args, **kwargs)
+        except exc.DBAPIError:
+            reponse = None
+        finally:
+            # La session liée à la connexion de réplique est fermée avant la connexion elle-même
+            db.session.remove()
+            g.pop("connexion_replique", None)
+            connexion.close()
+        erreur = g.pop("erreur_replique", None)
+        if erreur is None:
+            return reponse
+        logger.warning(f"Lecture en échec sur {connexion.engine.url.render_as_string()}, "
+                       f"rejouée sur la principale : {str(erreur)}")
+        if isinstance(erreur, exc.DBAPIError) and erreur.connection_invalidated:
+            repliques.ecarter(connexion.engine)
+        return vue(*args, **kwargs)
+    return enveloppe
+
+
+# --- Lecture de ses propres écritures : un commit pendant une requête qui écrit date l'identité du token ---
+# Requête qui écrit : méthode autre que GET/HEAD, ou unité de travail ORM vidée en base (GET qui génère une
+# liste de courses par exemple). Les INSERT/UPDATE Core passent par des routes POST/PUT/PATCH/DELETE.
+
+METHODES_SURES = ("GET", "HEAD", "OPTIONS")
+
+
+@event.listens_for(Session, "after_flush")
+def _noter_flush(session, contexte):
+    session.info["ecriture"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _dater_ecriture(session):
+    ecriture = session.info.pop("ecriture", False)
+    if not has_request_context() or "repliques" not in current_app.extensions:
+        return
+    if ecriture or request.method not in METHODES_SURES:
+        try:
+            identite = get_jwt_identity()
+        except RuntimeError:
+            # Route sans token vérifié (inscription...) : pas d'identité à dater
+            return
+        if identite is not None:
+            current_app.extensions["dernieres_ecritures"].noter(identite)
+
+
+@event.listens_for(Session, "after_rollback")
+def _oublier_ecriture(session):
+    session.info.pop("ecriture", None)
@@ -0,0 +1,101 @@
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.inventaire_ingredient import InventaireIngredient
+from app.utils.ingredients import cache_ingredients
+from app.utils.unites import unite_canonique
+
+OPERATIONS_STOCK = ("add", "set", "decrement")
+UNITE_PAR_DEFAUT = "g"
+
+
+def _valider(operations):
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("Une liste non vide d'opérations est requise")
+    valides = []
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS_STOCK:
+            raise ValueError(f"Opération invalide: {operation} (op parmi {', '.join(OPERATIONS_STOCK)})")
+        if "id_ingredient" not in operation or "quantite" not in operation:
+            raise ValueError("Chaque opération doit avoir id_ingredient et quantite")
+        quantite = float(operation["quantite"])
+        if quantite < 0:
+            raise ValueError("La quantité doit être positive ou zéro")
+        prix = operation.get("prix_unitaire")
+        valides.append({
+            "op": operation["op"],
+            "id_ingredient": int(operation["id_ingredient"]),
+            "quantite": quantite,
+            "unite": unite_canonique(operation["unite"]) if operation.get("unite") is not None else None,
+            "prix_unitaire": float(prix) if prix is not None else None,
+        })
+    return valides
+
+
+def _upsert(lignes):
+    # INSERT ... ON CONFLICT (id_inventaire, id_ingredient, unite) DO UPDATE : quantités finales calculées
+    # par appliquer_operations ; le prix existant est conservé quand l'opération n'en donne pas
+    dialecte = postgresql if db.session.get_bind().dialect.name == "postgresql" else sqlite
+    instruction = dialecte.insert(InventaireIngredient).values(lignes)
+    return instruction.on_conflict_do_update(
+        index_elements=["id_inventaire", "id_ingredient", "unite"],
+        set_={
+            "quantite_disponible": instruction.excluded.quantite_disponible,
+            "prix_unitaire": func.coalesce(instruction.excluded.prix_unitaire, InventaireIngredient.prix_unitaire),
+        }
+    ).returning(
+        InventaireIngredient.id_inventaire_ingredient, InventaireIngredient.id_ingredient,
+        InventaireIngredient.quantite_disponible, InventaireIngredient.unite, InventaireIngredient.prix_unitaire
+    )
+
+
+def appliquer_operations(id_inventaire, operations):
+    """
+    Applique dans la transaction en cours une liste d'opérations de stock {op, id_ingredient, quantite,
+    unite?, prix_unitaire?}, dans l'ordre : add ajoute, set remplace, decrement retire (sans descendre sous 0).
+    Une opération vise la ligne de l'ingrédient dans son unité ; sans unité, celle de la première ligne
+    existante de l'ingrédient, sinon le gramme. Une lecture (lignes verrouillées) et un seul upsert.
+    Renvoie les lignes de stock touchées ; lève ValueError si une opération ou un ingrédient est invalide.
+    """
+    operations = _valider(operations)
+    ids_ingredients = {operation["id_ingredient"] for operation in operations}
+    fiches = cache_ingredients.fiches(ids_ingredients)
+    inconnus = sorted(ids_ingredients - set(fiches))
+    if inconnus:
+        raise ValueError(f"Ingrédient(s) introuvable(s): {inconnus}")
+
+    stock, unites = {}, {}
+    for ligne in db.session.query(
+            InventaireIngredient.id_ingredient, InventaireIngredient.unite, InventaireIngredient.quantite_disponible
+    ).filter(
+        InventaireIngredient.id_inventaire == id_inventaire, InventaireIngredient.id_ingredient.in_(ids_ingredients)
+    ).order_by(InventaireIngredient.id_inventaire_ingredient).with_for_update():
+        stock[(ligne.id_ingredient, ligne.unite)] = ligne.quantite_disponible
+        unites.setdefault(ligne.id_ingredient, ligne.unite)
+
+    finales = {}
+    for operation in operations:
+        cle = (operation["id_ingredient"], operation["unite"] or unites.get(operation["id_ingredient"],
+                                                                           UNITE_PAR_DEFAUT))
+        courante, prix = finales.get(cle, (stock.get(cle, 0.0), None))
+        if operation["op"] == "add":
+            courante += operation["quantite"]
+        elif operation["op"] == "set":
+            courante = operation["quantite"]
+        else:
+            courante = max(courante - operation["quantite"], 0.0)
+        finales[cle] = (courante, operation["prix_unitaire"] if operation["prix_unitaire"] is not None else prix)
+
+    resultat = db.session.execute(_upsert([
+        {"id_inventaire": id_inventaire, "id_ingredient": id_ingredient, "unite": unite,
+         "quantite_disponible": quantite, "prix_unitaire": prix}
+        for (id_ingredient, unite), (quantite, prix) in finales.items()
+    ]))
+    return sorted(({
+        "id_inventaire_ingredient": ligne.id_inventaire_ingredient,
+        "id_ingredient": ligne.id_ingredient,
+        "nom_ingredient": fiches[ligne.id_ingredient]["nom"],
+        "quantite_disponible": ligne.quantite_disponible,
+        "unite": ligne.unite,
+        "prix_unitaire": ligne.prix_unitaire,
+    } for ligne in resultat), key=lambda ligne: ligne["id_inventaire_ingredient"])
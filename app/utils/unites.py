@@ -0,0 +1,131 @@
+import unicodedata
+
+MASSE, VOLUME, COMPTE = "masse", "volume", "compte"
+
+# Registre des unités canoniques : dimension et facteur vers l'unité de base de la dimension
+UNITES = {
+    "g": (MASSE, 1.0),
+    "kg": (MASSE, 1000.0),
+    "mL": (VOLUME, 1.0),
+    "cl": (VOLUME, 10.0),
+    "L": (VOLUME, 1000.0),
+    "unités": (COMPTE, 1.0),
+}
+UNITE_BASE = {MASSE: "g", VOLUME: "mL", COMPTE: "unités"}
+UNITES_VALIDES = frozenset(UNITES)
+
+
+def _cle_alias(unite):
+    sans_accents = unicodedata.normalize("NFKD", unite)
+    return "".join(c for c in sans_accents if not unicodedata.combining(c)).strip().lower()
+
+
+# Graphies acceptées en entrée (casse et accents ignorés) -> unité canonique
+ALIAS = {_cle_alias(unite): unite for unite in UNITES}
+ALIAS.update({"unite": "unités", "u": "unités", "l": "L", "ml": "mL", "cl": "cl"})
+
+# Facteurs précalculés pour chaque couple d'unités de même dimension
+FACTEURS = {
+    (source, cible): facteur_source / facteur_cible
+    for source, (dimension_source, facteur_source) in UNITES.items()
+    for cible, (dimension_cible, facteur_cible) in UNITES.items()
+    if dimension_source == dimension_cible
+}
+
+
+def lignes_facteurs():
+    """
+    (graphie en minuscules, dimension, facteur vers la base) pour chaque graphie connue : table de facteurs
+    utilisée par les calculs faits en SQL, où l'unité stockée est comparée avec lower().
+    """
+    graphies = dict(ALIAS)
+    graphies.update({unite.lower(): unite for unite in UNITES})
+    return sorted((graphie, *UNITES[unite]) for graphie, unite in graphies.items())
+
+
+def unite_canonique(unite):
+    """
+    Unité canonique du registre pour une graphie saisie ("ML", "unites", "Kg"...). Lève ValueError sinon.
+    """
+    canonique = ALIAS.get(_cle_alias(unite)) if isinstance(unite, str) else None
+    if canonique is None:
+        raise ValueError(f"Unité invalide: {unite}")
+    return canonique
+
+
+def unite_connue(unite):
+    return isinstance(unite, str) and _cle_alias(unite) in ALIAS
+
+
+def dimension(unite):
+    return UNITES[unite_canonique(unite)][0]
+
+
+def facteur(source, cible, densite=None):
+    """
+    Facteur multiplicatif de `source` vers `cible`. Entre masse et volume, la densité de l'ingrédient
+    (en g/mL) est nécessaire ; sans elle, ValueError.
+    """
+    source, cible = unite_canonique(source), unite_canonique(cible)
+    direct = FACTEURS.get((source, cible))
+    if direct is not None:
+        return direct
+    (dim_source, f_source), (dim_cible, f_cible) = UNITES[source], UNITES[cible]
+    if {dim_source, dim_cible} == {MASSE, VOLUME}:
+        if not densite:
+            raise ValueError(f"Conversion {source} -> {cible} impossible sans densité")
+        # masse (g) = volume (mL) x densité
+        return f_source * (densite if dim_source == VOLUME else 1 / densite) / f_cible
+    raise ValueError(f"Conversion {source} -> {cible} impossible ({dim_source} / {dim_cible})")
+
+
+def convertir(quantite, source, cible="g", densite=None):
+    return quantite * facteur(source, cible, densite)
+
+
+def convertir_lot(quantites, sources, cibles, densites=None, strict=True):
+    """
+    Convertit des tableaux parallèles de quantités en une passe : un facteur est calculé une seule fois par
+    combinaison distincte (source, cible, densité), puis appliqué à tout le tableau.
+    Avec strict=False, les conversions impossibles donnent None au lieu de lever ValueError.
+    """
+    densites = densites if densites is not None else [None] * len(quantites)
+    facteurs = {}
+    for combinaison in set(zip(sources, cibles, densites)):
+        try:
+            facteurs[combinaison] = facteur(*combinaison)
+        except ValueError:
+            if strict:
+                raise
+            facteurs[combinaison] = None
+    resultats = []
+    for quantite, combinaison in zip(quantites, zip(sources, cibles, densites)):
+        f = facteurs[combinaison]
+        resultats.append(None if f is None else quantite * f)
+    return resultats
+
+
+def unite_pivot(unite, densite=None):
+    """
+    Unité dans laquelle additionner une quantité : la masse sert de pivot dès que la densité est connue,
+    sinon l'unité de base de sa dimension.
+    """
+    dim = dimension(unite)
+    return UNITE_BASE[MASSE] if dim == VOLUME and densite else UNITE_BASE[dim]
+
+
+def sommer(lignes):
+    """
+    Additionne des lignes (cle, quantite, unite, densite) par clé, en une conversion groupée.
+    Renvoie {(cle, unite_pivot): total} ; un ingrédient compté en volume sans densité et le même en masse
+    restent sur deux entrées plutôt que d'être additionnés à tort.
+    """
+    lignes = list(lignes)
+    if not lignes:
+        return {}
+    cles, quantites, unites, densites = zip(*lignes)
+    pivots = [unite_pivot(unite, densite) for unite, densite in zip(unites, densites)]
+    totaux = {}
+    for cle, pivot, quantite in zip(cles, pivots, convertir_lot(quantites, unites, pivots, densites)):
+        totaux[(cle, pivot)] = totaux.get((cle, pivot), 0.0) + quantite
+    return totaux
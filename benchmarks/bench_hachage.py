@@ -0,0 +1,70 @@
+"""
+Benchmark du hachage des mots de passe : connexions/s (une vérification par connexion) selon l'algorithme,
+le coût et le nombre de processus du pool de hachage (app/utils/mots_de_passe.py).
+
+Pour chaque configuration, soumet des vérifications depuis 4 threads par processus (autant de requêtes
+concurrentes d'un worker) et affiche le débit total, le débit par cœur et la latence médiane d'une vérification.
+
+Usage :
+    python benchmarks/bench_hachage.py [duree_par_mesure_s] [algorithme:cout ...]
+    python benchmarks/bench_hachage.py 5 bcrypt:10 bcrypt:12 scrypt:15 pbkdf2:600000
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Le paquet app lit sa configuration à l'import ; des valeurs factices suffisent, aucune base n'est utilisée
+for variable, valeur in (("SECRET_KEY", "bench"), ("JWT_SECRET_KEY", "bench"), ("DATABASE_URL", "sqlite://")):
+    os.environ.setdefault(variable, valeur)
+
+from app.utils.mots_de_passe import ServiceHachage  # noqa: E402
+
+CONFIGURATIONS = ["bcrypt:10", "bcrypt:12", "scrypt:15", "pbkdf2:600000"]
+MOT_DE_PASSE = "TestPass2025"
+
+
+def mesurer(service, hache, duree):
+    latences, verrou, fin = [], threading.Lock(), time.perf_counter() + duree
+
+    def connecter():
+        while time.perf_counter() < fin:
+            debut = time.perf_counter()
+            assert service.verifier(hache, MOT_DE_PASSE)
+            with verrou:
+                latences.append(time.perf_counter() - debut)
+
+    fils = [threading.Thread(target=connecter) for _ in range(4 * max(service.processus, 1))]
+    debut = time.perf_counter()
+    for fil in fils:
+        fil.start()
+    for fil in fils:
+        fil.join()
+    return len(latences) / (time.perf_counter() - debut), statistics.median(latences) * 1000
+
+
+def main():
+    duree = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    configurations = sys.argv[2:] or CONFIGURATIONS
+    coeurs = os.cpu_count() or 1
+    processus = sorted({0, 1, coeurs // 2 or 1, coeurs})
+
+    print(f"{coeurs} cœurs, {duree:.0f} s par mesure (processus 0 = dans le thread appelant)\n")
+    print(f"{'configuration':<16} {'processus':>9} {'connexions/s':>13} {'par cœur':>9} {'latence (ms)':>13}")
+    for configuration in configurations:
+        algorithme, cout = configuration.split(":")
+        for nombre in processus:
+            service = ServiceHachage(algorithme, int(cout), processus=nombre, file_max=4 * coeurs, attente=60)
+            try:
+                hache = service.hacher(MOT_DE_PASSE)
+                service.verifier(hache, MOT_DE_PASSE)  # démarrage des processus hors mesure
+                debit, latence = mesurer(service, hache, duree)
+            finally:
+                service._arreter()
+            print(f"{configuration:<16} {nombre:>9} {debit:>13.1f} {debit / max(nombre, 1):>9.1f} {latence:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
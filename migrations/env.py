@@ -94,6 +94,16 @@ def run_migrations_online():
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
 
+    # Les colonnes tsvector "recherche" sont générées en base (migration b7c1d2e3f4a5) et absentes des modèles :
+    # l'autogénération ne doit pas proposer de les supprimer
+    def include_object(object, name, type_, reflected, compare_to):
+        if type_ == "column" and name == "recherche" and reflected and compare_to is None:
+            return False
+        return True
+
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
+
     connectable = get_engine()
 
     with connectable.connect() as connection:
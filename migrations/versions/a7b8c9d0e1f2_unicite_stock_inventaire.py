@@ -0,0 +1,44 @@
+"""Unicité des lignes de stock par (inventaire, ingrédient, unité) pour les upserts
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2025-04-14 11:26:09.518374
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7b8c9d0e1f2'
+down_revision = 'f6a7b8c9d0e1'
+branch_labels = None
+depends_on = None
+
+
+PREMIERES_LIGNES = """
+    SELECT MIN(id_inventaire_ingredient) FROM inventaire_ingredients
+    GROUP BY id_inventaire, id_ingredient, unite
+"""
+
+
+def upgrade():
+    # Doublons existants (même unité) fusionnés dans la plus ancienne ligne avant de poser la contrainte
+    op.execute(f"""
+        UPDATE inventaire_ingredients SET quantite_disponible = (
+            SELECT SUM(d.quantite_disponible) FROM inventaire_ingredients d
+            WHERE d.id_inventaire = inventaire_ingredients.id_inventaire
+              AND d.id_ingredient = inventaire_ingredients.id_ingredient
+              AND d.unite = inventaire_ingredients.unite
+        )
+        WHERE id_inventaire_ingredient IN ({PREMIERES_LIGNES} HAVING COUNT(*) > 1)
+    """)
+    op.execute(f"DELETE FROM inventaire_ingredients WHERE id_inventaire_ingredient NOT IN ({PREMIERES_LIGNES})")
+    with op.batch_alter_table('inventaire_ingredients', schema=None) as batch_op:
+        batch_op.create_index('uq_inventaire_ingredients_ingredient_unite',
+                              ['id_inventaire', 'id_ingredient', 'unite'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('inventaire_ingredients', schema=None) as batch_op:
+        batch_op.drop_index('uq_inventaire_ingredients_ingredient_unite')
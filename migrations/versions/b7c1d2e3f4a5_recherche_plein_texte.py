@@ -0,0 +1,56 @@
+"""Recherche plein texte : colonnes tsvector (french, unaccent) et index GIN
+
+Revision ID: b7c1d2e3f4a5
+Revises: 719034612fd3
+Create Date: 2025-04-02 10:12:41.508213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c1d2e3f4a5'
+down_revision = '719034612fd3'
+branch_labels = None
+depends_on = None
+
+
+def _vecteur(colonne, poids):
+    return f"setweight(to_tsvector('french', f_unaccent(coalesce({colonne}, ''))), '{poids}')"
+
+
+# Colonne "recherche" générée (STORED) par table : maintenue par Postgres à chaque écriture
+VECTEURS = {
+    'recettes': f"{_vecteur('titre', 'A')} || {_vecteur('description', 'B')}",
+    'ingredients': _vecteur('nom', 'A'),
+    'liste_courses': _vecteur('nom', 'A'),
+    'inventaires': _vecteur('nom', 'A'),
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() n'est pas IMMUTABLE : enveloppe nécessaire pour une colonne générée / un index
+    op.execute("""
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent', $1) $$
+    """)
+
+    for table, vecteur in VECTEURS.items():
+        op.execute(f"ALTER TABLE {table} ADD COLUMN recherche tsvector GENERATED ALWAYS AS ({vecteur}) STORED")
+        op.create_index(f'ix_{table}_recherche', table, ['recherche'], postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table in VECTEURS:
+        op.drop_index(f'ix_{table}_recherche', table_name=table)
+        op.drop_column(table, 'recherche')
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
@@ -0,0 +1,44 @@
+"""Index des clés étrangères et des filtres des routes de liste
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2025-04-15 16:38:44.902137
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8c9d0e1f2a3'
+down_revision = 'a7b8c9d0e1f2'
+branch_labels = None
+depends_on = None
+
+
+# inventaire_ingredients.id_inventaire est déjà servi par uq_inventaire_ingredients_ingredient_unite
+# (première colonne), liste_courses.id_utilisateur par ix_liste_courses_id_utilisateur_id_liste
+INDEX = {
+    'ix_recettes_id_utilisateur_id_recette': ('recettes', ['id_utilisateur', 'id_recette']),
+    'ix_recette_ingredients_id_recette': ('recette_ingredients', ['id_recette']),
+    'ix_etapes_id_recette_ordre': ('etapes', ['id_recette', 'ordre']),
+    'ix_recette_utilisateur_id_utilisateur_id_recette': ('recette_utilisateur', ['id_utilisateur', 'id_recette']),
+    'ix_inventaires_id_utilisateur': ('inventaires', ['id_utilisateur']),
+    'ix_liste_courses_id_utilisateur_id_liste': ('liste_courses', ['id_utilisateur', 'id_liste']),
+    'ix_liste_courses_id_inventaire': ('liste_courses', ['id_inventaire']),
+    'ix_liste_courses_items_id_liste': ('liste_courses_items', ['id_liste']),
+}
+
+
+def upgrade():
+    for nom_index, (table, colonnes) in INDEX.items():
+        op.create_index(nom_index, table, colonnes)
+    # Index partiel des recettes publiques (/recettes/public, suggestions) : ne grossit qu'avec elles
+    op.create_index('ix_recettes_publiques', 'recettes', ['id_recette'],
+                    postgresql_where=sa.text('publique'), sqlite_where=sa.text('publique = 1'))
+
+
+def downgrade():
+    op.drop_index('ix_recettes_publiques', table_name='recettes')
+    for nom_index, (table, _) in INDEX.items():
+        op.drop_index(nom_index, table_name=table)
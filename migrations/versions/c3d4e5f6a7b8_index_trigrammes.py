@@ -0,0 +1,42 @@
+"""Index trigrammes (pg_trgm) pour les filtres titre/search en ILIKE '%...%'
+
+Revision ID: c3d4e5f6a7b8
+Revises: b7c1d2e3f4a5
+Create Date: 2025-04-03 09:47:05.112890
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d4e5f6a7b8'
+down_revision = 'b7c1d2e3f4a5'
+branch_labels = None
+depends_on = None
+
+
+INDEX_TRIGRAMMES = {
+    'ix_recettes_titre_trgm': ('recettes', 'titre'),
+    'ix_ingredients_nom_trgm': ('ingredients', 'nom'),
+    'ix_liste_courses_nom_trgm': ('liste_courses', 'nom'),
+    'ix_inventaires_nom_trgm': ('inventaires', 'nom'),
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for nom_index, (table, colonne) in INDEX_TRIGRAMMES.items():
+        op.create_index(nom_index, table, [colonne], postgresql_using='gin',
+                        postgresql_ops={colonne: 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for nom_index, (table, _) in INDEX_TRIGRAMMES.items():
+        op.drop_index(nom_index, table_name=table)
@@ -0,0 +1,26 @@
+"""Ajout de la colonne densite (g/mL) à ingredients
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2025-04-08 10:12:31.402719
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e5f6a7b8c9'
+down_revision = 'c3d4e5f6a7b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ingredients', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('densite', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('ingredients', schema=None) as batch_op:
+        batch_op.drop_column('densite')
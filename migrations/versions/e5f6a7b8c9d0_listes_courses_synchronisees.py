@@ -0,0 +1,27 @@
+"""Listes de courses synchronisées avec leur inventaire
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2025-04-10 09:41:17.226304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f6a7b8c9d0'
+down_revision = 'd4e5f6a7b8c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Les listes existantes restent des instantanés : seules les nouvelles générations sont suivies
+    with op.batch_alter_table('liste_courses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('synchronisee', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    with op.batch_alter_table('liste_courses', schema=None) as batch_op:
+        batch_op.drop_column('synchronisee')
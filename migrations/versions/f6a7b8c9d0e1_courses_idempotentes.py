@@ -0,0 +1,35 @@
+"""Génération idempotente des listes de courses : empreinte du contenu et clé Idempotency-Key
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2025-04-11 14:05:52.780913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6a7b8c9d0e1'
+down_revision = 'e5f6a7b8c9d0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('liste_courses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('empreinte', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('cle_idempotence', sa.String(length=100), nullable=True))
+        # Colonnes NULL distinctes : seules les listes générées (empreinte) ou créées avec une clé sont contraintes
+        batch_op.create_index('uq_liste_courses_empreinte',
+                              ['id_utilisateur', 'id_recette', 'id_inventaire', 'empreinte'], unique=True)
+        batch_op.create_index('uq_liste_courses_cle_idempotence',
+                              ['id_utilisateur', 'cle_idempotence'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('liste_courses', schema=None) as batch_op:
+        batch_op.drop_index('uq_liste_courses_cle_idempotence')
+        batch_op.drop_index('uq_liste_courses_empreinte')
+        batch_op.drop_column('cle_idempotence')
+        batch_op.drop_column('empreinte')
@@ -0,0 +1,75 @@
+import os
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.utilisateur import Utilisateur
+from app.models.ingredient import Ingredient
+from app.utils.autocompletion import index_ingredients
+
+
+class TestAutocompletion(unittest.TestCase):
+    def setUp(self):
+        """
+        Crée un utilisateur et quelques ingrédients ; l'index du worker est vidé entre deux tests.
+        """
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        self.client = self.app.test_client()
+        index_ingredients.reinitialiser()
+
+        with self.app.app_context():
+            db.create_all()
+            utilisateur = Utilisateur(email="autocompletion@example.com", nom="Test")
+            utilisateur.set_password("TestPass2025")
+            db.session.add(utilisateur)
+            db.session.add_all([Ingredient(nom=nom) for nom in
+                                ["Crème fraîche", "Cresson", "Écrevisses", "Tomate", "Tomates cerises"]])
+            db.session.commit()
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(utilisateur.id_utilisateur))}"}
+
+    def tearDown(self):
+        index_ingredients.reinitialiser()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _noms(self, params):
+        response = self.client.get(f"/ingredients/autocomplete?{params}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return [i["nom"] for i in response.get_json()["ingredients"]]
+
+    def test_prefixe_insensible_casse_et_accents(self):
+        self.assertEqual(self._noms("q=CRE"), ["Crème fraîche", "Cresson"])
+        self.assertEqual(self._noms("q=ecr"), ["Écrevisses"])
+        self.assertEqual(self._noms("q=fraich"), ["Crème fraîche"])
+        self.assertEqual(self._noms("q=tomate&limit=1"), ["Tomate"])
+        self.assertEqual(self._noms("q="), [])
+
+    def test_index_suit_les_ecritures(self):
+        self.assertEqual(self._noms("q=tom"), ["Tomate", "Tomates cerises"])
+
+        response = self.client.post("/ingredients", json={"nom": "Tomme de Savoie"}, headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self._noms("q=tom"), ["Tomate", "Tomates cerises", "Tomme de Savoie"])
+
+        id_tomate = response.get_json()["ingredient"]["id_ingredient"]
+        self.client.put(f"/ingredients/{id_tomate}", json={"nom": "Reblochon"}, headers=self.headers)
+        self.assertEqual(self._noms("q=tomm"), [])
+        self.assertEqual(self._noms("q=rebl"), ["Reblochon"])
+
+        self.client.delete(f"/ingredients/{id_tomate}", headers=self.headers)
+        self.assertEqual(self._noms("q=rebl"), [])
+
+    def test_transaction_annulee_ignoree(self):
+        self._noms("q=a")
+        with self.app.app_context():
+            db.session.add(Ingredient(nom="Abricot"))
+            db.session.flush()
+            db.session.rollback()
+        self.assertEqual(self._noms("q=abr"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import unittest
+from unittest import mock
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.utilisateur import Utilisateur
+from app.models.ingredient import Ingredient
+from app.models.inventaire import Inventaire
+from app.models.inventaire_ingredient import InventaireIngredient
+from app.utils.ingredients import _ecoute, cache_ingredients, resoudre_ingredients
+from tests.test_chargement_recettes import CompteurRequetes
+
+
+class TestCacheIngredients(unittest.TestCase):
+    def setUp(self):
+        """
+        Crée un utilisateur et un inventaire de trois ingrédients ; le cache du worker est vidé entre deux tests.
+        """
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        self.client = self.app.test_client()
+        cache_ingredients.invalider()
+        cache_ingredients.hits = cache_ingredients.misses = 0
+
+        with self.app.app_context():
+            db.create_all()
+            utilisateur = Utilisateur(email="cache_ingredients@example.com", nom="Test")
+            utilisateur.set_password("TestPass2025")
+            db.session.add(utilisateur)
+            ingredients = [Ingredient(nom=nom, prix_unitaire=1.5) for nom in ["Farine", "Sucre", "Beurre"]]
+            db.session.add_all(ingredients)
+            db.session.flush()
+            inventaire = Inventaire(nom="Placard", id_utilisateur=utilisateur.id_utilisateur)
+            db.session.add(inventaire)
+            db.session.flush()
+            db.session.add_all([InventaireIngredient(id_inventaire=inventaire.id_inventaire,
+                                                     id_ingredient=i.id_ingredient,
+                                                     quantite_disponible=500, unite="g") for i in ingredients])
+            db.session.commit()
+            self.id_inventaire = inventaire.id_inventaire
+            self.id_farine = ingredients[0].id_ingredient
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(utilisateur.id_utilisateur))}"}
+
+    def tearDown(self):
+        cache_ingredients.invalider()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _inventaire(self):
+        with self.app.app_context():
+            with CompteurRequetes(db.engine) as compteur:
+                response = self.client.get(f"/inventaires/{self.id_inventaire}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        noms = [i["nom_ingredient"] for i in response.get_json()["inventaire"]["ingredients"]]
+        return compteur.total, noms
+
+    def test_serialisation_servie_par_le_cache(self):
+        froid, noms = self._inventaire()
+        chaud, noms_chaud = self._inventaire()
+        self.assertEqual(noms, noms_chaud)
+        self.assertEqual(sorted(noms), ["Beurre", "Farine", "Sucre"])
+        self.assertEqual(froid - chaud, 1)  # une seule requête IN pour les trois fiches manquantes
+
+        stats = self.client.get("/ingredients/cache", headers=self.headers).get_json()
+        self.assertEqual(stats["misses"], 3)
+        self.assertEqual(stats["hits"], 6)
+        self.assertEqual(stats["entrees_par_id"], 3)
+
+    def test_ecriture_invalide_le_cache(self):
+        self._inventaire()
+        response = self.client.put(f"/ingredients/{self.id_farine}", json={"nom": "Farine T65"},
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        _, noms = self._inventaire()
+        self.assertIn("Farine T65", noms)
+        self.assertNotIn("Farine", noms)
+
+    def test_resolution_des_noms_en_cache(self):
+        with self.app.app_context():
+            resoudre_ingredients(["Farine", "Sucre"])
+            with CompteurRequetes(db.engine) as compteur:
+                ids = resoudre_ingredients(["Farine", "Sucre"])
+        self.assertEqual(compteur.total, 0)
+        self.assertEqual(ids["Farine"], self.id_farine)
+
+    def test_propagation_par_defaut(self):
+        # Active par défaut (les autres workers n'invalident leur cache que par NOTIFY) ; sans effet hors Postgres
+        if "INGREDIENTS_NOTIFY" not in os.environ:
+            self.assertTrue(self.app.config["INGREDIENTS_NOTIFY"])
+        self.client.get("/ingredients/cache", headers=self.headers)
+        if not self.app.config["SQLALCHEMY_DATABASE_URI"].startswith("postgresql"):
+            self.assertFalse(_ecoute["actif"])
+
+    def test_ecoute_active_et_base_sqlite(self):
+        # Écoute démarrée par une application Postgres du même processus : une application SQLite écrit sans pg_notify
+        app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+        with app.app_context():
+            db.create_all()
+        with mock.patch.dict(_ecoute, {"actif": True}):
+            response = app.test_client().post("/ingredients", json={"nom": "Sel"}, headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+
+
+if __name__ == "__main__":
+    unittest.main()
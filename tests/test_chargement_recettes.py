@@ -0,0 +1,221 @@
+import os
+import unittest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import create_app, db
+from app.models.utilisateur import Utilisateur
+from app.models.recette import Recette
+from app.models.ingredient import Ingredient
+from app.models.recette_ingredient import RecetteIngredient
+from app.models.etape import Etape
+from app.models.recette_utilisateur import RecetteUtilisateur
+from app.utils.pagination import decoder_curseur, encoder_curseur
+
+
+class CompteurRequetes:
+    """
+    Compte les instructions SQL envoyées au moteur pendant un bloc with.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.requetes = []
+
+    def _enregistrer(self, conn, cursor, statement, parameters, context, executemany):
+        self.requetes.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._enregistrer)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._enregistrer)
+
+    @property
+    def total(self):
+        return len(self.requetes)
+
+
+class TestChargementRecettes(unittest.TestCase):
+    def setUp(self):
+        """
+        Crée une base de test avec deux utilisateurs et des recettes complètes
+        (ingrédients et étapes), pour mesurer le nombre de requêtes par page.
+        """
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            auteur = Utilisateur(email="auteur_chargement@example.com", nom="Auteur")
+            auteur.set_password("TestPass2025")
+            lecteur = Utilisateur(email="lecteur_chargement@example.com", nom="Lecteur")
+            lecteur.set_password("TestPass2025")
+            db.session.add_all([auteur, lecteur])
+            db.session.flush()
+
+            ingredients = [Ingredient(nom=f"Ingrédient {i}") for i in range(5)]
+            db.session.add_all(ingredients)
+            db.session.flush()
+
+            for i in range(30):
+                recette = Recette(titre=f"Recette {i}", id_utilisateur=auteur.id_utilisateur, publique=True)
+                db.session.add(recette)
+                db.session.flush()
+                for ingredient in ingredients:
+                    db.session.add(RecetteIngredient(id_recette=recette.id_recette,
+                                                     id_ingredient=ingredient.id_ingredient,
+                                                     quantite=100, unite="g"))
+                for ordre in range(1, 4):
+                    db.session.add(Etape(id_recette=recette.id_recette, ordre=ordre, instruction=f"Étape {ordre}"))
+                db.session.add(RecetteUtilisateur(id_recette=recette.id_recette,
+                                                  id_utilisateur=lecteur.id_utilisateur))
+            db.session.commit()
+
+            self.token_auteur = create_access_token(identity=str(auteur.id_utilisateur))
+            self.token_lecteur = create_access_token(identity=str(lecteur.id_utilisateur))
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _compter(self, url, token=None, methode="get", json=None, statut=200):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        with self.app.app_context():
+            with CompteurRequetes(db.engine) as compteur:
+                response = getattr(self.client, methode)(url, headers=headers, json=json)
+        self.assertEqual(response.status_code, statut)
+        return compteur.total, response.get_json()
+
+    def _verifier_constant(self, url, token=None):
+        """
+        Le nombre de requêtes doit être le même pour une page de 2 et une page de 20 recettes.
+        """
+        petit, data_petit = self._compter(f"{url}?per_page=2", token)
+        grand, data_grand = self._compter(f"{url}?per_page=20", token)
+        self.assertEqual(len(data_grand["recettes"]), 20)
+        self.assertEqual(len(data_grand["recettes"][0]["ingredients"]), 5)
+        self.assertEqual(len(data_grand["recettes"][0]["etapes"]), 3)
+        self.assertEqual(petit, grand, f"{url} : {petit} requêtes pour 2 recettes, {grand} pour 20")
+        return grand
+
+    def test_lister_recettes_publiques(self):
+        self.assertLessEqual(self._verifier_constant("/recettes/public"), 5)
+
+    def test_lister_recettes_utilisateur(self):
+        self.assertLessEqual(self._verifier_constant("/recettes/", self.token_auteur), 5)
+
+    def test_lister_recettes_publiques_utilisateur(self):
+        self.assertLessEqual(self._verifier_constant("/recettes/publiques", self.token_auteur), 5)
+
+    def test_lister_recettes_enregistrees(self):
+        self.assertLessEqual(self._verifier_constant("/recettes/enregistrées", self.token_lecteur), 5)
+
+    def test_vue_resume_sans_etapes_ni_ingredients(self):
+        total, data = self._compter("/recettes/public?view=summary&per_page=20")
+        self.assertEqual(total, 2)  # COUNT + SELECT des colonnes projetées
+        recette = data["recettes"][0]
+        self.assertEqual(recette["createur"], "Auteur")
+        self.assertNotIn("etapes", recette)
+        self.assertNotIn("ingredients", recette)
+
+    def test_pagination_par_curseur(self):
+        ids, curseur, pages = [], "", 0
+        while curseur is not None:
+            total, data = self._compter(f"/recettes/public?view=summary&per_page=7&cursor={curseur}")
+            self.assertEqual(total, 1)  # ni OFFSET ni COUNT
+            self.assertNotIn("total", data)
+            ids += [recette["id_recette"] for recette in data["recettes"]]
+            curseur = data["next_cursor"]
+            pages += 1
+        self.assertEqual(pages, 5)
+        self.assertEqual(len(ids), 30)
+        self.assertEqual(ids, sorted(set(ids)))
+
+    def test_curseur_invalide(self):
+        for valeur in ("abc", [1, 2], {"a": 1}, None, True, 1.5):
+            with self.subTest(valeur=valeur):
+                with self.assertRaises(ValueError):
+                    decoder_curseur(encoder_curseur(valeur))
+                response = self.client.get(f"/recettes/public?cursor={encoder_curseur(valeur)}")
+                self.assertEqual(response.status_code, 400)
+        for curseur in ("!!!", "bm9uLWpzb24", "e30"):
+            with self.assertRaises(ValueError):
+                decoder_curseur(curseur)
+        self.assertEqual(decoder_curseur(encoder_curseur(42)), 42)
+
+    def test_vue_resume_champs_choisis(self):
+        _, data = self._compter("/recettes/public?fields=titre&per_page=1")
+        self.assertEqual(set(data["recettes"][0]), {"id_recette", "titre"})
+
+    @staticmethod
+    def _contenu(nb, prefixe):
+        # Moitié d'ingrédients déjà connus, moitié à créer
+        return {
+            "ingredients": [{"nom": f"Ingrédient {i}" if i < nb // 2 else f"{prefixe} {i}", "quantite": i + 1,
+                             "unite": "g"} for i in range(nb)],
+            "etapes": [{"instruction": f"Étape {i}"} for i in range(nb)],
+        }
+
+    def test_creation_nombre_requetes_constant(self):
+        petit, _ = self._compter("/recettes", self.token_auteur, "post",
+                                 {"titre": "Petite", **self._contenu(2, "Nouveau A")}, 201)
+        grand, data = self._compter("/recettes", self.token_auteur, "post",
+                                    {"titre": "Grande", **self._contenu(24, "Nouveau B")}, 201)
+        self.assertEqual(petit, grand)
+        recette = data["recette"]
+        self.assertEqual(len(recette["ingredients"]), 24)
+        self.assertEqual([e["ordre"] for e in recette["etapes"]], list(range(1, 25)))
+        with self.app.app_context():
+            # 5 du jeu de départ, « Nouveau A 1 », puis « Ingrédient 5 » à « 11 » et « Nouveau B 12 » à « 23 »
+            self.assertEqual(Ingredient.query.count(), 5 + 1 + 7 + 12)
+
+    def test_modification_nombre_requetes_constant(self):
+        _, data = self._compter("/recettes", self.token_auteur, "post",
+                                {"titre": "A modifier", **self._contenu(4, "Ancien")}, 201)
+        url = f"/recettes/{data['recette']['id_recette']}"
+        petit, _ = self._compter(url, self.token_auteur, "put", {"titre": "V2", **self._contenu(2, "Neuf A")})
+        grand, data = self._compter(url, self.token_auteur, "put", {"titre": "V3", **self._contenu(20, "Neuf B")})
+        self.assertEqual(petit, grand)
+        noms = {ri["nom"]: ri["quantite"] for ri in data["recette"]["ingredients"]}
+        self.assertEqual(len(noms), 20)
+        self.assertEqual(noms["Ingrédient 0"], 1)
+        self.assertEqual(noms["Neuf B 19"], 20)
+        self.assertEqual(len(data["recette"]["etapes"]), 20)
+
+        _, data = self._compter(url, self.token_auteur, "put", {"titre": "V4", **self._contenu(2, "Neuf C")})
+        self.assertEqual(len(data["recette"]["ingredients"]), 2)
+        self.assertEqual(len(data["recette"]["etapes"]), 2)
+
+    def test_ingredient_en_doublon_refuse_sans_ecriture(self):
+        contenu = {"titre": "Doublon", "ingredients": [{"nom": "Sel", "quantite": 1, "unite": "g"}] * 2}
+        self._compter("/recettes", self.token_auteur, "post", contenu, 400)
+        with self.app.app_context():
+            self.assertIsNone(Ingredient.query.filter_by(nom="Sel").first())
+
+    def test_contenu_mal_type_refuse(self):
+        sel = {"nom": "Sel", "quantite": 1, "unite": "g"}
+        for contenu, message in (
+                ({"ingredients": [{**sel, "nom": 5}]}, "Le nom d'un ingrédient doit être une chaîne non vide"),
+                ({"ingredients": [{**sel, "quantite": None}]}, "La quantité de Sel doit être un nombre"),
+                ({"ingredients": [{**sel, "quantite": "1"}]}, "La quantité de Sel doit être un nombre"),
+                ({"ingredients": ["Sel"]}, "Chaque ingrédient doit être un objet"),
+                ({"ingredients": "Sel"}, "Les ingrédients doivent être une liste"),
+                ({"etapes": ["instruction"]}, "Chaque étape doit avoir une instruction"),
+                ({"etapes": [{"instruction": 3}]}, "L'instruction d'une étape doit être une chaîne de caractères"),
+                ({"etapes": [{"instruction": "Cuire", "ordre": "1"}]}, "L'ordre d'une étape doit être un entier")):
+            with self.subTest(contenu=contenu):
+                response = self.client.post("/recettes", json={"titre": "Mal typée", **contenu},
+                                            headers={"Authorization": f"Bearer {self.token_auteur}"})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.get_json(), {"message": message})
+        with self.app.app_context():
+            self.assertIsNone(Recette.query.filter_by(titre="Mal typée").first())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,316 @@
+import os
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.utilisateur import Utilisateur
+from app.models.ingredient import Ingredient
+from app.models.inventaire import Inventaire
+from app.models.inventaire_ingredient import InventaireIngredient
+from app.models.liste_courses import ListeCourses
+from app.models.liste_courses_item import ListeCoursesItem
+from app.models.recette import Recette
+from app.models.recette_ingredient import RecetteIngredient
+from app.models.recette_utilisateur import RecetteUtilisateur
+from tests.test_chargement_recettes import CompteurRequetes
+
+
+class TestGenerationCourses(unittest.TestCase):
+    def setUp(self):
+        """
+        Crée une petite (3 ingrédients) et une grande recette (50 ingrédients), et un inventaire qui couvre
+        la moitié de chaque ingrédient.
+        """
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            utilisateur = Utilisateur(email="courses@example.com", nom="Test")
+            utilisateur.set_password("TestPass2025")
+            ingredients = [Ingredient(nom=f"Ingrédient {i}") for i in range(50)]
+            db.session.add_all([utilisateur] + ingredients)
+            db.session.flush()
+            petite = Recette(titre="Petite", id_utilisateur=utilisateur.id_utilisateur)
+            grande = Recette(titre="Grande", id_utilisateur=utilisateur.id_utilisateur)
+            inventaire = Inventaire(nom="Cellier", id_utilisateur=utilisateur.id_utilisateur)
+            db.session.add_all([petite, grande, inventaire])
+            db.session.flush()
+            for recette, nb in ((petite, 3), (grande, 50)):
+                db.session.add_all([RecetteIngredient(id_recette=recette.id_recette,
+                                                      id_ingredient=ingredients[i].id_ingredient,
+                                                      quantite=1, unite="kg") for i in range(nb)])
+            # Stock réparti sur deux lignes pour le premier ingrédient : 300 g + 0,2 kg
+            db.session.add_all([InventaireIngredient(id_inventaire=inventaire.id_inventaire,
+                                                     id_ingredient=ingredient.id_ingredient,
+                                                     quantite_disponible=500, unite="g", prix_unitaire=2.0)
+                                for ingredient in ingredients[1:]])
+            db.session.add_all([
+                InventaireIngredient(id_inventaire=inventaire.id_inventaire, id_ingredient=ingredients[0].id_ingredient,
+                                     quantite_disponible=300, unite="g"),
+                InventaireIngredient(id_inventaire=inventaire.id_inventaire, id_ingredient=ingredients[0].id_ingredient,
+                                     quantite_disponible=0.2, unite="kg"),
+            ])
+            db.session.commit()
+            self.ids = (petite.id_recette, grande.id_recette, inventaire.id_inventaire)
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(utilisateur.id_utilisateur))}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _generer(self, id_recette):
+        with self.app.app_context():
+            with CompteurRequetes(db.engine) as compteur:
+                response = self.client.get(f"/inventaires/{self.ids[2]}/courses?id_recette={id_recette}",
+                                           headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        return compteur.total, response.get_json()
+
+    def test_quantites_manquantes(self):
+        _, data = self._generer(self.ids[0])
+        self.assertEqual([(i["nom"], round(i["quantite"], 6), i["unite"]) for i in data["items"]],
+                         [("Ingrédient 0", 0.5, "kg"), ("Ingrédient 1", 0.5, "kg"), ("Ingrédient 2", 0.5, "kg")])
+        self.assertAlmostEqual(data["total_cout"], 2.0)
+        with self.app.app_context():
+            self.assertEqual(ListeCoursesItem.query.filter_by(id_liste=data["id_liste"]).count(), 3)
+
+    def test_nombre_requetes_constant(self):
+        petit, _ = self._generer(self.ids[0])
+        grand, data = self._generer(self.ids[1])
+        self.assertEqual(len(data["items"]), 50)
+        self.assertEqual(petit, grand)
+
+    def test_generation_idempotente(self):
+        _, premiere = self._generer(self.ids[0])
+        _, seconde = self._generer(self.ids[0])
+        self.assertEqual(seconde, premiere)
+        with self.app.app_context():
+            self.assertEqual(ListeCourses.query.count(), 1)
+            self.assertEqual(ListeCoursesItem.query.count(), 3)
+
+    def test_idempotency_key(self):
+        def creer(cle, nom):
+            return self.client.post("/courses", json={"nom": nom}, headers={**self.headers, "Idempotency-Key": cle})
+
+        premiere, rejouee, autre = creer("achat-1", "Courses"), creer("achat-1", "Courses bis"), creer("achat-2", "B")
+        self.assertEqual([r.status_code for r in (premiere, rejouee, autre)], [201, 201, 201])
+        self.assertEqual(rejouee.get_json()["liste"]["id_liste"], premiere.get_json()["liste"]["id_liste"])
+        self.assertEqual(rejouee.headers.get("Idempotent-Replayed"), "true")
+        self.assertNotEqual(autre.get_json()["liste"]["id_liste"], premiere.get_json()["liste"]["id_liste"])
+        self.assertEqual(creer("x" * 101, "Trop longue").status_code, 400)
+
+    def test_resynchronisation_sur_changement_de_stock(self):
+        _, data = self._generer(self.ids[0])
+        id_liste, id_inventaire = data["id_liste"], self.ids[2]
+        with self.app.app_context():
+            ingredient = ListeCoursesItem.query.filter_by(id_liste=id_liste).order_by(ListeCoursesItem.id_item)[1]
+            id_ingredient, intacts = ingredient.id_ingredient, {
+                item.id_item: item.quantite for item in ListeCoursesItem.query.filter(
+                    ListeCoursesItem.id_liste == id_liste, ListeCoursesItem.id_ingredient != ingredient.id_ingredient)}
+            id_ligne = InventaireIngredient.query.filter_by(
+                id_inventaire=id_inventaire, id_ingredient=id_ingredient).one().id_inventaire_ingredient
+
+        def article():
+            with self.app.app_context():
+                items = ListeCoursesItem.query.filter_by(id_liste=id_liste).all()
+                self.assertEqual({i.id_item: i.quantite for i in items if i.id_ingredient != id_ingredient}, intacts)
+                return [(round(i.quantite, 6), i.unite) for i in items if i.id_ingredient == id_ingredient]
+
+        url = f"/inventaires/{id_inventaire}/ingredients"
+        self.client.put(f"{url}/{id_ligne}", json={"quantite_disponible": 800, "unite": "g"}, headers=self.headers)
+        self.assertEqual(article(), [(0.2, "kg")])
+        self.client.put(f"{url}/{id_ligne}", json={"quantite_disponible": 1, "unite": "kg"}, headers=self.headers)
+        self.assertEqual(article(), [])
+        self.client.delete(f"{url}/{id_ligne}", headers=self.headers)
+        self.assertEqual(article(), [(1, "kg")])
+        self.client.post(url, json={"id_ingredient": id_ingredient, "quantite_disponible": 250, "unite": "g"},
+                         headers=self.headers)
+        self.assertEqual(article(), [(0.75, "kg")])
+        with self.app.app_context():
+            self.assertEqual(ListeCourses.query.count(), 1)
+
+    def test_deduplication_apres_resynchronisation(self):
+        _, data = self._generer(self.ids[0])
+        id_liste, id_inventaire = data["id_liste"], self.ids[2]
+        with self.app.app_context():
+            id_ingredient = RecetteIngredient.query.filter_by(id_recette=self.ids[0]) \
+                .order_by(RecetteIngredient.id_recette_ingredient)[1].id_ingredient
+            id_ligne = InventaireIngredient.query.filter_by(
+                id_inventaire=id_inventaire, id_ingredient=id_ingredient).one().id_inventaire_ingredient
+            # Seconde liste synchronisée de la même recette, plus récente, dont l'article est resté à 0,3 kg
+            liste = db.session.get(ListeCourses, id_liste)
+            doublon = ListeCourses(nom="Doublon", id_utilisateur=liste.id_utilisateur, id_recette=self.ids[0],
+                                   id_inventaire=id_inventaire, synchronisee=True)
+            db.session.add(doublon)
+            db.session.flush()
+            db.session.add_all([ListeCoursesItem(id_liste=doublon.id_liste, id_ingredient=item.id_ingredient,
+                                                 unite=item.unite,
+                                                 quantite=0.3 if item.id_ingredient == id_ingredient else item.quantite)
+                                for item in liste.items])
+            db.session.commit()
+            id_doublon = doublon.id_liste
+
+        # Le stock change : les deux listes convergent vers le même contenu, la plus ancienne garde l'empreinte
+        self.client.put(f"/inventaires/{id_inventaire}/ingredients/{id_ligne}",
+                        json={"quantite_disponible": 800, "unite": "g"}, headers=self.headers)
+        with self.app.app_context():
+            listes = {l.id_liste: l.empreinte for l in ListeCourses.query}
+        self.assertIsNotNone(listes[id_liste])
+        self.assertIsNone(listes[id_doublon])
+
+        # La même génération retrouve la liste resynchronisée au lieu d'en créer une nouvelle
+        _, seconde = self._generer(self.ids[0])
+        self.assertEqual(seconde["id_liste"], id_liste)
+        with self.app.app_context():
+            self.assertEqual(ListeCourses.query.count(), 2)
+
+    def test_liste_non_synchronisee_inchangee(self):
+        with self.app.app_context():
+            id_ingredient = RecetteIngredient.query.filter_by(id_recette=self.ids[0]).first().id_ingredient
+        response = self.client.post("/courses", json={
+            "nom": "Manuelle", "id_recette": self.ids[0],
+            "items": [{"id_ingredient": id_ingredient, "quantite": 3, "unite": "kg"}]}, headers=self.headers)
+        id_liste = response.get_json()["liste"]["id_liste"]
+        self.client.post(f"/inventaires/{self.ids[2]}/ingredients",
+                         json={"id_ingredient": id_ingredient, "quantite_disponible": 5, "unite": "kg"},
+                         headers=self.headers)
+        with self.app.app_context():
+            self.assertEqual([(i.quantite, i.unite) for i in ListeCoursesItem.query.filter_by(id_liste=id_liste)],
+                             [(3, "kg")])
+
+
+class TestPlanCourses(unittest.TestCase):
+    def setUp(self):
+        """
+        Menu de deux recettes (dont une enregistrée depuis un autre compte) et deux inventaires :
+        la farine est comptée en g et en kg, le lait en L et en mL, avec une densité.
+        """
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            utilisateur = Utilisateur(email="plan@example.com", nom="Test")
+            autre = Utilisateur(email="autre@example.com", nom="Autre")
+            for compte in (utilisateur, autre):
+                compte.set_password("TestPass2025")
+            farine = Ingredient(nom="Farine", prix_unitaire=0.01)
+            lait = Ingredient(nom="Lait", prix_unitaire=0.002, densite=1.03)
+            db.session.add_all([utilisateur, autre, farine, lait])
+            db.session.flush()
+            crepes = Recette(titre="Crêpes", id_utilisateur=utilisateur.id_utilisateur)
+            gateau = Recette(titre="Gâteau", id_utilisateur=autre.id_utilisateur)
+            privee = Recette(titre="Privée", id_utilisateur=autre.id_utilisateur)
+            placard = Inventaire(nom="Placard", id_utilisateur=utilisateur.id_utilisateur)
+            frigo = Inventaire(nom="Frigo", id_utilisateur=utilisateur.id_utilisateur)
+            voisin = Inventaire(nom="Voisin", id_utilisateur=autre.id_utilisateur)
+            db.session.add_all([crepes, gateau, privee, placard, frigo, voisin])
+            db.session.flush()
+            db.session.add_all([
+                RecetteUtilisateur(id_recette=gateau.id_recette, id_utilisateur=utilisateur.id_utilisateur),
+                RecetteIngredient(id_recette=crepes.id_recette, id_ingredient=farine.id_ingredient,
+                                  quantite=250, unite="g"),
+                RecetteIngredient(id_recette=crepes.id_recette, id_ingredient=lait.id_ingredient,
+                                  quantite=0.5, unite="L"),
+                RecetteIngredient(id_recette=gateau.id_recette, id_ingredient=farine.id_ingredient,
+                                  quantite=0.2, unite="kg"),
+                InventaireIngredient(id_inventaire=placard.id_inventaire, id_ingredient=farine.id_ingredient,
+                                     quantite_disponible=100, unite="g", prix_unitaire=0.005),
+                InventaireIngredient(id_inventaire=frigo.id_inventaire, id_ingredient=lait.id_ingredient,
+                                     quantite_disponible=200, unite="mL"),
+            ])
+            db.session.commit()
+            self.recettes = (crepes.id_recette, gateau.id_recette, privee.id_recette)
+            self.inventaires = (placard.id_inventaire, frigo.id_inventaire, voisin.id_inventaire)
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(utilisateur.id_utilisateur))}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _planifier(self, **donnees):
+        return self.client.post("/courses/plan", json=donnees, headers=self.headers)
+
+    def test_agregation_menu(self):
+        crepes, gateau, _ = self.recettes
+        response = self._planifier(
+            recettes=[{"id_recette": crepes, "portions": 1.5}, {"id_recette": gateau},
+                      {"id_recette": crepes, "portions": 0.5}],
+            inventaires=list(self.inventaires[:2]))
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        # Farine : 2 x 250 g + 200 g - 100 g ; lait : (2 x 500 mL - 200 mL) x 1,03 g/mL
+        self.assertEqual([(i["nom"], round(i["quantite"], 6), i["unite"]) for i in data["items"]],
+                         [("Farine", 600, "g"), ("Lait", 824, "g")])
+        # Prix de l'inventaire pour la farine, de l'ingrédient pour le lait (aucun prix en stock)
+        self.assertEqual([i["prix_unitaire"] for i in data["items"]], [0.005, 0.002])
+        self.assertAlmostEqual(data["total_cout"], 600 * 0.005 + 824 * 0.002, places=2)
+
+    def test_prix_dans_l_unite_du_stock(self):
+        # Même stock de farine, prix renseigné au kg : ramené au g avant le calcul du coût
+        with self.app.app_context():
+            ligne = InventaireIngredient.query.filter_by(id_inventaire=self.inventaires[0]).one()
+            ligne.quantite_disponible, ligne.unite, ligne.prix_unitaire = 0.1, "kg", 5
+            db.session.commit()
+        response = self._planifier(recettes=[{"id_recette": self.recettes[0]}], inventaires=[self.inventaires[0]])
+        farine = response.get_json()["items"][0]
+        self.assertEqual((farine["nom"], farine["quantite"], farine["unite"]), ("Farine", 150, "g"))
+        self.assertAlmostEqual(farine["prix_unitaire"], 0.005)
+        self.assertAlmostEqual(farine["cout"], 0.75)
+
+    def test_courses_generale(self):
+        # Recettes de l'utilisateur (les crêpes seulement), stock de tous ses inventaires
+        response = self.client.get("/courses/generale", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual([(i["nom"], i["quantite_manquante"], i["prix_unitaire"]) for i in data["liste_courses"]],
+                         [("Farine", "150g", 0.005), ("Lait", "309g", 0.002)])
+        self.assertEqual(data["total_cout"], 1.37)
+
+    def test_enregistrement(self):
+        response = self._planifier(recettes=[{"id_recette": self.recettes[0], "portions": 2}],
+                                   inventaires=[self.inventaires[0]], enregistrer=True, nom="Semaine 12")
+        self.assertEqual(response.status_code, 201)
+        data = response.get_json()
+        with self.app.app_context():
+            liste = db.session.get(ListeCourses, data["id_liste"])
+            self.assertEqual(liste.nom, "Semaine 12")
+            self.assertEqual(liste.id_recette, self.recettes[0])
+            self.assertEqual(sorted((item.quantite, item.unite) for item in liste.items), [(400, "g"), (1030, "g")])
+
+    def test_acces_refuse(self):
+        self.assertEqual(self._planifier(recettes=[{"id_recette": self.recettes[2]}]).status_code, 403)
+        self.assertEqual(self._planifier(recettes=[{"id_recette": self.recettes[0]}],
+                                         inventaires=[self.inventaires[2]]).status_code, 403)
+        self.assertEqual(self._planifier(recettes=[{"id_recette": 9999}]).status_code, 404)
+
+    def test_donnees_invalides(self):
+        self.assertEqual(self._planifier(recettes=[]).status_code, 400)
+        self.assertEqual(self._planifier(recettes=[{"id_recette": self.recettes[0], "portions": 0}]).status_code, 400)
+        self.assertEqual(self._planifier(recettes=[{"id_recette": "abc"}]).status_code, 400)
+
+    def test_nombre_requetes_independant_du_menu(self):
+        def compter(recettes):
+            with self.app.app_context():
+                with CompteurRequetes(db.engine) as compteur:
+                    response = self._planifier(recettes=recettes, inventaires=list(self.inventaires[:2]))
+            self.assertEqual(response.status_code, 200)
+            return compteur.total
+
+        # Fiches ingrédients mises en cache par un premier appel ; le gâteau (recette enregistrée) est présent
+        # dans les deux menus comparés pour que la vérification des droits coûte la même requête
+        compter([{"id_recette": id_recette} for id_recette in self.recettes[:2]])
+        self.assertEqual(compter([{"id_recette": self.recettes[1]}]),
+                         compter([{"id_recette": id_recette} for id_recette in self.recettes[:2]]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import unittest
+from datetime import timedelta
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.recette import Recette
+from app.models.recette_utilisateur import RecetteUtilisateur
+from app.models.utilisateur import Utilisateur
+from app.routes.recettes import invalider_pool_suggestions
+
+
+class TestEnregistrements(unittest.TestCase):
+    def setUp(self):
+        """
+        Quatre recettes publiques d'un auteur, dont deux enregistrées par un lecteur.
+        """
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            auteur = Utilisateur(email="auteur_enregistrements@example.com", nom="Auteur")
+            lecteur = Utilisateur(email="lecteur_enregistrements@example.com", nom="Lecteur")
+            for compte in (auteur, lecteur):
+                compte.set_password("TestPass2025")
+            db.session.add_all([auteur, lecteur])
+            db.session.flush()
+            recettes = [Recette(titre=f"Recette {i}", id_utilisateur=auteur.id_utilisateur, publique=True)
+                        for i in range(4)]
+            db.session.add_all(recettes)
+            db.session.flush()
+            self.ids = [recette.id_recette for recette in recettes]
+            self.enregistrees = set(self.ids[:2])
+            db.session.add_all([RecetteUtilisateur(id_recette=id_recette, id_utilisateur=lecteur.id_utilisateur)
+                                for id_recette in self.enregistrees])
+            db.session.commit()
+            self.token_lecteur = create_access_token(identity=str(lecteur.id_utilisateur))
+            self.token_expire = create_access_token(identity=str(lecteur.id_utilisateur),
+                                                    expires_delta=timedelta(seconds=-1))
+        invalider_pool_suggestions()
+
+    def tearDown(self):
+        invalider_pool_suggestions()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _get(self, url, token=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return response.get_json()
+
+    def _verifier_is_saved(self, recettes):
+        self.assertTrue(recettes)
+        self.assertEqual({r["id_recette"]: r["isSaved"] for r in recettes},
+                         {r["id_recette"]: r["id_recette"] in self.enregistrees for r in recettes})
+
+    def test_is_saved_connecte(self):
+        self._verifier_is_saved(self._get("/recettes/public?per_page=10", self.token_lecteur)["recettes"])
+        self._verifier_is_saved(self._get("/recettes/suggestions?limit=10", self.token_lecteur)["recettes"])
+
+    def test_anonyme_sans_is_saved(self):
+        for url in ("/recettes/public", "/recettes/suggestions"):
+            with self.subTest(url=url):
+                recettes = self._get(url)["recettes"]
+                self.assertTrue(recettes)
+                self.assertTrue(all("isSaved" not in recette for recette in recettes))
+
+    def test_token_expire_ou_malforme_traite_en_anonyme(self):
+        for url in ("/recettes/public", "/recettes/suggestions"):
+            for token in (self.token_expire, "pas-un-jwt"):
+                with self.subTest(url=url, token=token[:10]):
+                    recettes = self._get(url, token)["recettes"]
+                    self.assertTrue(all("isSaved" not in recette for recette in recettes))
+
+    def test_verifier_enregistrements(self):
+        ids = ",".join(str(i) for i in self.ids)
+        data = self._get(f"/recettes/verifier-enregistrements?ids={ids}&ids=9999", self.token_lecteur)
+        attendu = {str(i): i in self.enregistrees for i in self.ids}
+        attendu["9999"] = False
+        self.assertEqual(data["isSaved"], attendu)
+
+        headers = {"Authorization": f"Bearer {self.token_lecteur}"}
+        self.assertEqual(self.client.get("/recettes/verifier-enregistrements", headers=headers).status_code, 400)
+        self.assertEqual(self.client.get("/recettes/verifier-enregistrements?ids=1,abc",
+                                         headers=headers).status_code, 400)
+        self.assertEqual(self.client.get(f"/recettes/verifier-enregistrements?ids={ids}").status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+import os
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.utilisateur import Utilisateur
+from app.models.recette import Recette
+from app.models.ingredient import Ingredient
+from app.models.recette_ingredient import RecetteIngredient
+from app.models.inventaire import Inventaire
+from app.models.inventaire_ingredient import InventaireIngredient
+from app.models.liste_courses import ListeCourses
+from app.models.liste_courses_item import ListeCoursesItem
+from tests.test_chargement_recettes import CompteurRequetes
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        """
+        Crée deux utilisateurs ; le premier possède des recettes, un inventaire et une liste de courses.
+        """
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            auteur = Utilisateur(email="export@example.com", nom="Auteur")
+            auteur.set_password("TestPass2025")
+            autre = Utilisateur(email="export_autre@example.com", nom="Autre")
+            autre.set_password("TestPass2025")
+            farine = Ingredient(nom="Farine")
+            db.session.add_all([auteur, autre, farine])
+            db.session.flush()
+
+            for i in range(12):
+                recette = Recette(titre=f"Recette {i}", description="Ligne 1\nLigne 2, avec virgule",
+                                  id_utilisateur=auteur.id_utilisateur)
+                db.session.add(recette)
+                db.session.flush()
+                db.session.add(RecetteIngredient(id_recette=recette.id_recette, id_ingredient=farine.id_ingredient,
+                                                 quantite=100 + i, unite="g"))
+            db.session.add(Recette(titre="Recette d'un autre", id_utilisateur=autre.id_utilisateur))
+
+            inventaire = Inventaire(nom="Placard", id_utilisateur=auteur.id_utilisateur)
+            liste = ListeCourses(nom="Semaine", id_utilisateur=auteur.id_utilisateur)
+            db.session.add_all([inventaire, liste])
+            db.session.flush()
+            db.session.add_all([
+                InventaireIngredient(id_inventaire=inventaire.id_inventaire, id_ingredient=farine.id_ingredient,
+                                     quantite_disponible=1000, unite="g"),
+                ListeCoursesItem(id_liste=liste.id_liste, id_ingredient=farine.id_ingredient, quantite=500, unite="g"),
+            ])
+            db.session.commit()
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(auteur.id_utilisateur))}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _exporter(self, url):
+        response = self.client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        return response
+
+    def test_recettes_ndjson(self):
+        response = self._exporter("/recettes/export")
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        recettes = [json.loads(ligne) for ligne in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([r["titre"] for r in recettes], [f"Recette {i}" for i in range(12)])
+        self.assertEqual(recettes[3]["ingredients"][0]["nom"], "Farine")
+        self.assertEqual(recettes[3]["ingredients"][0]["quantite"], 103)
+
+    def test_recettes_csv(self):
+        response = self._exporter("/recettes/export?format=csv")
+        self.assertIn('filename="recettes.csv"', response.headers["Content-Disposition"])
+        lignes = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(len(lignes), 12)
+        self.assertEqual(lignes[0]["description"], "Ligne 1\nLigne 2, avec virgule")
+        self.assertEqual(json.loads(lignes[0]["ingredients"])[0]["nom"], "Farine")
+
+    def test_requetes_independantes_du_volume(self):
+        with self.app.app_context():
+            with CompteurRequetes(db.engine) as compteur:
+                self._exporter("/recettes/export").get_data()
+        self.assertLessEqual(compteur.total, 4)  # recettes + créateurs, ingrédients, étapes
+
+    def test_inventaires_et_courses(self):
+        inventaires = self._exporter("/inventaires/export").get_data(as_text=True).splitlines()
+        self.assertEqual(json.loads(inventaires[0])["ingredients"][0]["nom_ingredient"], "Farine")
+        courses = list(csv.DictReader(io.StringIO(
+            self._exporter("/courses/export?format=csv").get_data(as_text=True))))
+        self.assertEqual(courses[0]["nom"], "Semaine")
+        self.assertEqual(json.loads(courses[0]["items"])[0]["quantite"], 500)
+
+    def test_format_inconnu(self):
+        response = self.client.get("/recettes/export?format=xml", headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
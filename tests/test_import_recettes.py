@@ -0,0 +1,128 @@
+import json
+import os
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.utilisateur import Utilisateur
+from app.models.recette import Recette
+from app.models.ingredient import Ingredient
+from app.utils.ingredients import cache_ingredients
+from tests.test_chargement_recettes import CompteurRequetes
+
+
+class TestImportRecettes(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        self.client = self.app.test_client()
+        cache_ingredients.invalider()
+
+        with self.app.app_context():
+            db.create_all()
+            utilisateur = Utilisateur(email="import@example.com", nom="Partenaire")
+            utilisateur.set_password("TestPass2025")
+            db.session.add(utilisateur)
+            db.session.add(Ingredient(nom="Farine"))
+            db.session.commit()
+            self.id_utilisateur = utilisateur.id_utilisateur
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(utilisateur.id_utilisateur))}"}
+
+    def tearDown(self):
+        cache_ingredients.invalider()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _importer(self, lignes, params=""):
+        corps = "\n".join(l if isinstance(l, str) else json.dumps(l) for l in lignes) + "\n"
+        response = self.client.post(f"/recettes/import{params}", data=corps.encode(), headers=self.headers,
+                                    content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    @staticmethod
+    def _recette(i):
+        return {
+            "titre": f"Recette importée {i}",
+            "publique": i % 2 == 0,
+            "ingredients": [{"nom": "Farine", "quantite": 200, "unite": "g"},
+                            {"nom": f"Épice {i % 3}", "quantite": 1, "unite": "unités"}],
+            "etapes": [{"instruction": "Mélanger"}, {"instruction": "Cuire"}],
+        }
+
+    def test_import_par_lots_avec_erreurs_par_ligne(self):
+        lignes = [self._recette(i) for i in range(7)]
+        lignes.insert(2, "{pas du json")
+        lignes.insert(4, {"titre": "Doublon", "ingredients": [{"nom": "Sel", "quantite": 1, "unite": "g"}] * 2})
+        lignes.insert(5, "")
+        lignes.insert(6, {"titre": "Unité", "ingredients": [{"nom": "Sel", "quantite": 1, "unite": "tasse"}]})
+        lignes.append({"description": "sans titre"})
+
+        bilan = self._importer(lignes, "?taille_lot=3")
+        self.assertEqual(bilan["lignes"], 11)
+        self.assertEqual(bilan["importees"], 7)
+        self.assertEqual(bilan["nb_erreurs"], 4)
+        self.assertEqual([e["ligne"] for e in bilan["erreurs"]], [3, 5, 7, 12])
+        self.assertEqual(bilan["erreurs"][1]["message"], "Ingrédient en doublon: Sel")
+        self.assertEqual(bilan["erreurs"][2]["message"], "Unité invalide: tasse")
+        self.assertEqual(bilan["erreurs"][3]["message"], "Le titre est requis")
+        self.assertIsNotNone(bilan["lignes_par_seconde"])
+
+        with self.app.app_context():
+            recettes = Recette.query.order_by(Recette.id_recette).all()
+            self.assertEqual([r.titre for r in recettes], [f"Recette importée {i}" for i in range(7)])
+            self.assertTrue(all(r.id_utilisateur == self.id_utilisateur for r in recettes))
+            self.assertEqual([len(r.ingredients) for r in recettes], [2] * 7)
+            self.assertEqual([e.instruction for e in recettes[0].etapes], ["Mélanger", "Cuire"])
+            self.assertEqual(Ingredient.query.count(), 1 + 3)
+            self.assertIsNone(Ingredient.query.filter_by(nom="Sel").first())
+
+    def test_titre_invalide_erreur_de_ligne(self):
+        # Un titre mal typé est rejeté sur sa ligne sans faire échouer le lot des recettes valides
+        lignes = [self._recette(0), {"titre": 123}, {"titre": ["Liste"]}, {"titre": "   "}, {"titre": "x" * 101},
+                  self._recette(1)]
+        bilan = self._importer(lignes)
+        self.assertEqual(bilan["importees"], 2)
+        self.assertEqual([(e["ligne"], e["message"]) for e in bilan["erreurs"]], [
+            (2, "Le titre doit être une chaîne de caractères"),
+            (3, "Le titre doit être une chaîne de caractères"),
+            (4, "Le titre est requis"),
+            (5, "Le titre ne doit pas dépasser 100 caractères"),
+        ])
+        with self.app.app_context():
+            self.assertEqual(Recette.query.count(), 2)
+
+    def test_contenu_mal_type_erreur_de_ligne(self):
+        lignes = [{"titre": "Nom", "ingredients": [{"nom": 5, "quantite": 1, "unite": "g"}]},
+                  {"titre": "Étapes", "etapes": ["instruction"]},
+                  self._recette(0)]
+        bilan = self._importer(lignes)
+        self.assertEqual(bilan["importees"], 1)
+        self.assertEqual([(e["ligne"], e["message"]) for e in bilan["erreurs"]], [
+            (1, "Le nom d'un ingrédient doit être une chaîne non vide"),
+            (2, "Chaque étape doit avoir une instruction"),
+        ])
+
+    def test_requetes_par_lot_constantes(self):
+        # Crée les ingrédients, puis les met en cache : un ingrédient créé n'y entre qu'une fois relu
+        for _ in range(2):
+            self._importer([self._recette(i) for i in range(3)])
+        with self.app.app_context():
+            with CompteurRequetes(db.engine) as petit:
+                self._importer([self._recette(i) for i in range(5)], "?taille_lot=5")
+            with CompteurRequetes(db.engine) as grand:
+                self._importer([self._recette(i) for i in range(50)], "?taille_lot=50")
+            dialecte = db.engine.dialect.name
+        if dialecte == "postgresql":
+            self.assertEqual(petit.total, grand.total)
+        else:
+            # SQLite ne garantit pas l'ordre du RETURNING d'un INSERT multi-lignes : SQLAlchemy insère alors
+            # les recettes une à une, les autres tables restent en une instruction
+            autres = [[r for r in c.requetes if not r.startswith("INSERT INTO recettes ")] for c in (petit, grand)]
+            self.assertEqual(len(autres[0]), len(autres[1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import unittest
+from unittest import mock
+from app import create_app, db
+from app.models.utilisateur import Utilisateur
+from app.utils.limitation import StockageMemoire, limiteur, parser_limite
+from app.utils.mots_de_passe import service_hachage
+from tests.test_chargement_recettes import CompteurRequetes
+
+
+class TestSeauxJetons(unittest.TestCase):
+    def test_parser_limite(self):
+        self.assertEqual(parser_limite("5/minute"), (5, 5 / 60))
+        self.assertEqual(parser_limite("10/30"), (10, 10 / 30))
+        self.assertEqual(parser_limite("100/heures"), (100, 100 / 3600))
+        self.assertIsNone(parser_limite(""))
+        self.assertIsNone(parser_limite("0"))
+        for invalide in ("cinq/minute", "5/semaine", "-1/s", "5"):
+            with self.assertRaises(ValueError):
+                parser_limite(invalide)
+
+    def test_remplissage_et_eviction(self):
+        stockage = StockageMemoire(taille_max=2)
+        # 2 jetons, un de plus par seconde
+        self.assertEqual(stockage.consommer("a", 2, 1.0, maintenant=0), 0)
+        self.assertEqual(stockage.consommer("a", 2, 1.0, maintenant=0), 0)
+        self.assertAlmostEqual(stockage.consommer("a", 2, 1.0, maintenant=0.25), 0.75)
+        self.assertEqual(stockage.consommer("a", 2, 1.0, maintenant=1.25), 0)
+
+        # Au-delà de taille_max, le seau le moins récemment utilisé est oublié (et repart plein)
+        stockage.consommer("b", 2, 1.0, maintenant=1.25)
+        stockage.consommer("c", 2, 1.0, maintenant=1.25)
+        self.assertEqual(len(stockage), 2)
+        self.assertEqual(stockage.consommer("a", 2, 1.0, maintenant=1.25), 0)
+
+
+class TestLimitationAuth(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+            "HACHAGE_COUT": 4,
+            "HACHAGE_PROCESSUS": 0,
+            "LIMITATION_REGLES": {"auth": {"ip": "3/minute", "email": "2/minute"}},
+        })
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            utilisateur = Utilisateur(email="limite@example.com", nom="Test")
+            utilisateur.set_password("TestPass2025")
+            db.session.add(utilisateur)
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _connexion(self, email="limite@example.com", ip="203.0.113.1"):
+        return self.client.post("/auth/connexion", json={"email": email, "mot_de_passe": "Mauvais2025"},
+                                environ_base={"REMOTE_ADDR": ip})
+
+    def test_limite_par_email_puis_par_ip(self):
+        self.assertEqual(self._connexion().status_code, 401)
+        # La casse de l'email ne contourne pas la limite
+        self.assertEqual(self._connexion(email="Limite@Example.com").status_code, 401)
+
+        # Rejet sans requête SQL ni hachage
+        with self.app.app_context(), CompteurRequetes(db.engine) as compteur, \
+                mock.patch.object(service_hachage, "verifier") as verifier:
+            response = self._connexion(ip="203.0.113.2")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "30")
+        self.assertEqual((compteur.total, verifier.call_count), (0, 0))
+
+        # Autre email depuis la première IP : passe jusqu'à épuiser les 3 jetons de l'IP
+        self.assertEqual(self._connexion(email="autre@example.com").status_code, 401)
+        self.assertEqual(self._connexion(email="encore@example.com").status_code, 429)
+        self.assertEqual(self._connexion(email="encore@example.com", ip="203.0.113.3").status_code, 401)
+
+    def test_ip_derriere_un_proxy(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": self.app.config["SQLALCHEMY_DATABASE_URI"],
+            "PROXY_NIVEAUX": 1,
+            "LIMITATION_REGLES": {"auth": {"ip": "2/minute"}},
+        })
+        with self.app.app_context():
+            db.create_all()
+        client = self.app.test_client()
+
+        def connexion(client_ip):
+            # Toutes les requêtes arrivent depuis l'adresse du proxy
+            return client.post("/auth/connexion", json={"email": "inconnu@example.com", "mot_de_passe": "x"},
+                               environ_base={"REMOTE_ADDR": "10.0.0.1"},
+                               headers={"X-Forwarded-For": client_ip}).status_code
+
+        self.assertEqual([connexion("198.51.100.7") for _ in range(3)], [401, 401, 429])
+        # Un autre client derrière le même proxy garde son propre seau
+        self.assertEqual(connexion("198.51.100.8"), 401)
+        # Seul le dernier saut (ajouté par le proxy de confiance) compte : un en-tête forgé ne change pas la clé
+        self.assertEqual(connexion("203.0.113.9, 198.51.100.7"), 429)
+
+    def test_limites_par_blueprint_et_desactivation(self):
+        # Les autres blueprints ne sont pas limités
+        self.assertEqual(limiteur.attente("recettes", "ip", "203.0.113.1"), 0)
+        limiteur.actif = False
+        try:
+            for _ in range(4):
+                self.assertEqual(self._connexion().status_code, 401)
+        finally:
+            limiteur.actif = True
+
+    def test_stockage_partage_injoignable(self):
+        partage = mock.Mock()
+        partage.consommer.side_effect = ConnectionError("redis injoignable")
+        limiteur.stockage = partage
+        # Les seaux du worker prennent le relais : la limite s'applique toujours
+        self.assertEqual([self._connexion().status_code for _ in range(3)], [401, 401, 429])
+        self.assertEqual(partage.consommer.call_count, 6)
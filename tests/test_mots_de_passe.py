@@ -0,0 +1,120 @@
+import os
+import unittest
+from werkzeug.security import generate_password_hash
+from app import create_app, db
+from app.models.utilisateur import Utilisateur
+from app.utils.mots_de_passe import HachageSature, ServiceHachage, service_hachage
+
+
+class TestServiceHachage(unittest.TestCase):
+    def test_algorithmes_et_parametres(self):
+        for algorithme, cout, prefixe in (("bcrypt", 4, "$2b$04$"), ("scrypt", 10, "scrypt:1024:8:1$"),
+                                          ("pbkdf2", 1000, "pbkdf2:sha256:1000$")):
+            with self.subTest(algorithme=algorithme):
+                service = ServiceHachage(algorithme, cout)
+                hache = service.hacher("TestPass2025")
+                self.assertTrue(hache.startswith(prefixe))
+                self.assertTrue(service.verifier(hache, "TestPass2025"))
+                self.assertFalse(service.verifier(hache, "Mauvais2025"))
+                self.assertFalse(service.doit_rehacher(hache))
+                self.assertTrue(ServiceHachage(algorithme, cout + 1).doit_rehacher(hache))
+
+        # Un haché d'un autre algorithme reste vérifiable, mais doit être refait
+        bcrypt_4 = ServiceHachage("bcrypt", 4)
+        ancien = generate_password_hash("TestPass2025", "pbkdf2:sha256:1000")
+        self.assertTrue(bcrypt_4.verifier(ancien, "TestPass2025"))
+        self.assertTrue(bcrypt_4.doit_rehacher(ancien))
+        self.assertFalse(bcrypt_4.verifier("haché-illisible", "TestPass2025"))
+        with self.assertRaises(ValueError):
+            ServiceHachage("md5")
+
+    def test_limite_de_72_octets(self):
+        bcrypt_4 = ServiceHachage("bcrypt", 4)
+        # 36 caractères accentués = 72 octets en UTF-8 : accepté ; un de plus serait tronqué par bcrypt
+        self.assertTrue(bcrypt_4.verifier(bcrypt_4.hacher("é" * 36), "é" * 36))
+        with self.assertRaises(ValueError):
+            bcrypt_4.hacher("é" * 36 + "a")
+
+    def test_pool_de_processus_borne(self):
+        service = ServiceHachage("bcrypt", 4, processus=1, file_max=0, attente=0.05)
+        try:
+            hache = service.hacher("TestPass2025")
+            self.assertTrue(service.verifier(hache, "TestPass2025"))
+
+            # L'unique place est prise : l'appel suivant est refusé au lieu d'attendre indéfiniment
+            service._places.acquire()
+            with self.assertRaises(HachageSature):
+                service.verifier(hache, "TestPass2025")
+            service._places.release()
+            self.assertTrue(service.verifier(hache, "TestPass2025"))
+        finally:
+            service._arreter()
+
+
+class TestConnexionHachage(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+            "HACHAGE_ALGORITHME": "bcrypt",
+            "HACHAGE_COUT": 4,
+            "HACHAGE_PROCESSUS": 0,
+        })
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            # Haché produit par l'ancienne configuration (pbkdf2 de werkzeug)
+            db.session.add(Utilisateur(email="hachage@example.com", nom="Test",
+                                       mot_de_passe=generate_password_hash("TestPass2025", "pbkdf2:sha256:1000")))
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _connexion(self, mot_de_passe="TestPass2025"):
+        return self.client.post("/auth/connexion", json={"email": "hachage@example.com",
+                                                         "mot_de_passe": mot_de_passe})
+
+    def _hache(self):
+        with self.app.app_context():
+            return Utilisateur.query.filter_by(email="hachage@example.com").one().mot_de_passe
+
+    def test_rehachage_a_la_connexion(self):
+        self.assertEqual(self._connexion("Mauvais2025").status_code, 401)
+        self.assertTrue(self._hache().startswith("pbkdf2:"))
+
+        self.assertEqual(self._connexion().status_code, 200)
+        hache = self._hache()
+        self.assertTrue(hache.startswith("$2b$04$"))
+
+        # Paramètres à jour : le haché n'est plus modifié
+        self.assertEqual(self._connexion().status_code, 200)
+        self.assertEqual(self._hache(), hache)
+
+    def test_mot_de_passe_trop_long(self):
+        trop_long = "a" * 64 + "é" * 5
+        response = self.client.post("/auth/inscription", json={"email": "long@example.com", "nom": "Long",
+                                                               "mot_de_passe": trop_long})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("72 octets", response.get_json()["message"])
+        self.assertEqual(self.client.post("/auth/inscription", json={
+            "email": "long@example.com", "nom": "Long", "mot_de_passe": "a" * 72}).status_code, 201)
+
+        token = self._connexion().get_json()["access_token"]
+        response = self.client.put("/auth/profil", json={"nom": "Test", "mot_de_passe": trop_long},
+                                   headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("72 octets", response.get_json()["message"])
+
+    def test_file_de_hachage_pleine(self):
+        service_hachage.configurer("bcrypt", 4, processus=1, file_max=0, attente=0.01)
+        service_hachage._places.acquire()
+        try:
+            response = self._connexion()
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.headers["Retry-After"], "5")
+        finally:
+            service_hachage._places.release()
+            service_hachage.configurer("bcrypt", 4, processus=0)
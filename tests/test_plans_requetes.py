@@ -0,0 +1,189 @@
+import json
+import os
+import re
+import unittest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, insert
+from app import create_app, db
+from app.models.utilisateur import Utilisateur
+from app.models.etape import Etape
+from app.models.ingredient import Ingredient
+from app.models.inventaire import Inventaire
+from app.models.inventaire_ingredient import InventaireIngredient
+from app.models.liste_courses import ListeCourses
+from app.models.liste_courses_item import ListeCoursesItem
+from app.models.recette import Recette
+from app.models.recette_ingredient import RecetteIngredient
+from app.models.recette_utilisateur import RecetteUtilisateur
+
+# Tables indexées par la migration b8c9d0e1f2a3 : aucune ne doit être lue en entier par une route
+TABLES_INDEXEES = {"recettes", "recette_ingredients", "etapes", "recette_utilisateur", "inventaires",
+                   "inventaire_ingredients", "liste_courses", "liste_courses_items"}
+
+
+class CapturePlans:
+    """
+    Enregistre les SELECT envoyés au moteur pendant un bloc with, puis renvoie pour chacun les tables
+    de TABLES_INDEXEES parcourues séquentiellement d'après EXPLAIN.
+    Sous Postgres, enable_seqscan=off : un Seq Scan restant signifie qu'aucun index n'est utilisable.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.requetes = []
+
+    def _enregistrer(self, conn, cursor, statement, parameters, context, executemany):
+        if not executemany and re.match(r"\s*(SELECT|WITH)\b", statement, re.IGNORECASE):
+            self.requetes.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._enregistrer)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._enregistrer)
+
+    def _parcours_postgres(self, connexion, statement, parameters):
+        connexion.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = connexion.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        noeuds, tables = [plan[0]["Plan"]], set()
+        while noeuds:
+            noeud = noeuds.pop()
+            if noeud["Node Type"] == "Seq Scan":
+                tables.add(noeud["Relation Name"])
+            noeuds.extend(noeud.get("Plans", []))
+        return tables
+
+    def _parcours_sqlite(self, connexion, statement, parameters):
+        tables = set()
+        for ligne in connexion.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters):
+            # "SCAN recettes" (table entière) ; "SCAN ... USING INDEX" et "SEARCH ..." passent par un index
+            correspondance = re.match(r"SCAN (\w+)(?: AS \w+)?$", ligne[-1])
+            if correspondance:
+                tables.add(correspondance.group(1))
+        return tables
+
+    def parcours_sequentiels(self):
+        parcours = self._parcours_postgres if self.engine.dialect.name == "postgresql" else self._parcours_sqlite
+        resultat = {}
+        with self.engine.connect() as connexion:
+            for statement, parameters in self.requetes:
+                with connexion.begin():
+                    tables = parcours(connexion, statement, parameters) & TABLES_INDEXEES
+                if tables:
+                    resultat[statement] = sorted(tables)
+        return resultat
+
+
+class TestPlansRequetes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Jeu de données réparti sur plusieurs comptes (1 recette publique sur 10), pour que les plans
+        reflètent des filtres sélectifs ; ANALYZE met les statistiques du planificateur à jour.
+        """
+        cls.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        cls.client = cls.app.test_client()
+
+        with cls.app.app_context():
+            db.create_all()
+            utilisateurs = [Utilisateur(email=f"plan{i}@example.com", nom=f"Compte {i}") for i in range(10)]
+            for utilisateur in utilisateurs:
+                utilisateur.set_password("TestPass2025")
+            ingredients = [Ingredient(nom=f"Produit {i}") for i in range(40)]
+            db.session.add_all(utilisateurs + ingredients)
+            db.session.flush()
+            ids_utilisateurs = [u.id_utilisateur for u in utilisateurs]
+            ids_ingredients = [i.id_ingredient for i in ingredients]
+
+            db.session.execute(insert(Recette), [
+                {"titre": f"Recette {i}", "id_utilisateur": ids_utilisateurs[i % 10], "publique": i % 10 == 0}
+                for i in range(500)])
+            ids_recettes = [id_ for (id_,) in db.session.query(Recette.id_recette).order_by(Recette.id_recette)]
+            db.session.execute(insert(RecetteIngredient), [
+                {"id_recette": id_recette, "id_ingredient": ids_ingredients[(n + k) % 40], "quantite": 100,
+                 "unite": "g"} for n, id_recette in enumerate(ids_recettes) for k in range(3)])
+            db.session.execute(insert(Etape), [
+                {"id_recette": id_recette, "ordre": ordre, "instruction": "Mélanger"}
+                for id_recette in ids_recettes for ordre in (1, 2)])
+            db.session.execute(insert(RecetteUtilisateur), [
+                {"id_recette": id_recette, "id_utilisateur": ids_utilisateurs[(n + 1) % 10]}
+                for n, id_recette in enumerate(ids_recettes[::5])])
+            db.session.execute(insert(Inventaire), [
+                {"nom": f"Inventaire {i}", "id_utilisateur": ids_utilisateurs[i % 10]} for i in range(50)])
+            ids_inventaires = [id_ for (id_,) in db.session.query(Inventaire.id_inventaire)
+                               .order_by(Inventaire.id_inventaire)]
+            db.session.execute(insert(InventaireIngredient), [
+                {"id_inventaire": id_inventaire, "id_ingredient": ids_ingredients[k], "quantite_disponible": 50,
+                 "unite": "g"} for id_inventaire in ids_inventaires for k in range(10)])
+            db.session.execute(insert(ListeCourses), [
+                {"nom": f"Liste {i}", "id_utilisateur": ids_utilisateurs[i % 10],
+                 "id_inventaire": ids_inventaires[i % 50], "synchronisee": True} for i in range(200)])
+            ids_listes = [id_ for (id_,) in db.session.query(ListeCourses.id_liste)]
+            db.session.execute(insert(ListeCoursesItem), [
+                {"id_liste": id_liste, "id_ingredient": ids_ingredients[k], "quantite": 1, "unite": "g"}
+                for id_liste in ids_listes for k in range(5)])
+            db.session.commit()
+            db.session.execute(db.text("ANALYZE"))
+            db.session.commit()
+
+            cls.id_utilisateur = ids_utilisateurs[0]
+            cls.recette = ids_recettes[0]
+            cls.inventaire = ids_inventaires[0]
+            cls.liste = ListeCourses.query.filter_by(id_utilisateur=cls.id_utilisateur).first().id_liste
+            cls.headers = {"Authorization": f"Bearer {create_access_token(identity=str(cls.id_utilisateur))}"}
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _verifier(self, url, methode="get"):
+        with self.app.app_context():
+            with CapturePlans(db.engine) as capture:
+                response = getattr(self.client, methode)(url, headers=self.headers)
+            self.assertLess(response.status_code, 300, url)
+            self.assertTrue(capture.requetes, url)
+            self.assertEqual(capture.parcours_sequentiels(), {}, url)
+
+    def test_listes_de_recettes(self):
+        for url in ("/recettes/", "/recettes/?cursor=", "/recettes/privees", "/recettes/public",
+                    "/recettes/public?cursor=", "/recettes/publiques", "/recettes/enregistrées",
+                    "/recettes/suggestions"):
+            with self.subTest(url=url):
+                self._verifier(url)
+
+    def test_recette_et_enregistrements(self):
+        self._verifier(f"/recettes/{self.recette}")
+        self._verifier(f"/recettes/verifier-enregistrement/{self.recette}")
+        self._verifier(f"/recettes/verifier-enregistrements?ids={self.recette},{self.recette + 1}")
+
+    def test_inventaires(self):
+        self._verifier("/inventaires")
+        self._verifier(f"/inventaires/{self.inventaire}")
+
+    def test_listes_de_courses(self):
+        self._verifier("/courses?per_page=10")
+        self._verifier("/courses?cursor=")
+        self._verifier(f"/courses/{self.liste}")
+
+    def test_generation_et_resynchronisation(self):
+        self._verifier(f"/inventaires/{self.inventaire}/courses?id_recette={self.recette}")
+        with self.app.app_context():
+            id_ligne = InventaireIngredient.query.filter_by(id_inventaire=self.inventaire).first()\
+                .id_inventaire_ingredient
+        with self.app.app_context():
+            with CapturePlans(db.engine) as capture:
+                response = self.client.put(f"/inventaires/{self.inventaire}/ingredients/{id_ligne}",
+                                           json={"quantite_disponible": 10, "unite": "g"}, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(capture.parcours_sequentiels(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import threading
+import unittest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import create_engine, exc
+from app import create_app, db
+from app.utils.pool import PoolMesure, options_moteur, statistiques_pool
+
+
+class TestPoolConnexions(unittest.TestCase):
+    def _config(self, uri, **valeurs):
+        config = {"SQLALCHEMY_DATABASE_URI": uri, "DB_POOL_TAILLE": 3, "DB_POOL_MAX_OVERFLOW": 2,
+                  "DB_POOL_TIMEOUT": 5.0, "DB_POOL_RECYCLE": 600, "DB_POOL_PRE_PING": True,
+                  "DB_STATEMENT_TIMEOUT": 2000}
+        config.update(valeurs)
+        return config
+
+    def test_options_postgres(self):
+        options = options_moteur(self._config("postgresql://u:p@hote/base"))
+        self.assertIs(options["poolclass"], PoolMesure)
+        self.assertEqual((options["pool_size"], options["max_overflow"], options["pool_timeout"]), (3, 2, 5.0))
+        self.assertEqual((options["pool_recycle"], options["pool_pre_ping"]), (600, True))
+        self.assertEqual(options["connect_args"], {"options": "-c statement_timeout=2000"})
+        self.assertNotIn("connect_args", options_moteur(self._config("postgresql://hote/base",
+                                                                     DB_STATEMENT_TIMEOUT=0)))
+
+    def test_options_sqlite(self):
+        options = options_moteur(self._config("sqlite://"))
+        self.assertEqual(options, {"pool_pre_ping": True, "pool_recycle": 600})
+
+    def test_mesures_attente_et_timeout(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            engine = create_engine(f"sqlite:///{os.path.join(dossier, 'pool.db')}", poolclass=PoolMesure,
+                                   pool_size=1, max_overflow=0, pool_timeout=0.05)
+            connexion = engine.connect()
+            statistiques = statistiques_pool(engine)
+            self.assertEqual((statistiques["connexions_sorties"], statistiques["connexions_disponibles"]), (1, 0))
+
+            # Pool et débordement épuisés : un second worker attend pool_timeout puis échoue
+            erreurs = []
+
+            def attendre():
+                try:
+                    engine.connect()
+                except exc.TimeoutError as e:
+                    erreurs.append(e)
+
+            fil = threading.Thread(target=attendre)
+            fil.start()
+            fil.join()
+            connexion.close()
+            self.assertEqual(len(erreurs), 1)
+
+            statistiques = statistiques_pool(engine)
+            self.assertEqual((statistiques["attentes"], statistiques["timeouts"]), (2, 1))
+            self.assertGreaterEqual(statistiques["attente_max_ms"], 50)
+            self.assertEqual(statistiques["connexions_sorties"], 0)
+            engine.dispose()
+
+    def test_route_statistiques(self):
+        app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": "sqlite://"})
+        with app.app_context():
+            headers = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+        response = app.test_client().get("/sante/pool", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["pid"], os.getpid())
+        with app.app_context():
+            self.assertTrue(db.engine.pool._pre_ping)
+        self.assertEqual(app.test_client().get("/sante/pool").status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
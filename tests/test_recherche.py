@@ -0,0 +1,99 @@
+import os
+import unittest
+from datetime import timedelta
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.utilisateur import Utilisateur
+from app.models.recette import Recette
+from app.models.ingredient import Ingredient
+from app.models.inventaire import Inventaire
+
+
+class TestRecherche(unittest.TestCase):
+    def setUp(self):
+        """
+        Crée deux utilisateurs, des recettes publiques et privées, un ingrédient et un inventaire.
+        """
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            auteur = Utilisateur(email="auteur_recherche@example.com", nom="Auteur")
+            auteur.set_password("TestPass2025")
+            autre = Utilisateur(email="autre_recherche@example.com", nom="Autre")
+            autre.set_password("TestPass2025")
+            db.session.add_all([auteur, autre])
+            db.session.flush()
+
+            db.session.add_all([
+                Recette(titre="Crème brûlée", description="Dessert à la vanille", publique=True,
+                        id_utilisateur=auteur.id_utilisateur),
+                Recette(titre="Tarte aux pommes", description="Servir avec de la crème", publique=True,
+                        id_utilisateur=auteur.id_utilisateur),
+                Recette(titre="Velouté à la crème", publique=False, id_utilisateur=auteur.id_utilisateur),
+                Ingredient(nom="Crème fraîche"),
+                Inventaire(nom="Crèmerie", id_utilisateur=auteur.id_utilisateur),
+            ])
+            db.session.commit()
+            self.token_auteur = create_access_token(identity=str(auteur.id_utilisateur))
+            self.token_autre = create_access_token(identity=str(autre.id_utilisateur))
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _rechercher(self, params, token=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = self.client.get(f"/rechercher?{params}", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return [(r["type"], r["nom"]) for r in response.get_json()["results"]]
+
+    def test_insensible_aux_accents_et_prefixe(self):
+        resultats = self._rechercher("q=creme brul&types=recette")
+        self.assertEqual(resultats, [("recette", "Crème brûlée")])
+
+    def test_titre_classe_avant_description(self):
+        resultats = self._rechercher("q=crème&types=recette")
+        self.assertEqual(resultats, [("recette", "Crème brûlée"), ("recette", "Tarte aux pommes")])
+
+    def test_donnees_privees_reservees_au_proprietaire(self):
+        self.assertNotIn(("recette", "Velouté à la crème"), self._rechercher("q=creme", self.token_autre))
+        self.assertNotIn(("inventaire", "Crèmerie"), self._rechercher("q=creme", self.token_autre))
+        resultats = self._rechercher("q=creme", self.token_auteur)
+        self.assertIn(("recette", "Velouté à la crème"), resultats)
+        self.assertIn(("inventaire", "Crèmerie"), resultats)
+        self.assertIn(("ingredient", "Crème fraîche"), resultats)
+
+    def test_token_expire_ou_malforme_traite_en_anonyme(self):
+        with self.app.app_context():
+            expire = create_access_token(identity="1", expires_delta=timedelta(seconds=-1))
+        publics = self._rechercher("q=creme")
+        self.assertIn(("recette", "Crème brûlée"), publics)
+        for token in (expire, "garbage"):
+            with self.subTest(token=token[:10]):
+                self.assertEqual(self._rechercher("q=creme", token), publics)
+
+    def test_limit_offset(self):
+        tous = self._rechercher("q=creme", self.token_auteur)
+        self.assertEqual(self._rechercher("q=creme&limit=2&offset=1", self.token_auteur), tous[1:3])
+
+    def test_index_suit_les_modifications(self):
+        with self.app.app_context():
+            recette = Recette.query.filter_by(titre="Crème brûlée").first()
+            recette.titre = "Flan pâtissier"
+            db.session.commit()
+        self.assertEqual(self._rechercher("q=brulee"), [])
+        self.assertEqual(self._rechercher("q=patissier"), [("recette", "Flan pâtissier")])
+
+    def test_requete_vide(self):
+        response = self.client.get("/rechercher?q=")
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import create_engine
+from app import create_app, db
+from app.models.ingredient import Ingredient
+from app.utils.repliques import Repliques
+
+
+class TestRepliques(unittest.TestCase):
+    def setUp(self):
+        """
+        Base principale et réplique dans deux fichiers SQLite au contenu différent, pour savoir
+        laquelle a servi une lecture ; la seconde réplique pointe vers un dossier inexistant (injoignable).
+        """
+        self.dossier = tempfile.TemporaryDirectory()
+        self.urls = {nom: f"sqlite:///{os.path.join(self.dossier.name, nom + '.db')}"
+                     for nom in ("primaire", "replique")}
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": self.urls["primaire"],
+            "DATABASE_REPLICA_URLS": [self.urls["replique"]],
+            "REPLICA_LECTURE_ECRITURES": 60,
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Ingredient(nom="Primaire"))
+            db.session.commit()
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity='1')}"}
+            self.headers_autre = {"Authorization": f"Bearer {create_access_token(identity='2')}"}
+        replique = create_engine(self.urls["replique"])
+        db.metadata.create_all(replique)
+        with replique.begin() as connexion:
+            connexion.execute(Ingredient.__table__.insert(), {"nom": "Réplique"})
+        replique.dispose()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        for moteur in self.app.extensions["repliques"].moteurs:
+            moteur.dispose()
+        self.dossier.cleanup()
+
+    def _noms(self, headers=None):
+        response = self.client.get("/ingredients", headers=headers or self.headers)
+        self.assertEqual(response.status_code, 200)
+        return [ingredient["nom"] for ingredient in response.get_json()["ingredients"]]
+
+    def test_lecture_sur_replique(self):
+        self.assertEqual(self._noms(), ["Réplique"])
+        # Route non marquée : base principale
+        with self.app.app_context():
+            id_primaire = Ingredient.query.filter_by(nom="Primaire").one().id_ingredient
+        response = self.client.get(f"/ingredients/{id_primaire}", headers=self.headers)
+        self.assertEqual(response.get_json()["aliment"]["nom"], "Primaire")
+
+    def test_lecture_de_ses_ecritures(self):
+        response = self.client.post("/ingredients", json={"nom": "Sel"}, headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        # Même token, client sans cookie (Bearer seul) : lecture sur la principale
+        self.client.delete_cookie("session")
+        self.assertEqual(self._noms(), ["Primaire", "Sel"])
+        self.assertEqual(self.app.test_client().get("/ingredients", headers=self.headers)
+                         .get_json()["ingredients"][-1]["nom"], "Sel")
+        # Un autre utilisateur lit toujours la réplique
+        self.assertEqual(self._noms(self.headers_autre), ["Réplique"])
+
+    def test_rejeu_sur_la_principale(self):
+        # Requête en échec sur la réplique (table absente, comme une requête annulée par un conflit) :
+        # la vue est rejouée sur la principale plutôt que de répondre 500
+        replique = create_engine(self.urls["replique"])
+        with replique.begin() as connexion:
+            connexion.exec_driver_sql("DROP TABLE ingredients")
+        replique.dispose()
+        self.assertEqual(self._noms(), ["Primaire"])
+        # Erreur de requête, pas de connexion : la réplique reste disponible
+        self.assertEqual(len(self.app.extensions["repliques"].disponibles()), 1)
+
+    def test_repli_sur_la_principale(self):
+        repliques = self.app.extensions["repliques"]
+        injoignable = create_engine(f"sqlite:///{os.path.join(self.dossier.name, 'absent', 'x.db')}")
+        repliques.moteurs = [injoignable]
+        self.assertEqual(self._noms(), ["Primaire"])
+        self.assertEqual(repliques.disponibles(), [])
+
+    def test_selection(self):
+        moteurs = [create_engine("sqlite://") for _ in range(3)]
+        repliques = Repliques([], {"DB_POOL_PRE_PING": False, "DB_POOL_RECYCLE": -1})
+        repliques.moteurs = moteurs
+        self.assertEqual([repliques.choisir() for _ in range(4)], moteurs + moteurs[:1])
+        repliques.ecarter(moteurs[1])
+        self.assertNotIn(moteurs[1], [repliques.choisir() for _ in range(4)])
+        with self.assertRaises(ValueError):
+            Repliques([], {}, selection="aleatoire")
+
+
+if __name__ == "__main__":
+    unittest.main()
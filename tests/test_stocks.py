@@ -0,0 +1,142 @@
+import os
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.utilisateur import Utilisateur
+from app.models.ingredient import Ingredient
+from app.models.inventaire import Inventaire
+from app.models.inventaire_ingredient import InventaireIngredient
+from app.models.liste_courses_item import ListeCoursesItem
+from app.models.recette import Recette
+from app.models.recette_ingredient import RecetteIngredient
+from tests.test_chargement_recettes import CompteurRequetes
+
+
+class TestStockEnLot(unittest.TestCase):
+    def setUp(self):
+        """
+        Un inventaire avec 500 g de farine, une recette qui en demande 1 kg, et 20 autres ingrédients
+        pour comparer le coût d'une mise à jour courte et d'une longue.
+        """
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            utilisateur = Utilisateur(email="stock@example.com", nom="Test")
+            autre = Utilisateur(email="autre_stock@example.com", nom="Autre")
+            for compte in (utilisateur, autre):
+                compte.set_password("TestPass2025")
+            farine, sucre = Ingredient(nom="Farine"), Ingredient(nom="Sucre")
+            divers = [Ingredient(nom=f"Divers {i}") for i in range(20)]
+            db.session.add_all([utilisateur, autre, farine, sucre] + divers)
+            db.session.flush()
+            placard = Inventaire(nom="Placard", id_utilisateur=utilisateur.id_utilisateur)
+            voisin = Inventaire(nom="Voisin", id_utilisateur=autre.id_utilisateur)
+            recette = Recette(titre="Pain", id_utilisateur=utilisateur.id_utilisateur)
+            db.session.add_all([placard, voisin, recette])
+            db.session.flush()
+            db.session.add_all([
+                InventaireIngredient(id_inventaire=placard.id_inventaire, id_ingredient=farine.id_ingredient,
+                                     quantite_disponible=500, unite="g", prix_unitaire=0.002),
+                RecetteIngredient(id_recette=recette.id_recette, id_ingredient=farine.id_ingredient,
+                                  quantite=1, unite="kg"),
+            ])
+            db.session.commit()
+            self.farine, self.sucre = farine.id_ingredient, sucre.id_ingredient
+            self.divers = [ingredient.id_ingredient for ingredient in divers]
+            self.inventaires = (placard.id_inventaire, voisin.id_inventaire)
+            self.recette = recette.id_recette
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(utilisateur.id_utilisateur))}"}
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def _patch(self, operations, id_inventaire=None):
+        return self.client.patch(f"/inventaires/{id_inventaire or self.inventaires[0]}/ingredients",
+                                 json={"operations": operations}, headers=self.headers)
+
+    def _stock(self):
+        with self.app.app_context():
+            return sorted((ligne.id_ingredient, ligne.unite, ligne.quantite_disponible, ligne.prix_unitaire)
+                          for ligne in InventaireIngredient.query.filter_by(id_inventaire=self.inventaires[0]))
+
+    def test_operations_dans_l_ordre(self):
+        response = self._patch([
+            {"op": "add", "id_ingredient": self.farine, "quantite": 250},
+            {"op": "decrement", "id_ingredient": self.farine, "quantite": 100, "unite": "g"},
+            {"op": "set", "id_ingredient": self.sucre, "quantite": 2, "unite": "Kg", "prix_unitaire": 1.5},
+            {"op": "decrement", "id_ingredient": self.sucre, "quantite": 5, "unite": "kg"},
+            {"op": "add", "id_ingredient": self.farine, "quantite": 1, "unite": "kg"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(l["nom_ingredient"], l["unite"], l["quantite_disponible"])
+                          for l in response.get_json()["ingredients"]],
+                         [("Farine", "g", 650), ("Sucre", "kg", 0), ("Farine", "kg", 1)])
+        # Prix existant conservé quand l'opération n'en donne pas
+        self.assertEqual(self._stock(), [(self.farine, "g", 650, 0.002), (self.farine, "kg", 1, None),
+                                         (self.sucre, "kg", 0, 1.5)])
+
+    def test_liste_synchronisee_mise_a_jour(self):
+        response = self.client.get(f"/inventaires/{self.inventaires[0]}/courses?id_recette={self.recette}",
+                                   headers=self.headers)
+        id_liste = response.get_json()["id_liste"]
+        self._patch([{"op": "add", "id_ingredient": self.farine, "quantite": 300}])
+        with self.app.app_context():
+            self.assertEqual([(round(i.quantite, 6), i.unite) for i in ListeCoursesItem.query.filter_by(
+                id_liste=id_liste)], [(0.2, "kg")])
+
+    def test_transaction_unique(self):
+        self.assertEqual(self._patch([
+            {"op": "add", "id_ingredient": self.sucre, "quantite": 1},
+            {"op": "multiply", "id_ingredient": self.farine, "quantite": 2},
+        ]).status_code, 400)
+        self.assertEqual(self._patch([{"op": "add", "id_ingredient": 9999, "quantite": 1}]).status_code, 400)
+        self.assertEqual(self._patch([{"op": "set", "id_ingredient": self.sucre, "quantite": -1}]).status_code, 400)
+        self.assertEqual(self._patch([]).status_code, 400)
+        self.assertEqual(self._stock(), [(self.farine, "g", 500, 0.002)])
+
+    def test_acces_refuse(self):
+        response = self._patch([{"op": "add", "id_ingredient": self.farine, "quantite": 1}], self.inventaires[1])
+        self.assertEqual(response.status_code, 403)
+
+    def test_nombre_requetes_constant(self):
+        def compter(ids):
+            with self.app.app_context():
+                with CompteurRequetes(db.engine) as compteur:
+                    response = self._patch([{"op": "add", "id_ingredient": id_, "quantite": 1} for id_ in ids])
+            self.assertEqual(response.status_code, 200)
+            return compteur.total
+
+        compter(self.divers)  # fiches ingrédients mises en cache
+        self.assertEqual(compter(self.divers[:2]), compter(self.divers))
+
+    def test_doublon_refuse_a_l_ajout_unitaire(self):
+        response = self.client.post(f"/inventaires/{self.inventaires[0]}/ingredients",
+                                    json={"id_ingredient": self.farine, "quantite_disponible": 1, "unite": "g"},
+                                    headers=self.headers)
+        self.assertEqual(response.status_code, 409)
+
+    def test_ajout_unitaire_sans_ingredient(self):
+        response = self.client.post(f"/inventaires/{self.inventaires[0]}/ingredients",
+                                    json={"quantite_disponible": 1, "unite": "g"}, headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["message"], "id_ingredient (entier) est requis")
+        self.assertEqual(self.client.post(f"/inventaires/{self.inventaires[0]}/ingredients",
+                                          json={"id_ingredient": "1"}, headers=self.headers).status_code, 400)
+        self.assertEqual(self._stock(), [(self.farine, "g", 500, 0.002)])
+
+    def test_inventaire_inexistant(self):
+        self.assertEqual(self._patch([{"op": "add", "id_ingredient": self.farine, "quantite": 1}], 9999).status_code,
+                         404)
+        self.assertEqual(self.client.post("/inventaires/9999/ingredients", json={"id_ingredient": self.farine},
+                                          headers=self.headers).status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
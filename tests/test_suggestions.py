@@ -0,0 +1,91 @@
+import os
+import unittest
+from collections import Counter
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+from app import create_app, db
+from app.models.recette import Recette
+from app.models.utilisateur import Utilisateur
+from app.routes.recettes import SEUIL_TIRAGE_ORDER_BY, echantillon_ids_publics, invalider_pool_suggestions
+
+
+class TestSuggestions(unittest.TestCase):
+    def setUp(self):
+        """
+        Recettes publiques 1 à 20 puis, après un trou bien plus large que SEUIL_TIRAGE_ORDER_BY,
+        5001 à 5010 ; une recette privée au milieu de chaque groupe.
+        """
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            db.create_all()
+            auteur = Utilisateur(email="auteur_suggestions@example.com", nom="Auteur")
+            auteur.set_password("TestPass2025")
+            db.session.add(auteur)
+            db.session.flush()
+            self.publiques = set(range(1, 21)) | set(range(5001, 5011))
+            self.privees = {10, 5005}
+            self.publiques -= self.privees
+            db.session.execute(insert(Recette), [
+                {"id_recette": id_recette, "titre": f"Recette {id_recette}", "id_utilisateur": auteur.id_utilisateur,
+                 "publique": id_recette in self.publiques}
+                for id_recette in sorted(self.publiques | self.privees)
+            ])
+            db.session.commit()
+            self.token = create_access_token(identity=str(auteur.id_utilisateur))
+        invalider_pool_suggestions()
+
+    def tearDown(self):
+        invalider_pool_suggestions()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_echantillon_distinct_et_public(self):
+        self.assertGreater(5010 - 1, SEUIL_TIRAGE_ORDER_BY)
+        with self.app.app_context():
+            for limit in (1, 5, 50):
+                with self.subTest(limit=limit):
+                    ids = echantillon_ids_publics(limit)
+                    self.assertEqual(len(ids), len(set(ids)))
+                    self.assertLessEqual(len(ids), limit)
+                    self.assertTrue(set(ids) <= self.publiques)
+            # Assez de candidats pour couvrir toute la plage : toutes les recettes publiques
+            self.assertEqual(set(echantillon_ids_publics(300)), self.publiques)
+
+    def test_echantillon_sans_biais_apres_un_trou(self):
+        # Un tirage par pivot renverrait 5001 (premier id après le trou) presque à chaque fois
+        with self.app.app_context():
+            tirages = Counter(id_recette for _ in range(300) for id_recette in echantillon_ids_publics(1))
+        self.assertLess(tirages[5001], 60)
+        self.assertGreater(len(tirages), len(self.publiques) // 2)
+
+    def test_pool_rafraichi_apres_partage(self):
+        def suggestions():
+            response = self.client.get("/recettes/suggestions?limit=10")
+            self.assertEqual(response.status_code, 200)
+            return {recette["id_recette"] for recette in response.get_json()["recettes"]}
+
+        headers = {"Authorization": f"Bearer {self.token}"}
+        for _ in range(5):
+            self.assertFalse(suggestions() & self.privees)
+
+        response = self.client.put("/recettes/5005/partager", json={"publique": True}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        vues = set()
+        for _ in range(30):
+            vues |= suggestions()
+        self.assertIn(5005, vues)
+
+        response = self.client.put("/recettes/1/partager", json={"publique": False}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        for _ in range(10):
+            self.assertNotIn(1, suggestions())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import unittest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.utilisateur import Utilisateur
+from app.models.ingredient import Ingredient
+from app.models.inventaire import Inventaire
+from app.models.inventaire_ingredient import InventaireIngredient
+from app.models.recette import Recette
+from app.models.recette_ingredient import RecetteIngredient
+from app.utils.ingredients import cache_ingredients
+from app.utils.unites import convertir, convertir_lot, facteur, sommer, unite_canonique
+
+
+class TestRegistreUnites(unittest.TestCase):
+    def test_graphies_et_dimensions(self):
+        self.assertEqual(unite_canonique("ML"), "mL")
+        self.assertEqual(unite_canonique("unites"), "unités")
+        self.assertEqual(convertir(2, "kg", "g"), 2000)
+        self.assertEqual(convertir(25, "cl", "L"), 0.25)
+        with self.assertRaises(ValueError):
+            unite_canonique("tasse")
+        with self.assertRaises(ValueError):
+            facteur("g", "mL")  # masse et volume ne se mélangent pas sans densité
+        with self.assertRaises(ValueError):
+            facteur("unités", "g", densite=1.0)
+
+    def test_masse_volume_par_densite(self):
+        self.assertAlmostEqual(convertir(1, "L", "g", densite=1.03), 1030)
+        self.assertAlmostEqual(convertir(515, "g", "cl", densite=1.03), 50)
+
+    def test_conversion_par_lot(self):
+        self.assertEqual(convertir_lot([1, 2, 500], ["kg", "kg", "g"], ["g", "g", "kg"]), [1000, 2000, 0.5])
+        self.assertEqual(convertir_lot([1, 1], ["L", "L"], ["g", "mL"], [None, None], strict=False), [None, 1000])
+
+    def test_sommer(self):
+        totaux = sommer([
+            ("lait", 1, "L", 1.03), ("lait", 200, "g", 1.03),
+            ("creme", 20, "cl", None), ("creme", 100, "g", None),
+            ("oeufs", 3, "unités", None), ("oeufs", 2, "unites", None),
+        ])
+        self.assertAlmostEqual(totaux[("lait", "g")], 1230)
+        self.assertEqual(totaux[("creme", "mL")], 200)
+        self.assertEqual(totaux[("creme", "g")], 100)
+        self.assertEqual(totaux[("oeufs", "unités")], 5)
+
+
+class TestListeCoursesUnites(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": os.getenv("TEST_DATABASE_URL", "sqlite://"),
+        })
+        self.client = self.app.test_client()
+        cache_ingredients.invalider()
+
+        with self.app.app_context():
+            db.create_all()
+            utilisateur = Utilisateur(email="unites@example.com", nom="Test")
+            utilisateur.set_password("TestPass2025")
+            lait = Ingredient(nom="Lait", densite=1.03)
+            oeufs = Ingredient(nom="Oeufs")
+            farine = Ingredient(nom="Farine")
+            db.session.add_all([utilisateur, lait, oeufs, farine])
+            db.session.flush()
+            recette = Recette(titre="Crêpes", id_utilisateur=utilisateur.id_utilisateur)
+            inventaire = Inventaire(nom="Frigo", id_utilisateur=utilisateur.id_utilisateur)
+            db.session.add_all([recette, inventaire])
+            db.session.flush()
+            db.session.add_all([
+                RecetteIngredient(id_recette=recette.id_recette, id_ingredient=lait.id_ingredient,
+                                  quantite=50, unite="cl"),
+                RecetteIngredient(id_recette=recette.id_recette, id_ingredient=oeufs.id_ingredient,
+                                  quantite=4, unite="unités"),
+                RecetteIngredient(id_recette=recette.id_recette, id_ingredient=farine.id_ingredient,
+                                  quantite=250, unite="g"),
+                # 206 g de lait = 20 cl, 1 oeuf, farine en volume sans densité : inutilisable
+                InventaireIngredient(id_inventaire=inventaire.id_inventaire, id_ingredient=lait.id_ingredient,
+                                     quantite_disponible=206, unite="g", prix_unitaire=1.0),
+                InventaireIngredient(id_inventaire=inventaire.id_inventaire, id_ingredient=oeufs.id_ingredient,
+                                     quantite_disponible=1, unite="unités"),
+                InventaireIngredient(id_inventaire=inventaire.id_inventaire, id_ingredient=farine.id_ingredient,
+                                     quantite_disponible=1, unite="L"),
+            ])
+            db.session.commit()
+            self.url = f"/inventaires/{inventaire.id_inventaire}/courses?id_recette={recette.id_recette}"
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=str(utilisateur.id_utilisateur))}"}
+
+    def tearDown(self):
+        cache_ingredients.invalider()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+    def test_quantites_manquantes_dans_l_unite_de_la_recette(self):
+        response = self.client.get(self.url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        items = {item["nom"]: (round(item["quantite"], 6), item["unite"]) for item in response.get_json()["items"]}
+        self.assertEqual(items, {"Lait": (30, "cl"), "Oeufs": (3, "unités"), "Farine": (250, "g")})
+
+    def test_modification_invalide_sans_effet(self):
+        with self.app.app_context():
+            id_lait = Ingredient.query.filter_by(nom="Lait").one().id_ingredient
+            for corps in ({"nom": "Lait entier", "prix_unitaire": 2.0, "densite": -1},
+                          {"nom": "Lait entier", "densite": "lourd"},
+                          {"nom": "Lait entier", "prix_unitaire": "cher"},
+                          {"nom": "   "}):
+                with self.subTest(corps=corps):
+                    response = self.client.put(f"/ingredients/{id_lait}", json=corps, headers=self.headers)
+                    self.assertEqual(response.status_code, 400)
+            # Même session que les requêtes : un commit ultérieur n'y trouve aucune modification en attente
+            db.session.commit()
+            db.session.expire_all()
+            lait = db.session.get(Ingredient, id_lait)
+            self.assertEqual((lait.nom, lait.prix_unitaire, lait.densite), ("Lait", None, 1.03))
+
+            response = self.client.put(f"/ingredients/{id_lait}", json={"nom": "Lait entier", "densite": 1.035},
+                                       headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()["aliment"]["nom"], "Lait entier")
+
+
+if __name__ == "__main__":
+    unittest.main()